@@ -0,0 +1,52 @@
+// Sugestões de cidade para inputs com `data-suggest-url` e `list`.
+// Consulta /api/cities (trie em memória no backend) direto do navegador,
+// sem eventos de estado; o Reflex só recebe o valor quando o campo perde o
+// foco. As respostas são cacheáveis, então prefixos repetidos nem saem do
+// navegador.
+(() => {
+  const DELAY_MS = 120;
+  const timers = new WeakMap();
+  const controllers = new WeakMap();
+
+  async function suggest(input) {
+    const list = document.getElementById(input.getAttribute("list"));
+    const prefix = input.value.trim();
+    if (!list) return;
+    if (!prefix) {
+      list.replaceChildren();
+      return;
+    }
+    controllers.get(input)?.abort();
+    const controller = new AbortController();
+    controllers.set(input, controller);
+    const url = `${input.dataset.suggestUrl}?prefix=${encodeURIComponent(prefix)}`;
+    try {
+      const response = await fetch(url, { signal: controller.signal });
+      if (!response.ok) return;
+      const cities = await response.json();
+      list.replaceChildren(
+        ...cities.map(({ city, state, count }) => {
+          const option = document.createElement("option");
+          option.value = `${city}/${state}`;
+          option.label = `${count} ${count === 1 ? "empresa" : "empresas"}`;
+          return option;
+        })
+      );
+    } catch (error) {
+      if (error.name !== "AbortError") console.warn("city suggestions", error);
+    }
+  }
+
+  document.addEventListener("input", (event) => {
+    const input = event.target;
+    if (!(input instanceof HTMLInputElement) || !input.dataset.suggestUrl) return;
+    clearTimeout(timers.get(input));
+    const list = document.getElementById(input.getAttribute("list"));
+    if (list && [...list.options].some((option) => option.value === input.value)) {
+      // Sugestão escolhida: confirma o filtro (o blur dispara o evento)
+      input.blur();
+      return;
+    }
+    timers.set(input, setTimeout(() => suggest(input), DELAY_MS));
+  });
+})();
@@ -0,0 +1,8 @@
+"""Benchmarks dos caminhos críticos de estado e acesso a dados.
+
+Uso:
+
+    python -m benchmarks --sizes 1000 100000 1000000
+    python -m benchmarks --save-baseline benchmarks/baseline.json
+    python -m benchmarks --baseline benchmarks/baseline.json --threshold 0.25
+"""
@@ -0,0 +1,112 @@
+"""Dados sintéticos para os benchmarks."""
+
+import csv
+import datetime
+from pathlib import Path
+import random
+import uuid
+
+import bcrypt
+from sqlalchemy.engine import Engine
+
+from solar_comp.models import Company, User
+
+CITIES = [
+    ("São Paulo", "SP"),
+    ("Campinas", "SP"),
+    ("Rio de Janeiro", "RJ"),
+    ("Belo Horizonte", "MG"),
+    ("Curitiba", "PR"),
+    ("Porto Alegre", "RS"),
+    ("Recife", "PE"),
+    ("Fortaleza", "CE"),
+    ("Salvador", "BA"),
+    ("Goiânia", "GO"),
+]
+WORDS = [
+    "solar", "energia", "sol", "fotovoltaica", "luz", "verde", "renovável",
+    "painel", "instalação", "brasil", "nordeste", "sul", "tecnologia",
+]
+STATUSES = ["Pending", "Completed", "Canceled"]
+BATCH_SIZE = 10_000
+
+# Senha dos usuários sintéticos, com custo baixo para medir o caminho do banco
+PASSWORD = "benchmark"
+PASSWORD_ROUNDS = 4
+
+
+def write_items_csv(path: Path, rows: int, seed: int = 0) -> Path:
+    """Gera um items.csv com `rows` linhas."""
+    rng = random.Random(seed)
+    start = datetime.date(2023, 1, 1)
+    with path.open("w", newline="", encoding="utf-8") as file:
+        writer = csv.writer(file)
+        writer.writerow(["name", "payment", "date", "status"])
+        for index in range(rows):
+            writer.writerow(
+                [
+                    f"Item {index}",
+                    round(rng.uniform(1, 1000), 2),
+                    (start + datetime.timedelta(days=rng.randrange(365))).isoformat(),
+                    rng.choice(STATUSES),
+                ]
+            )
+    return path
+
+
+def populate_database(engine: Engine, rows: int, seed: int = 0) -> dict:
+    """Insere `rows` empresas e um usuário por empresa (limitado a 10k).
+
+    Retorna ids e e-mails de amostra para os benchmarks.
+    """
+    rng = random.Random(seed)
+    hashed = bcrypt.hashpw(PASSWORD.encode(), bcrypt.gensalt(PASSWORD_ROUNDS)).decode()
+    now = datetime.datetime.now()
+    company_ids = []
+    emails = []
+
+    with engine.begin() as connection:
+        for start in range(0, rows, BATCH_SIZE):
+            batch = []
+            for index in range(start, min(rows, start + BATCH_SIZE)):
+                city, state = rng.choice(CITIES)
+                company_id = uuid.UUID(int=rng.getrandbits(128), version=4)
+                if len(company_ids) < 1000:
+                    company_ids.append(company_id)
+                batch.append(
+                    {
+                        "id": company_id,
+                        "name": f"{rng.choice(WORDS).title()} {rng.choice(WORDS).title()} {index}",
+                        "description": " ".join(rng.choices(WORDS, k=12)),
+                        "cnpj": f"{index:014d}",
+                        "city": city,
+                        "state": state,
+                        "created_at": now,
+                        "updated_at": now,
+                        "is_active": True,
+                        "is_verified": rng.random() < 0.2,
+                        "average_rating": round(rng.uniform(1, 5), 1),
+                        "total_reviews": rng.randrange(200),
+                    }
+                )
+            connection.execute(Company.__table__.insert(), batch)
+
+        users = []
+        for index in range(min(rows, BATCH_SIZE)):
+            email = f"user{index}@example.com"
+            emails.append(email)
+            users.append(
+                {
+                    "id": uuid.UUID(int=rng.getrandbits(128), version=4),
+                    "email": email,
+                    "hashed_password": hashed,
+                    "full_name": f"Usuário {index}",
+                    "user_type": "consumer",
+                    "created_at": now,
+                    "updated_at": now,
+                    "is_active": True,
+                }
+            )
+        connection.execute(User.__table__.insert(), users)
+
+    return {"company_ids": company_ids, "emails": emails[:1000]}
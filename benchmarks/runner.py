@@ -0,0 +1,278 @@
+"""Execução dos benchmarks, relatório e comparação com o baseline."""
+
+import argparse
+import asyncio
+from dataclasses import asdict, dataclass
+import datetime
+import json
+from pathlib import Path
+import random
+import statistics
+import sys
+import tempfile
+import time
+import tracemalloc
+from typing import Awaitable, Callable, Dict, List, Optional, Union
+import uuid
+
+# table_state antes de database: o rx.State precisa ser carregado antes do
+# sqlmodel, como acontece na importação do app
+from solar_comp.backend import table_state, database
+from solar_comp.backend.companies import company_cache
+from solar_comp.backend.leads import BATCH_SIZE, LeadRecord, commit_leads, lead_queue
+from solar_comp.backend.passwords import password_hasher
+from solar_comp.backend.table_state import TableState
+from solar_comp.state.auth import AuthState
+from solar_comp.state.company import CompanyState, LeadState
+
+from . import data
+
+DEFAULT_SIZES = [1_000, 100_000, 1_000_000]
+DEFAULT_THRESHOLD = 0.25
+
+Call = Callable[[], Union[None, Awaitable[None]]]
+
+
+@dataclass
+class Result:
+    """Latência (ms) e pico de memória (KiB) de um benchmark."""
+
+    name: str
+    size: int
+    iterations: int
+    p50_ms: float
+    p95_ms: float
+    p99_ms: float
+    peak_kib: float
+
+    @property
+    def key(self) -> str:
+        return f"{self.name}@{self.size}"
+
+
+def percentile(values: List[float], fraction: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, round(fraction * (len(ordered) - 1)))]
+
+
+def measure(
+    loop: asyncio.AbstractEventLoop,
+    name: str,
+    size: int,
+    make_call: Callable[[int], Call],
+    iterations: int,
+    warmup: int = 3,
+) -> Result:
+    """Mede `iterations` chamadas; o pico de memória vem de uma chamada extra
+    sob tracemalloc, para não distorcer as latências."""
+
+    def run(index: int) -> float:
+        call = make_call(index)
+        start = time.perf_counter()
+        outcome = call()
+        if asyncio.iscoroutine(outcome):
+            loop.run_until_complete(outcome)
+        return (time.perf_counter() - start) * 1000
+
+    for index in range(warmup):
+        run(-index - 1)
+    timings = [run(index) for index in range(iterations)]
+
+    tracemalloc.start()
+    tracemalloc.reset_peak()
+    run(iterations)
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+
+    return Result(
+        name=name,
+        size=size,
+        iterations=iterations,
+        p50_ms=statistics.median(timings),
+        p95_ms=percentile(timings, 0.95),
+        p99_ms=percentile(timings, 0.99),
+        peak_kib=peak / 1024,
+    )
+
+
+def table_benchmarks(loop, size: int, workdir: Path, iterations: int) -> List[Result]:
+    """TableState: lista filtrada/ordenada (linhas) e página (colunas)."""
+    table_state.ITEMS_PATH = data.write_items_csv(workdir / f"items_{size}.csv", size)
+    rng = random.Random(size)
+    searches = ["", "item 1", "pend", "2023-0", "99", "canceled", "item 4242"]
+    sorts = ["", "name", "payment", "date", "status"]
+
+    results = []
+    for column_store, name, var in [
+        (False, "table.filtered_sorted_items", "filtered_sorted_items"),
+        (True, "table.get_current_page", "get_current_page"),
+    ]:
+        state = TableState(_reflex_internal_init=True)
+        state.column_store = column_store
+        # load_entries é um evento em segundo plano; aqui a carga é direta
+        state._set_entries(*table_state.load_rows(column_store))
+
+        def make_call(index, state=state, var=var):
+            state.search_value = rng.choice(searches)
+            state.sort_value = rng.choice(sorts)
+            state.sort_reverse = rng.random() < 0.5
+            state.offset = 0
+            return lambda: getattr(state, var)
+
+        results.append(measure(loop, name, size, make_call, iterations))
+    return results
+
+
+def database_benchmarks(loop, size: int, workdir: Path, iterations: int) -> List[Result]:
+    """CompanyState, LeadState e AuthState contra um SQLite temporário."""
+    engine = database.configure_engines(f"sqlite:///{workdir / f'bench_{size}.db'}")
+    database.create_db_and_tables(engine)
+    sample = data.populate_database(engine, size)
+    password_hasher.rounds = data.PASSWORD_ROUNDS
+    rng = random.Random(size)
+
+    companies = CompanyState(_reflex_internal_init=True)
+
+    def load_companies(index):
+        company_cache.invalidate()  # mede a consulta, não o cache
+        return companies.load_companies
+
+    def filter_companies(index):
+        company_cache.invalidate()
+
+        async def call():
+            # set_search_query só agenda a busca em segundo plano; aqui a
+            # consulta roda direto
+            companies.search_query = " ".join(rng.sample(data.WORDS, 2))
+            await companies.load_companies()
+            companies.filter_companies
+
+        return call
+
+    leads = LeadState(_reflex_internal_init=True)
+
+    def send_lead(index):
+        leads.lead_name = "Cliente"
+        leads.lead_email = "cliente@example.com"
+        leads.lead_message = "Quero um orçamento"
+        leads.selected_company_id = str(rng.choice(sample["company_ids"]))
+        return leads.send_lead
+
+    def commit_batch(index):
+        # O worker grava os leads de send_lead depois; aqui se mede um lote
+        # cheio de commit_leads, sem a fila
+        records = [
+            LeadRecord(
+                id=uuid.uuid4(),
+                company_id=rng.choice(sample["company_ids"]),
+                name="Cliente",
+                email="cliente@example.com",
+                phone=None,
+                message="Quero um orçamento",
+                created_at=datetime.datetime.now(),
+            )
+            for _ in range(BATCH_SIZE)
+        ]
+
+        def call():
+            with engine.begin() as connection:
+                commit_leads(connection, records)
+
+        return call
+
+    auth = AuthState(_reflex_internal_init=True)
+
+    def login(index):
+        auth.email = rng.choice(sample["emails"])
+        auth.password = data.PASSWORD
+        return auth.login
+
+    results = [
+        measure(loop, "company.load_companies", size, load_companies, iterations),
+        measure(loop, "company.filter_companies", size, filter_companies, iterations),
+        measure(loop, "lead.send_lead", size, send_lead, iterations),
+        measure(loop, "lead.commit_leads", size, commit_batch, iterations),
+        measure(loop, "auth.login", size, login, iterations),
+    ]
+    # Grava o que send_lead deixou na fila, esvaziando o journal
+    loop.run_until_complete(lead_queue.drain())
+    loop.run_until_complete(database.get_async_engine().dispose())
+    engine.dispose()
+    return results
+
+
+def compare(
+    results: List[Result], baseline: Dict[str, dict], threshold: float
+) -> List[str]:
+    """Lista as regressões acima de `threshold` (fração) em p95 ou memória."""
+    regressions = []
+    for result in results:
+        reference = baseline.get(result.key)
+        if not reference:
+            continue
+        for metric in ("p95_ms", "peak_kib"):
+            limit = reference[metric] * (1 + threshold)
+            value = getattr(result, metric)
+            if value > limit:
+                regressions.append(
+                    f"{result.key} {metric}: {value:.2f} > {limit:.2f} "
+                    f"(baseline {reference[metric]:.2f})"
+                )
+    return regressions
+
+
+def report(results: List[Result]) -> None:
+    print(f"{'benchmark':<32} {'linhas':>9} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} {'pico KiB':>10}")
+    for result in results:
+        print(
+            f"{result.name:<32} {result.size:>9} {result.p50_ms:>9.2f} "
+            f"{result.p95_ms:>9.2f} {result.p99_ms:>9.2f} {result.peak_kib:>10.1f}"
+        )
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m benchmarks")
+    parser.add_argument("--sizes", type=int, nargs="+", default=DEFAULT_SIZES)
+    parser.add_argument("--iterations", type=int, default=50)
+    parser.add_argument("--only", choices=["table", "database"])
+    parser.add_argument("--baseline", type=Path, help="JSON para comparar os resultados")
+    parser.add_argument("--save-baseline", type=Path, help="grava os resultados como baseline")
+    parser.add_argument(
+        "--threshold",
+        type=float,
+        default=DEFAULT_THRESHOLD,
+        help="regressão tolerada em relação ao baseline (0.25 = 25%%)",
+    )
+    args = parser.parse_args(argv)
+
+    loop = asyncio.new_event_loop()
+    results: List[Result] = []
+    with tempfile.TemporaryDirectory(prefix="solar-bench-") as tmp:
+        workdir = Path(tmp)
+        # O journal da fila de leads (LEAD_JOURNAL_DIR) fica no diretório
+        # temporário, não em ./lead_journal
+        lead_queue.directory = workdir / "lead_journal"
+        for size in args.sizes:
+            if args.only in (None, "table"):
+                results += table_benchmarks(loop, size, workdir, args.iterations)
+            if args.only in (None, "database"):
+                results += database_benchmarks(loop, size, workdir, args.iterations)
+    loop.close()
+
+    report(results)
+
+    if args.save_baseline:
+        args.save_baseline.write_text(
+            json.dumps({result.key: asdict(result) for result in results}, indent=2)
+        )
+        print(f"Baseline gravado em {args.save_baseline}")
+
+    if args.baseline:
+        regressions = compare(
+            results, json.loads(args.baseline.read_text()), args.threshold
+        )
+        if regressions:
+            print("Regressões:", *regressions, sep="\n  ", file=sys.stderr)
+            return 1
+        print("Sem regressões em relação ao baseline.")
+    return 0
@@ -0,0 +1,150 @@
+"""HTTP endpoints served by the Reflex backend."""
+
+import csv
+import io
+from typing import Iterator
+import zlib
+
+from starlette.applications import Starlette
+from starlette.requests import Request
+from starlette.responses import JSONResponse, StreamingResponse
+from starlette.routing import Route
+
+from .cities import TOP_K, city_index
+from .companies import company_cache, search_coalescer
+from .delta_metrics import delta_size_middleware
+from .item_store import ItemColumns, load_item_columns
+from .leads import lead_queue
+from .notifications import notification_dispatcher
+from .passwords import password_hasher
+from .table_state import ITEMS_PATH
+
+EXPORT_CHUNK_ROWS = 5000
+EXPORT_FIELDS = ["name", "payment", "date", "status"]
+# Browsers may reuse a suggestion list for this long
+CITY_SUGGESTIONS_MAX_AGE = 300
+
+
+def iter_items_csv(
+    columns: ItemColumns,
+    search: str = "",
+    sort: str = "",
+    reverse: bool = False,
+    chunk_rows: int = EXPORT_CHUNK_ROWS,
+) -> Iterator[bytes]:
+    """Yield the matching rows as CSV, `chunk_rows` rows per chunk."""
+    indices = columns.query(search, sort, reverse)
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(EXPORT_FIELDS)
+    for start in range(0, len(indices), chunk_rows):
+        for row in columns.rows(indices[start : start + chunk_rows]):
+            writer.writerow([row[field] for field in EXPORT_FIELDS])
+        yield buffer.getvalue().encode("utf-8")
+        buffer.seek(0)
+        buffer.truncate()
+    if buffer.tell():
+        yield buffer.getvalue().encode("utf-8")
+
+
+def gzip_chunks(chunks: Iterator[bytes]) -> Iterator[bytes]:
+    """Compress a stream of chunks into a single gzip stream."""
+    compressor = zlib.compressobj(wbits=31)  # 31: gzip container
+    for chunk in chunks:
+        compressed = compressor.compress(chunk)
+        if compressed:
+            yield compressed
+    yield compressor.flush()
+
+
+def export_items(request: Request) -> StreamingResponse:
+    """Stream the table rows matching the current search and sort.
+
+    The response body comes from a synchronous generator, which Starlette
+    iterates in a worker thread with chunked transfer encoding, so even
+    very large exports are never held in memory or run on the event loop.
+    """
+    params = request.query_params
+    chunks = iter_items_csv(
+        load_item_columns(ITEMS_PATH),
+        search=params.get("search", ""),
+        sort=params.get("sort", ""),
+        reverse=params.get("reverse", "").lower() in ("1", "true"),
+    )
+    filename = "items.csv"
+    media_type = "text/csv; charset=utf-8"
+    if params.get("gzip", "").lower() in ("1", "true"):
+        chunks = gzip_chunks(chunks)
+        filename += ".gz"
+        media_type = "application/gzip"
+    return StreamingResponse(
+        chunks,
+        media_type=media_type,
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'},
+    )
+
+
+async def city_suggestions(request: Request) -> JSONResponse:
+    """Top cities starting with `prefix` (optionally within `state`).
+
+    Answered from the in-memory trie on the event loop; the response is
+    public and cacheable, so repeated prefixes are served by the browser.
+    """
+    params = request.query_params
+    try:
+        limit = min(max(1, int(params.get("limit", TOP_K))), TOP_K)
+    except ValueError:
+        limit = TOP_K
+    entries = city_index.complete(params.get("prefix", ""), params.get("state", ""), limit)
+    return JSONResponse(
+        [{"city": entry.city, "state": entry.state, "count": entry.count} for entry in entries],
+        headers={
+            "Cache-Control": f"public, max-age={CITY_SUGGESTIONS_MAX_AGE}",
+            # Fetched from the frontend origin, which differs from the API's
+            "Access-Control-Allow-Origin": "*",
+        },
+    )
+
+
+def delta_metrics(request: Request) -> JSONResponse:
+    """Bytes sent to the browser per event handler."""
+    return JSONResponse(delta_size_middleware.stats())
+
+
+def search_metrics(request: Request) -> JSONResponse:
+    """Company search events received vs searches actually run."""
+    return JSONResponse(search_coalescer.stats().as_dict())
+
+
+def company_cache_metrics(request: Request) -> JSONResponse:
+    """Company page cache: hits, misses, evictions and invalidations."""
+    return JSONResponse(company_cache.stats().as_dict())
+
+
+def lead_metrics(request: Request) -> JSONResponse:
+    """Lead ingestion queue depth, outcomes and commit latency."""
+    return JSONResponse(lead_queue.stats().as_dict())
+
+
+def notification_metrics(request: Request) -> JSONResponse:
+    """Lead notification dispatcher: deliveries, retries and rate limiting."""
+    return JSONResponse(notification_dispatcher.stats().as_dict())
+
+
+def password_metrics(request: Request) -> JSONResponse:
+    """Password hashing pool: work factor, queue and latency."""
+    return JSONResponse(password_hasher.metrics().as_dict())
+
+
+api = Starlette(
+    routes=[
+        Route("/api/items/export", export_items, methods=["GET"]),
+        Route("/api/cities", city_suggestions, methods=["GET"]),
+        Route("/api/metrics/deltas", delta_metrics, methods=["GET"]),
+        Route("/api/metrics/search", search_metrics, methods=["GET"]),
+        Route("/api/metrics/company-cache", company_cache_metrics, methods=["GET"]),
+        Route("/api/metrics/leads", lead_metrics, methods=["GET"]),
+        Route("/api/metrics/notifications", notification_metrics, methods=["GET"]),
+        Route("/api/metrics/passwords", password_metrics, methods=["GET"]),
+    ]
+)
@@ -0,0 +1,124 @@
+"""Cache em memória compartilhado pelo processo."""
+
+from collections import OrderedDict
+from dataclasses import asdict, dataclass
+import threading
+import time
+from typing import Any, Awaitable, Callable, Dict, Hashable, Optional
+
+
+@dataclass
+class CacheStats:
+    """Contadores de uso de um cache."""
+
+    hits: int = 0
+    misses: int = 0
+    evictions: int = 0
+    expirations: int = 0
+    invalidations: int = 0
+    size: int = 0
+
+    @property
+    def hit_rate(self) -> float:
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups else 0.0
+
+    def as_dict(self) -> Dict[str, Any]:
+        return {**asdict(self), "hit_rate": self.hit_rate}
+
+
+class TTLCache:
+    """Cache LRU com tamanho máximo e tempo de vida por entrada.
+
+    É seguro para uso entre threads. O carregamento em `get_or_load` roda
+    fora do lock, então duas sessões podem carregar a mesma chave ao mesmo
+    tempo; a última a terminar prevalece.
+    """
+
+    def __init__(
+        self,
+        maxsize: int = 256,
+        ttl: float = 60.0,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._clock = clock
+        self._data: "OrderedDict[Hashable, tuple[float, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._generation = 0
+        self._stats = CacheStats()
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        """Retorna o valor em cache, ou `default` se ausente ou expirado."""
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is not None:
+                expires_at, value = entry
+                if expires_at > self._clock():
+                    self._data.move_to_end(key)
+                    self._stats.hits += 1
+                    return value
+                del self._data[key]
+                self._stats.expirations += 1
+            self._stats.misses += 1
+            return default
+
+    def set(self, key: Hashable, value: Any) -> None:
+        """Armazena um valor, descartando os menos usados se necessário."""
+        with self._lock:
+            self._store(key, value)
+
+    def get_or_load(self, key: Hashable, loader: Callable[[], Any]) -> Any:
+        """Leitura com carregamento: chama `loader` apenas em caso de miss."""
+        missing = object()
+        value = self.get(key, missing)
+        if value is not missing:
+            return value
+        generation = self._generation
+        value = loader()
+        with self._lock:
+            # Não guarda resultados carregados antes de uma invalidação
+            if generation == self._generation:
+                self._store(key, value)
+        return value
+
+    async def aget_or_load(
+        self, key: Hashable, loader: Callable[[], Awaitable[Any]]
+    ) -> Any:
+        """Versão de `get_or_load` para carregamentos assíncronos."""
+        missing = object()
+        value = self.get(key, missing)
+        if value is not missing:
+            return value
+        generation = self._generation
+        value = await loader()
+        with self._lock:
+            if generation == self._generation:
+                self._store(key, value)
+        return value
+
+    def invalidate(self, key: Optional[Hashable] = None) -> None:
+        """Remove uma chave, ou todo o conteúdo se nenhuma for informada."""
+        with self._lock:
+            if key is None:
+                self._data.clear()
+                self._generation += 1
+            else:
+                self._data.pop(key, None)
+            self._stats.invalidations += 1
+
+    def stats(self) -> CacheStats:
+        """Cópia dos contadores atuais."""
+        with self._lock:
+            return CacheStats(**{**asdict(self._stats), "size": len(self._data)})
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def _store(self, key: Hashable, value: Any) -> None:
+        self._data[key] = (self._clock() + self.ttl, value)
+        self._data.move_to_end(key)
+        while len(self._data) > self.maxsize:
+            self._data.popitem(last=False)
+            self._stats.evictions += 1
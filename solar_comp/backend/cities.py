@@ -0,0 +1,171 @@
+"""Autocompletar de cidades do filtro de empresas.
+
+Uma trie em memória guarda as cidades distintas de `company` (com a UF e o
+número de empresas ativas), com o nome normalizado sem acentos como chave.
+Cada nó mantém as `TOP_K` cidades com mais empresas abaixo dele, então uma
+consulta só percorre os caracteres do prefixo. Há uma trie com todas as
+cidades e uma por UF.
+
+O índice é montado na partida e recalculado a cada
+`CITY_INDEX_REFRESH_SECONDS` (padrão: uma hora), o que cobre importações e
+escritas feitas por fora da aplicação; cadastros pelo formulário entram na
+hora com `city_index.add`. O navegador consulta `/api/cities` (ver
+`backend/api.py`) sem passar por eventos de estado.
+"""
+
+import asyncio
+from dataclasses import dataclass
+import logging
+import os
+from typing import Dict, Iterable, List, Tuple
+
+from sqlalchemy import func, select
+from sqlalchemy.engine import Connection
+
+from ..models.company import Company
+from .geo import normalize_place
+
+logger = logging.getLogger(__name__)
+
+# Sugestões guardadas por nó da trie (e máximo por consulta)
+TOP_K = 10
+
+_CityKey = Tuple[str, str]  # (cidade normalizada, UF)
+
+
+@dataclass
+class CityEntry:
+    """Uma cidade do índice: nome para exibição, UF e empresas ativas."""
+
+    city: str
+    state: str
+    count: int = 0
+
+
+class _Node:
+    __slots__ = ("children", "top")
+
+    def __init__(self):
+        self.children: Dict[str, "_Node"] = {}
+        self.top: List[_CityKey] = []
+
+
+class CityIndex:
+    """Trie de prefixos das cidades, com as mais frequentes em cada nó."""
+
+    def __init__(self):
+        self._entries: Dict[_CityKey, CityEntry] = {}
+        self._tries: Dict[str, _Node] = {"": _Node()}
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def add(self, city: str, state: str, count: int = 1) -> None:
+        """Soma `count` empresas à cidade, criando-a se for nova."""
+        name = normalize_place(city)
+        state = state.strip().upper()
+        if not name:
+            return
+        key = (name, state)
+        entry = self._entries.get(key)
+        if entry is None:
+            entry = self._entries[key] = CityEntry(" ".join(city.split()), state)
+        entry.count += count
+        self._insert(self._tries[""], name, key)
+        self._insert(self._tries.setdefault(state, _Node()), name, key)
+
+    @classmethod
+    def from_rows(cls, rows: Iterable[Tuple[str, str, int]]) -> "CityIndex":
+        """Índice a partir de linhas (cidade, UF, empresas).
+
+        Grafias diferentes da mesma cidade são somadas; a mais frequente
+        é a exibida.
+        """
+        index = cls()
+        for city, state, count in sorted(rows, key=lambda row: -row[2]):
+            index.add(city, state, count)
+        return index
+
+    def replace(self, other: "CityIndex") -> None:
+        """Passa a servir o conteúdo de `other` (chamar no event loop)."""
+        self._entries, self._tries = other._entries, other._tries
+
+    def complete(self, prefix: str, state: str = "", limit: int = TOP_K) -> List[CityEntry]:
+        """Cidades que começam com `prefix`, das que têm mais empresas."""
+        node = self._tries.get(state.strip().upper())
+        for char in _prefix_key(prefix):
+            if node is None:
+                break
+            node = node.children.get(char)
+        if node is None:
+            return []
+        return [self._entries[key] for key in node.top[:limit]]
+
+    def _rank(self, key: _CityKey):
+        entry = self._entries[key]
+        return -entry.count, entry.city
+
+    def _insert(self, node: _Node, name: str, key: _CityKey) -> None:
+        # As contagens só crescem entre duas cargas, então basta reordenar
+        # a lista de cada nó do caminho
+        self._update_top(node, key)
+        for char in name:
+            node = node.children.setdefault(char, _Node())
+            self._update_top(node, key)
+
+    def _update_top(self, node: _Node, key: _CityKey) -> None:
+        top = node.top
+        if key not in top:
+            top.append(key)
+        top.sort(key=self._rank)
+        del top[TOP_K:]
+
+
+def _prefix_key(prefix: str) -> str:
+    """Prefixo normalizado, mantendo um espaço final ("sao " ≠ "sao")."""
+    key = normalize_place(prefix)
+    if key and prefix[-1:].isspace():
+        key += " "
+    return key
+
+
+city_index = CityIndex()
+
+
+def city_counts(connection: Connection) -> List[Tuple[str, str, int]]:
+    """(cidade, UF, empresas ativas), com uma consulta agrupada."""
+    company = Company.__table__
+    return [
+        tuple(row)
+        for row in connection.execute(
+            select(company.c.city, company.c.state, func.count())
+            .where(company.c.is_active)
+            .group_by(company.c.city, company.c.state)
+        )
+    ]
+
+
+def build_city_index(connection: Connection) -> CityIndex:
+    """Monta um índice novo a partir das empresas ativas."""
+    return CityIndex.from_rows(city_counts(connection))
+
+
+def _build() -> CityIndex:
+    from .database import get_engine
+
+    with get_engine().connect() as connection:
+        return build_city_index(connection)
+
+
+async def refresh_city_index_periodically():
+    """Tarefa de ciclo de vida: monta o índice na partida e o recalcula a
+    cada `CITY_INDEX_REFRESH_SECONDS`."""
+    interval = float(os.environ.get("CITY_INDEX_REFRESH_SECONDS", 3600))
+    while True:
+        try:
+            # Monta numa thread e troca no event loop, onde rodam `add` e
+            # `complete`, então nenhuma consulta vê um índice pela metade
+            city_index.replace(await asyncio.to_thread(_build))
+        except Exception:
+            logger.exception("Falha ao montar o índice de cidades")
+        await asyncio.sleep(interval)
@@ -0,0 +1,50 @@
+"""Validação e geração de CNPJs."""
+
+import random
+import re
+from typing import Optional
+
+_WEIGHTS_1 = (5, 4, 3, 2, 9, 8, 7, 6, 5, 4, 3, 2)
+_WEIGHTS_2 = (6,) + _WEIGHTS_1
+_NON_DIGITS = re.compile(r"\D")
+
+
+def _check_digit(digits: str, weights) -> str:
+    remainder = sum(int(d) * w for d, w in zip(digits, weights)) % 11
+    return "0" if remainder < 2 else str(11 - remainder)
+
+
+def check_digits(base: str) -> str:
+    """Os dois dígitos verificadores dos 12 primeiros dígitos do CNPJ."""
+    first = _check_digit(base, _WEIGHTS_1)
+    return first + _check_digit(base + first, _WEIGHTS_2)
+
+
+def normalize_cnpj(value: str) -> str:
+    """Remove pontuação ("12.345.678/0001-95" -> "12345678000195")."""
+    return _NON_DIGITS.sub("", value or "")
+
+
+def is_valid_cnpj(value: str) -> bool:
+    """Confere tamanho e dígitos verificadores (aceita CNPJ formatado)."""
+    digits = normalize_cnpj(value)
+    if len(digits) != 14 or digits == digits[0] * 14:
+        return False
+    return digits[12:] == check_digits(digits[:12])
+
+
+def format_cnpj(value: str) -> str:
+    """Formata como 12.345.678/0001-95."""
+    d = normalize_cnpj(value)
+    return f"{d[:2]}.{d[2:5]}.{d[5:8]}/{d[8:12]}-{d[12:]}"
+
+
+def make_cnpj(number: int, branch: int = 1) -> str:
+    """CNPJ válido e único para `number` (raiz de 8 dígitos) e filial."""
+    base = f"{number % 10**8:08d}{branch:04d}"
+    return base + check_digits(base)
+
+
+def random_cnpj(rng: Optional[random.Random] = None) -> str:
+    """CNPJ válido aleatório (matriz, filial 0001)."""
+    return make_cnpj((rng or random).randrange(10**8))
@@ -0,0 +1,72 @@
+"""Coalescência de eventos repetidos por sessão ("só o mais recente roda").
+
+Usado pela busca de empresas: cada tecla (ou mudança de filtro) dispara uma
+busca, mas, para a mesma sessão, uma busca nova cancela a anterior ainda em
+andamento, e cada uma espera `delay` segundos antes de tocar o banco. Numa
+rajada, só a última chega a consultar.
+"""
+
+import asyncio
+from dataclasses import asdict, dataclass
+from typing import Any, Awaitable, Callable, Dict, Hashable, Optional, TypeVar
+
+T = TypeVar("T")
+
+
+@dataclass
+class CoalesceStats:
+    """Contadores de um `LatestOnly`."""
+
+    calls: int = 0  # eventos recebidos
+    started: int = 0  # chamadas que passaram da espera e rodaram
+    completed: int = 0
+    superseded: int = 0  # canceladas por uma chamada mais nova
+
+    @property
+    def calls_per_run(self) -> float:
+        return self.calls / self.completed if self.completed else 0.0
+
+    def as_dict(self) -> Dict[str, Any]:
+        return {**asdict(self), "calls_per_run": self.calls_per_run}
+
+
+class LatestOnly:
+    """Executa apenas a chamada mais recente de cada chave (por exemplo, sessão).
+
+    `run` deve ser aguardado dentro da task que faz o trabalho (um
+    background event do Reflex, por exemplo): é essa task que é cancelada
+    quando uma chamada mais nova chega com a mesma chave.
+    """
+
+    def __init__(self, delay: float = 0.0):
+        self.delay = delay
+        self._tasks: Dict[Hashable, asyncio.Task] = {}
+        self._stats = CoalesceStats()
+
+    async def run(self, key: Hashable, func: Callable[[], Awaitable[T]]) -> Optional[T]:
+        """Espera `delay` e executa `func`; retorna None se for substituída."""
+        self._stats.calls += 1
+        current = asyncio.current_task()
+        previous = self._tasks.get(key)
+        if previous is not None and previous is not current:
+            previous.cancel()
+        self._tasks[key] = current
+        try:
+            if self.delay:
+                await asyncio.sleep(self.delay)
+            self._stats.started += 1
+            result = await func()
+            self._stats.completed += 1
+            return result
+        except asyncio.CancelledError:
+            if self._tasks.get(key) is current:
+                raise  # Cancelamento externo (por exemplo, desligamento)
+            self._stats.superseded += 1
+            return None
+        finally:
+            if self._tasks.get(key) is current:
+                del self._tasks[key]
+
+    def stats(self) -> CoalesceStats:
+        """Cópia dos contadores atuais."""
+        return CoalesceStats(**asdict(self._stats))
@@ -0,0 +1,370 @@
+"""Consultas paginadas e filtradas de empresas."""
+
+from dataclasses import dataclass, field
+import os
+from typing import List, Optional, Tuple
+import uuid
+
+from sqlalchemy import func, literal_column
+from sqlmodel import Session, col, or_, select
+
+from ..models.company import Company
+from . import geo, search
+from .cache import TTLCache
+from .coalesce import LatestOnly
+
+# Tamanho padrão e máximo de uma página de empresas
+PAGE_SIZE = 20
+MAX_PAGE_SIZE = 100
+
+# Raio máximo da busca "perto de mim", em km
+MAX_RADIUS_KM = 500.0
+
+# Páginas já consultadas, compartilhadas entre as sessões do processo.
+# Escritas em `company` devem chamar `company_cache.invalidate()`.
+COMPANY_CACHE_SIZE = 512
+COMPANY_CACHE_TTL = 60.0
+company_cache = TTLCache(maxsize=COMPANY_CACHE_SIZE, ttl=COMPANY_CACHE_TTL)
+
+# Buscas disparadas pelos filtros: por sessão, só a mais recente consulta o
+# banco. A espera (s) dá tempo de a próxima tecla cancelar a anterior.
+SEARCH_COALESCE_SECONDS = float(os.environ.get("SEARCH_COALESCE_SECONDS", 0.1))
+search_coalescer = LatestOnly(delay=SEARCH_COALESCE_SECONDS)
+
+
+@dataclass(frozen=True)
+class CompanyFilters:
+    """Filtros da listagem, já normalizados para a consulta SQL."""
+
+    query: str = ""
+    city: str = ""
+    state: str = ""
+    min_rating: float = 0.0
+    # Busca por raio: (latitude, longitude) do centro e raio em km
+    near: Optional[Tuple[float, float]] = None
+    radius_km: float = 0.0
+
+    @classmethod
+    def from_form(
+        cls,
+        query: str = "",
+        city: str = "",
+        state: str = "",
+        min_rating: str = "0",
+        near: Optional[Tuple[float, float]] = None,
+        radius_km: str = "0",
+    ) -> "CompanyFilters":
+        """Normaliza os valores digitados nos filtros da página."""
+        try:
+            rating = max(0.0, float(min_rating))
+        except (ValueError, TypeError):
+            rating = 0.0  # Ignora se não for um número válido
+        try:
+            radius = min(max(0.0, float(radius_km)), MAX_RADIUS_KM)
+        except (ValueError, TypeError):
+            radius = 0.0
+        if near is not None and radius > 0:
+            # ~100 m de precisão: posições vizinhas reaproveitam o cache
+            near = (round(near[0], 3), round(near[1], 3))
+        else:
+            near, radius = None, 0.0
+        return cls(
+            query=" ".join(query.split()),
+            city=city.strip().lower(),
+            state=state.strip().upper(),
+            min_rating=rating,
+            near=near,
+            radius_km=radius,
+        )
+
+
+@dataclass
+class CompanyPage:
+    """Uma página de empresas e os cursores para navegar a partir dela."""
+
+    companies: List[Company] = field(default_factory=list)
+    # Distância (km) de cada empresa ao centro, só na busca por raio
+    distances: List[float] = field(default_factory=list)
+    next_cursor: Optional[str] = None
+    prev_cursor: Optional[str] = None
+
+
+def encode_cursor(company: Company) -> str:
+    """Gera o cursor (average_rating, id) de uma empresa."""
+    return f"{company.average_rating!r}:{company.id.hex}"
+
+
+def decode_cursor(cursor: Optional[str]) -> Optional[Tuple[float, uuid.UUID]]:
+    """Interpreta um cursor; retorna None se estiver ausente ou inválido."""
+    if not cursor:
+        return None
+    rating, _, raw_id = cursor.partition(":")
+    try:
+        return float(rating), uuid.UUID(raw_id)
+    except ValueError:
+        return None
+
+
+def page_cache_key(
+    filters: CompanyFilters,
+    after: Optional[str] = None,
+    before: Optional[str] = None,
+    offset: int = 0,
+    page_size: int = PAGE_SIZE,
+) -> tuple:
+    """Chave de cache de uma página: filtros normalizados mais a posição."""
+    if after:
+        position = ("after", after)
+    elif before:
+        position = ("before", before)
+    else:
+        position = ("offset", max(0, offset))
+    return (
+        filters.query.lower(),
+        filters.city,
+        filters.state,
+        filters.min_rating,
+        filters.near,
+        filters.radius_km,
+        position,
+        page_size,
+    )
+
+
+def offset_cursor(offset: int) -> str:
+    """Gera um cursor de offset, usado quando a ordem não permite keyset."""
+    return f"@{offset}"
+
+
+def decode_offset_cursor(cursor: Optional[str]) -> Optional[int]:
+    """Interpreta um cursor de offset; retorna None para outros cursores."""
+    if not cursor or not cursor.startswith("@"):
+        return None
+    try:
+        return max(0, int(cursor[1:]))
+    except ValueError:
+        return None
+
+
+def fetch_company_page(
+    session: Session,
+    after: Optional[str] = None,
+    before: Optional[str] = None,
+    offset: int = 0,
+    page_size: int = PAGE_SIZE,
+    filters: CompanyFilters = CompanyFilters(),
+) -> CompanyPage:
+    """Busca uma página de empresas ativas ordenadas por avaliação.
+
+    A navegação usa keyset sobre (average_rating, id): `after` avança a partir
+    do último item da página atual e `before` volta a partir do primeiro. Sem
+    cursor válido, cai para `offset`, útil para entrar direto numa página.
+    A leitura começa no cursor dentro do índice (ver `_seek`), então toda
+    página custa o mesmo, não importa a profundidade.
+
+    Os filtros viram condições parametrizadas na própria consulta; com busca
+    textual, as empresas vêm ordenadas por relevância, e com busca por raio,
+    pela distância.
+    """
+    page_size = max(1, min(page_size, MAX_PAGE_SIZE))
+    if filters.near or filters.query:
+        cursor_offset = decode_offset_cursor(after or before)
+        fetch_page = _nearby_page if filters.near else _search_page
+        return fetch_page(
+            session,
+            filters,
+            offset if cursor_offset is None else cursor_offset,
+            page_size,
+        )
+    statement = filtered_statement(filters)
+
+    after_key = decode_cursor(after)
+    before_key = decode_cursor(before)
+
+    if before_key is not None:
+        rows = _seek(session, statement, *before_key, page_size + 1, descending=False)
+        has_previous = len(rows) > page_size
+        rows = rows[:page_size][::-1]
+        return CompanyPage(
+            companies=rows,
+            next_cursor=encode_cursor(rows[-1]) if rows else None,
+            prev_cursor=encode_cursor(rows[0]) if rows and has_previous else None,
+        )
+
+    if after_key is not None:
+        rows = _seek(session, statement, *after_key, page_size + 1, descending=True)
+        has_previous = True
+    else:
+        offset = max(0, offset)
+        statement = statement.order_by(
+            Company.average_rating.desc(), Company.id.desc()
+        ).offset(offset)
+        rows = list(session.exec(statement.limit(page_size + 1)).all())
+        has_previous = offset > 0
+
+    has_next = len(rows) > page_size
+    rows = rows[:page_size]
+    return CompanyPage(
+        companies=rows,
+        next_cursor=encode_cursor(rows[-1]) if rows and has_next else None,
+        prev_cursor=encode_cursor(rows[0]) if rows and has_previous else None,
+    )
+
+
+def _seek(
+    session: Session,
+    statement,
+    rating: float,
+    company_id: uuid.UUID,
+    limit: int,
+    descending: bool,
+) -> List[Company]:
+    """Até `limit` empresas depois do cursor (rating, id), na direção pedida.
+
+    `(rating, id) < cursor` numa condição só (OR ou row value) não vira
+    faixa de índice no SQLite, que então percorreria tudo antes do cursor.
+    Aqui são duas faixas: o resto do empate em `rating` e, se faltar,
+    as avaliações seguintes; cada uma começa direto no cursor.
+    """
+    if descending:
+        ties = statement.where(
+            Company.average_rating == rating, Company.id < company_id
+        ).order_by(Company.id.desc())
+        rest = statement.where(Company.average_rating < rating).order_by(
+            Company.average_rating.desc(), Company.id.desc()
+        )
+    else:
+        ties = statement.where(
+            Company.average_rating == rating, Company.id > company_id
+        ).order_by(Company.id.asc())
+        rest = statement.where(Company.average_rating > rating).order_by(
+            Company.average_rating.asc(), Company.id.asc()
+        )
+    rows = list(session.exec(ties.limit(limit)).all())
+    if len(rows) < limit:
+        rows += session.exec(rest.limit(limit - len(rows))).all()
+    return rows
+
+
+def filtered_statement(filters: CompanyFilters, *columns):
+    """SELECT das empresas ativas com os filtros de cidade, UF e avaliação.
+
+    A cidade é comparada por `lower(city)`, a mesma expressão do índice
+    `ix_company_active_city_rating`; sem cidade, a UF usa
+    `ix_company_active_state_rating`, e sem nenhum dos dois vale
+    `ix_company_active_rating`. Em todos os casos o índice já entrega a ordem
+    (average_rating, id) da paginação. Sem `columns`, seleciona a entidade
+    `Company` inteira.
+    """
+    statement = select(*(columns or (Company,))).where(Company.is_active == True)
+    if filters.city:
+        statement = statement.where(func.lower(Company.city) == filters.city)
+    if filters.state and filters.city:
+        # `state || ''` tira a UF da escolha de índice: com cidade, o índice
+        # da cidade é mais seletivo que ix_company_active_state_rating
+        statement = statement.where(Company.state + "" == filters.state)
+    elif filters.state:
+        statement = statement.where(Company.state == filters.state)
+    if filters.min_rating > 0:
+        statement = statement.where(Company.average_rating >= filters.min_rating)
+    return statement
+
+
+def explain_company_query(session: Session, filters: CompanyFilters) -> List[str]:
+    """Plano de execução (EXPLAIN QUERY PLAN) da primeira página filtrada.
+
+    Útil para conferir quais índices o SQLite escolhe para os filtros.
+    """
+    statement = filtered_statement(filters).order_by(
+        Company.average_rating.desc(), Company.id.desc()
+    ).limit(PAGE_SIZE)
+    compiled = statement.compile(
+        dialect=session.get_bind().dialect, compile_kwargs={"literal_binds": True}
+    )
+    rows = session.connection().exec_driver_sql(f"EXPLAIN QUERY PLAN {compiled}")
+    return [row[-1] for row in rows]
+
+
+def _search_page(
+    session: Session, filters: CompanyFilters, offset: int, page_size: int
+) -> CompanyPage:
+    """Página de resultados da busca textual, paginada por offset.
+
+    No SQLite a consulta parte do índice FTS5, então o custo acompanha o
+    número de empresas encontradas; outros bancos usam ILIKE.
+    """
+    offset = max(0, offset)
+    bind = session.get_bind()
+    statement = _text_match(filtered_statement(filters), bind, filters.query)
+    if statement is None:
+        return CompanyPage()
+    if search.fts_available(bind):
+        statement = statement.order_by(search.fts_rank(), Company.id)
+    else:
+        statement = statement.order_by(Company.average_rating.desc(), Company.id.desc())
+
+    rows = list(session.exec(statement.offset(offset).limit(page_size + 1)).all())
+    has_next = len(rows) > page_size
+    return CompanyPage(
+        companies=rows[:page_size],
+        next_cursor=offset_cursor(offset + page_size) if has_next else None,
+        prev_cursor=offset_cursor(max(0, offset - page_size)) if offset > 0 else None,
+    )
+
+
+def _text_match(statement, bind, query: str):
+    """Aplica a busca textual a um SELECT de `company`.
+
+    No SQLite junta o índice FTS5; nos demais bancos usa ILIKE. Retorna
+    None se o texto não tiver nenhum termo pesquisável.
+    """
+    if search.fts_available(bind):
+        expression = search.match_expression(query)
+        if expression is None:
+            return None
+        return statement.join(
+            search.company_fts,
+            search.company_fts.c.rowid == literal_column("company.rowid"),
+        ).where(search.fts_match(expression))
+    pattern = f"%{query}%"
+    return statement.where(
+        or_(col(Company.name).ilike(pattern), col(Company.description).ilike(pattern))
+    )
+
+
+def _nearby_page(
+    session: Session, filters: CompanyFilters, offset: int, page_size: int
+) -> CompanyPage:
+    """Página da busca por raio, da empresa mais próxima para a mais distante.
+
+    O índice espacial limita a leitura ao retângulo do raio, e só
+    (id, latitude, longitude) dos candidatos é lido; as empresas completas
+    são carregadas apenas para a página pedida.
+    """
+    offset = max(0, offset)
+    bind = session.get_bind()
+    latitude, longitude = filters.near
+    statement = geo.within_box(
+        filtered_statement(filters, Company.id, Company.latitude, Company.longitude),
+        bind,
+        geo.bounding_box(latitude, longitude, filters.radius_km),
+    )
+    if filters.query:
+        statement = _text_match(statement, bind, filters.query)
+        if statement is None:
+            return CompanyPage()
+
+    ranked = geo.rank_by_distance(session, statement, latitude, longitude, filters.radius_km)
+    window = ranked[offset:offset + page_size]
+    ids = [company_id for _, company_id in window]
+    companies = {}
+    if ids:
+        statement = select(Company).where(col(Company.id).in_(ids))
+        companies = {company.id: company for company in session.exec(statement)}
+    has_next = len(ranked) > offset + page_size
+    return CompanyPage(
+        companies=[companies[company_id] for company_id in ids],
+        distances=[distance for distance, _ in window],
+        next_cursor=offset_cursor(offset + page_size) if has_next else None,
+        prev_cursor=offset_cursor(max(0, offset - page_size)) if offset > 0 else None,
+    )
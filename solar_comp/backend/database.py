@@ -0,0 +1,239 @@
+"""Engines e sessões de banco de dados da aplicação.
+
+Toda a aplicação usa as engines criadas aqui, a partir do `db_url` do
+`rxconfig.py` (que o Reflex também aceita pela variável de ambiente
+`DB_URL`, por exemplo para apontar para um Postgres). O pool e o ajuste do
+SQLite são configurados pelas variáveis de `DatabaseSettings`.
+"""
+
+from contextlib import asynccontextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass
+import os
+from typing import AsyncIterator, List, Optional
+
+from sqlalchemy import event, inspect, text
+from sqlalchemy.engine import Engine, make_url
+from sqlalchemy.ext.asyncio import AsyncEngine, create_async_engine
+from sqlalchemy.schema import CreateColumn, CreateIndex
+from sqlmodel import SQLModel, create_engine
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+# Drivers assíncronos usados para cada banco
+_ASYNC_DRIVERS = {
+    "sqlite": "sqlite+aiosqlite",
+    "postgresql": "postgresql+asyncpg",
+}
+
+
+def _env_int(name: str, default: int) -> int:
+    value = os.environ.get(name)
+    return int(value) if value else default
+
+
+@dataclass(frozen=True)
+class DatabaseSettings:
+    """Parâmetros de pool e de desempenho do banco."""
+
+    pool_size: int = 5
+    max_overflow: int = 10
+    pool_timeout: int = 30
+    pool_recycle: int = 1800
+    # PRAGMAs aplicados a cada conexão SQLite
+    sqlite_mmap_size: int = 256 * 1024 * 1024  # bytes
+    sqlite_cache_size: int = -64 * 1024  # negativo = KiB
+    echo: bool = False
+
+    @classmethod
+    def from_env(cls) -> "DatabaseSettings":
+        """Lê as configurações das variáveis de ambiente `DB_*`."""
+        defaults = cls()
+        return cls(
+            pool_size=_env_int("DB_POOL_SIZE", defaults.pool_size),
+            max_overflow=_env_int("DB_MAX_OVERFLOW", defaults.max_overflow),
+            pool_timeout=_env_int("DB_POOL_TIMEOUT", defaults.pool_timeout),
+            pool_recycle=_env_int("DB_POOL_RECYCLE", defaults.pool_recycle),
+            sqlite_mmap_size=_env_int("DB_SQLITE_MMAP_SIZE", defaults.sqlite_mmap_size),
+            sqlite_cache_size=_env_int("DB_SQLITE_CACHE_SIZE", defaults.sqlite_cache_size),
+            echo=os.environ.get("DB_ECHO", "").lower() in ("1", "true", "yes"),
+        )
+
+
+def database_url() -> str:
+    """URL do banco configurada no `rxconfig.py`."""
+    from reflex.config import get_config
+
+    return get_config().db_url or "sqlite:///solar_marketplace.db"
+
+
+def to_async_url(url: str) -> str:
+    """Converte uma URL síncrona para o driver assíncrono equivalente."""
+    parsed = make_url(url)
+    backend = parsed.get_backend_name()
+    if backend not in _ASYNC_DRIVERS or "+" in parsed.drivername:
+        return url
+    return parsed.set(drivername=_ASYNC_DRIVERS[backend]).render_as_string(
+        hide_password=False
+    )
+
+
+def _engine_options(url: str, settings: DatabaseSettings) -> dict:
+    """Opções de pool adequadas ao banco da URL."""
+    parsed = make_url(url)
+    options = {"echo": settings.echo}
+    if parsed.get_backend_name() == "sqlite" and parsed.database in (None, "", ":memory:"):
+        # Bancos em memória usam um pool próprio, de conexão única
+        return options
+    options.update(
+        pool_size=settings.pool_size,
+        max_overflow=settings.max_overflow,
+        pool_timeout=settings.pool_timeout,
+        pool_recycle=settings.pool_recycle,
+        pool_pre_ping=parsed.get_backend_name() != "sqlite",
+    )
+    return options
+
+
+def _install_sqlite_pragmas(engine: Engine, settings: DatabaseSettings) -> None:
+    """Aplica WAL e os demais PRAGMAs de desempenho a cada nova conexão."""
+    if engine.dialect.name != "sqlite":
+        return
+
+    @event.listens_for(engine, "connect")
+    def _set_pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        cursor.execute("PRAGMA journal_mode=WAL")
+        cursor.execute("PRAGMA synchronous=NORMAL")
+        cursor.execute(f"PRAGMA mmap_size={int(settings.sqlite_mmap_size)}")
+        cursor.execute(f"PRAGMA cache_size={int(settings.sqlite_cache_size)}")
+        cursor.close()
+
+
+def create_db_engine(
+    url: Optional[str] = None, settings: Optional[DatabaseSettings] = None
+) -> Engine:
+    """Cria uma engine síncrona (scripts, migrações e inicialização)."""
+    url = url or database_url()
+    settings = settings or DatabaseSettings.from_env()
+    engine = create_engine(url, **_engine_options(url, settings))
+    _install_sqlite_pragmas(engine, settings)
+    return engine
+
+
+def create_async_db_engine(
+    url: Optional[str] = None, settings: Optional[DatabaseSettings] = None
+) -> AsyncEngine:
+    """Cria uma engine assíncrona (event handlers)."""
+    url = to_async_url(url or database_url())
+    settings = settings or DatabaseSettings.from_env()
+    engine = create_async_engine(url, **_engine_options(url, settings))
+    _install_sqlite_pragmas(engine.sync_engine, settings)
+    return engine
+
+
+_engine: Optional[Engine] = None
+_async_engine: Optional[AsyncEngine] = None
+
+
+def get_engine() -> Engine:
+    """Engine síncrona compartilhada pelo processo."""
+    global _engine
+    if _engine is None:
+        _engine = create_db_engine()
+    return _engine
+
+
+def get_async_engine() -> AsyncEngine:
+    """Engine assíncrona compartilhada pelo processo."""
+    global _async_engine
+    if _async_engine is None:
+        _async_engine = create_async_db_engine()
+    return _async_engine
+
+
+def configure_engines(
+    url: Optional[str] = None, settings: Optional[DatabaseSettings] = None
+) -> Engine:
+    """Recria as engines compartilhadas para outra URL (scripts e benchmarks)."""
+    global _engine, _async_engine
+    _engine = create_db_engine(url, settings)
+    _async_engine = create_async_db_engine(url, settings)
+    return _engine
+
+
+def _add_missing_columns(connection) -> List[str]:
+    """Adiciona colunas novas dos modelos a tabelas que já existem.
+
+    Só cobre colunas que aceitam NULL ou têm `server_default`. Retorna os
+    nomes `tabela.coluna` adicionados.
+    """
+    inspector = inspect(connection)
+    added = []
+    for table in SQLModel.metadata.sorted_tables:
+        existing = {column["name"] for column in inspector.get_columns(table.name)}
+        for column in table.columns:
+            if column.name not in existing:
+                spec = CreateColumn(column).compile(dialect=connection.dialect)
+                connection.execute(text(f"ALTER TABLE {table.name} ADD COLUMN {spec}"))
+                added.append(f"{table.name}.{column.name}")
+    return added
+
+
+def create_db_and_tables(engine: Engine) -> None:
+    """Cria as tabelas, as colunas e índices que faltarem e os índices de busca e espacial."""
+    from .. import models  # noqa: F401 - registra as tabelas no metadata
+    from .geo import ensure_company_geo, geocode_companies
+    from .inbox import rebuild_unread_counters
+    from .ratings import check_company_ratings, repair_company_ratings
+    from .rollups import rebuild_daily_activity
+    from .search import ensure_company_search
+
+    with engine.connect() as connection:
+        existing = set(inspect(connection).get_table_names())
+    SQLModel.metadata.create_all(engine)
+    # create_all não cria colunas nem índices novos em tabelas que já existem
+    with engine.begin() as connection:
+        added = _add_missing_columns(connection)
+        for table in SQLModel.metadata.sorted_tables:
+            for index in table.indexes:
+                connection.execute(CreateIndex(index, if_not_exists=True))
+        if "company.rating_sum" in added:
+            # A soma nova começa zerada: preenche a partir das avaliações
+            repair_company_ratings(connection, check_company_ratings(connection))
+        if "dailyactivity" not in existing:
+            # Rollup novo: preenche a partir do histórico
+            rebuild_daily_activity(connection)
+        if "unreadcounter" not in existing:
+            # Contadores novos: preenche a partir das mensagens não lidas
+            rebuild_unread_counters(connection)
+        if "company.latitude" in added:
+            # Coordenadas novas: geocodifica as empresas que já existem
+            geocode_companies(connection)
+    ensure_company_search(engine)
+    ensure_company_geo(engine)
+
+
+_current_session: ContextVar[Optional[AsyncSession]] = ContextVar(
+    "current_session", default=None
+)
+
+
+@asynccontextmanager
+async def async_session() -> AsyncIterator[AsyncSession]:
+    """Sessão assíncrona da requisição, para uso em event handlers.
+
+    As consultas não bloqueiam o event loop. Chamadas aninhadas dentro do
+    mesmo handler (por exemplo, `register_company` recarregando a lista)
+    reutilizam a sessão já aberta, e portanto a mesma conexão; quem abriu a
+    sessão é quem a fecha.
+    """
+    current = _current_session.get()
+    if current is not None:
+        yield current
+        return
+    async with AsyncSession(get_async_engine(), expire_on_commit=False) as session:
+        token = _current_session.set(session)
+        try:
+            yield session
+        finally:
+            _current_session.reset(token)
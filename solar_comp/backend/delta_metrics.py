@@ -0,0 +1,63 @@
+"""Medição do tamanho das atualizações de estado enviadas ao navegador."""
+
+from dataclasses import asdict, dataclass
+import logging
+import threading
+from typing import Dict
+
+from reflex.middleware import Middleware
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class DeltaStats:
+    """Bytes enviados pelo websocket para um event handler."""
+
+    updates: int = 0
+    total_bytes: int = 0
+    max_bytes: int = 0
+    last_bytes: int = 0
+
+    @property
+    def mean_bytes(self) -> float:
+        return self.total_bytes / self.updates if self.updates else 0.0
+
+
+class DeltaSizeMiddleware(Middleware):
+    """Registra, por evento, o tamanho do JSON de cada atualização enviada.
+
+    Atualizações acima de `warn_bytes` são registradas no log, o que ajuda a
+    achar vars grandes que deveriam ser backend-only.
+    """
+
+    def __init__(self, warn_bytes: int = 256 * 1024):
+        self.warn_bytes = warn_bytes
+        self._stats: Dict[str, DeltaStats] = {}
+        self._lock = threading.Lock()
+
+    async def preprocess(self, app, state, event):
+        return None
+
+    async def postprocess(self, app, state, event, update):
+        size = len(update.json().encode("utf-8"))
+        with self._lock:
+            stats = self._stats.setdefault(event.name, DeltaStats())
+            stats.updates += 1
+            stats.total_bytes += size
+            stats.max_bytes = max(stats.max_bytes, size)
+            stats.last_bytes = size
+        if size > self.warn_bytes:
+            logger.warning("Atualização de %d bytes enviada por %s", size, event.name)
+        return update
+
+    def stats(self) -> Dict[str, dict]:
+        """Cópia das estatísticas por evento."""
+        with self._lock:
+            return {
+                name: {**asdict(stats), "mean_bytes": stats.mean_bytes}
+                for name, stats in self._stats.items()
+            }
+
+
+delta_size_middleware = DeltaSizeMiddleware()
@@ -0,0 +1,44 @@
+"""Redução de séries temporais para os gráficos (Largest-Triangle-Three-Buckets).
+
+O LTTB mantém o primeiro e o último ponto e, de cada um dos `threshold - 2`
+baldes intermediários, o ponto que forma o maior triângulo com o ponto já
+escolhido no balde anterior e a média do balde seguinte. Picos e vales
+sobrevivem, ao contrário de uma média simples por balde.
+
+As médias dos baldes e as áreas de cada balde são calculadas com NumPy; só
+a escolha encadeada (um passo por balde) fica em Python.
+"""
+
+import numpy as np
+
+
+def lttb(x: np.ndarray, y: np.ndarray, threshold: int) -> np.ndarray:
+    """Índices, em ordem, dos `threshold` pontos escolhidos de (x, y)."""
+    x = np.asarray(x, dtype=float)
+    y = np.asarray(y, dtype=float)
+    size = len(x)
+    if threshold >= size or threshold < 3:
+        return np.arange(size)
+
+    # Limites dos baldes sobre os pontos internos 1..size-2
+    edges = np.linspace(1, size - 1, threshold - 1).astype(int)
+    counts = np.diff(edges)
+    starts = edges[:-1] - 1
+    mean_x = np.add.reduceat(x[1:-1], starts) / counts
+    mean_y = np.add.reduceat(y[1:-1], starts) / counts
+    # O "balde seguinte" do último balde é o último ponto
+    next_x = np.append(mean_x[1:], x[-1])
+    next_y = np.append(mean_y[1:], y[-1])
+
+    selected = np.empty(threshold, dtype=int)
+    selected[0], selected[-1] = 0, size - 1
+    a = 0
+    for bucket in range(threshold - 2):
+        start, end = edges[bucket], edges[bucket + 1]
+        area = np.abs(
+            (x[a] - next_x[bucket]) * (y[start:end] - y[a])
+            - (x[a] - x[start:end]) * (next_y[bucket] - y[a])
+        )
+        a = start + int(np.argmax(area))
+        selected[bucket + 1] = a
+    return selected
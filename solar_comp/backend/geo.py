@@ -0,0 +1,283 @@
+"""Localização das empresas e busca por raio ("perto de mim").
+
+As coordenadas vêm de geocodificação offline: `city`/`state` são procurados
+na base de municípios empacotada em `solar_comp/data/municipios.csv`
+(nome, UF, latitude, longitude — o mesmo formato da lista do IBGE, que pode
+substituir o arquivo). Não há chamadas a serviços externos.
+
+No SQLite, as coordenadas ficam também no índice espacial `company_geo`
+(módulo R*Tree), com o rowid de `company` como chave e mantido por triggers.
+A busca por raio consulta só o retângulo que contém o círculo e calcula a
+distância real (haversine) dos candidatos. Para preencher as coordenadas de
+empresas antigas ou reconstruir o índice (por exemplo, após um VACUUM):
+
+    python -m solar_comp.backend.geo geocode
+    python -m solar_comp.backend.geo rebuild
+"""
+
+import argparse
+import csv
+from functools import lru_cache
+import math
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+import unicodedata
+import uuid
+
+from sqlalchemy import bindparam, column, literal_column, select, table, text
+from sqlalchemy.engine import Connection, Engine
+from sqlalchemy.ext.compiler import compiles
+from sqlalchemy.sql.expression import Join
+from sqlmodel import Session
+
+from ..models.company import Company
+
+GEO_TABLE = "company_geo"
+MUNICIPALITIES_FILE = Path(__file__).resolve().parent.parent / "data" / "municipios.csv"
+
+EARTH_RADIUS_KM = 6371.0088
+KM_PER_DEGREE = 111.32
+
+_GEO_DDL = [
+    f"""
+    CREATE VIRTUAL TABLE IF NOT EXISTS {GEO_TABLE} USING rtree(
+        id, min_lat, max_lat, min_lon, max_lon
+    )
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS company_geo_ai AFTER INSERT ON company
+    WHEN new.latitude IS NOT NULL AND new.longitude IS NOT NULL BEGIN
+        INSERT INTO {GEO_TABLE} VALUES
+            (new.rowid, new.latitude, new.latitude, new.longitude, new.longitude);
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS company_geo_ad AFTER DELETE ON company BEGIN
+        DELETE FROM {GEO_TABLE} WHERE id = old.rowid;
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS company_geo_au AFTER UPDATE OF latitude, longitude ON company BEGIN
+        DELETE FROM {GEO_TABLE} WHERE id = old.rowid;
+        INSERT INTO {GEO_TABLE}
+            SELECT new.rowid, new.latitude, new.latitude, new.longitude, new.longitude
+            WHERE new.latitude IS NOT NULL AND new.longitude IS NOT NULL;
+    END
+    """,
+]
+
+# Representação do índice para uso em consultas (chave = rowid de `company`)
+company_geo = table(
+    GEO_TABLE,
+    column("id"),
+    column("min_lat"),
+    column("max_lat"),
+    column("min_lon"),
+    column("max_lon"),
+)
+
+
+def normalize_place(name: str) -> str:
+    """Nome de cidade sem acentos, em minúsculas e com espaços simples."""
+    decomposed = unicodedata.normalize("NFKD", name)
+    stripped = "".join(char for char in decomposed if not unicodedata.combining(char))
+    return " ".join(stripped.lower().split())
+
+
+@lru_cache(maxsize=1)
+def load_municipalities() -> Dict[Tuple[str, str], Tuple[float, float]]:
+    """Coordenadas por (cidade normalizada, UF), lidas uma vez do CSV."""
+    with open(MUNICIPALITIES_FILE, newline="", encoding="utf-8") as handle:
+        return {
+            (normalize_place(row["nome"]), row["uf"].strip().upper()): (
+                float(row["latitude"]),
+                float(row["longitude"]),
+            )
+            for row in csv.DictReader(handle)
+        }
+
+
+def geocode(city: str, state: str) -> Optional[Tuple[float, float]]:
+    """(latitude, longitude) do município, ou None se não estiver na base."""
+    if not city or not state:
+        return None
+    return load_municipalities().get((normalize_place(city), state.strip().upper()))
+
+
+def geocode_companies(connection: Connection) -> int:
+    """Preenche as coordenadas das empresas que ainda não as têm.
+
+    Uma consulta lista os pares (cidade, UF) distintos e um UPDATE em lote
+    grava cada par encontrado na base. Retorna quantos pares foram
+    geocodificados.
+    """
+    company = Company.__table__
+    pairs = connection.execute(
+        select(company.c.city, company.c.state)
+        .where(company.c.latitude.is_(None))
+        .distinct()
+    ).all()
+    params = []
+    for city, state in pairs:
+        position = geocode(city, state)
+        if position is not None:
+            params.append({"b_city": city, "b_state": state, "b_lat": position[0], "b_lon": position[1]})
+    if params:
+        connection.execute(
+            company.update()
+            .where(
+                company.c.city == bindparam("b_city"),
+                company.c.state == bindparam("b_state"),
+                company.c.latitude.is_(None),
+            )
+            .values(latitude=bindparam("b_lat"), longitude=bindparam("b_lon")),
+            params,
+        )
+    return len(params)
+
+
+def geo_index_available(bind) -> bool:
+    """Indica se o banco usa o índice R*Tree (apenas SQLite)."""
+    return bind.dialect.name == "sqlite"
+
+
+def ensure_company_geo(engine: Engine) -> bool:
+    """Cria o índice R*Tree e os triggers, se ainda não existirem.
+
+    Retorna True se o índice acabou de ser criado; nesse caso ele é
+    populado com as empresas que já têm coordenadas.
+    """
+    if not geo_index_available(engine):
+        return False
+    with engine.begin() as connection:
+        exists = connection.execute(
+            text("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = :name"),
+            {"name": GEO_TABLE},
+        ).first()
+        for statement in _GEO_DDL:
+            connection.exec_driver_sql(statement)
+        if not exists:
+            _rebuild(connection)
+    return not exists
+
+
+def rebuild_company_geo(engine: Engine) -> None:
+    """Reconstrói o índice R*Tree a partir da tabela `company`."""
+    ensure_company_geo(engine)
+    with engine.begin() as connection:
+        _rebuild(connection)
+
+
+def _rebuild(connection: Connection) -> None:
+    connection.exec_driver_sql(f"DELETE FROM {GEO_TABLE}")
+    connection.exec_driver_sql(
+        f"""
+        INSERT INTO {GEO_TABLE}
+        SELECT rowid, latitude, latitude, longitude, longitude FROM company
+        WHERE latitude IS NOT NULL AND longitude IS NOT NULL
+        """
+    )
+
+
+def haversine_km(lat1: float, lon1: float, lat2: float, lon2: float) -> float:
+    """Distância em km entre dois pontos da superfície."""
+    phi1, phi2 = math.radians(lat1), math.radians(lat2)
+    dphi = phi2 - phi1
+    dlambda = math.radians(lon2 - lon1)
+    a = math.sin(dphi / 2) ** 2 + math.cos(phi1) * math.cos(phi2) * math.sin(dlambda / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * math.asin(min(1.0, math.sqrt(a)))
+
+
+def bounding_box(lat: float, lon: float, radius_km: float) -> Tuple[float, float, float, float]:
+    """Retângulo (min_lat, max_lat, min_lon, max_lon) que contém o círculo."""
+    dlat = radius_km / KM_PER_DEGREE
+    # Perto dos polos um grau de longitude encolhe; limita para não dividir por ~0
+    dlon = radius_km / (KM_PER_DEGREE * max(math.cos(math.radians(lat)), 0.01))
+    return lat - dlat, lat + dlat, lon - dlon, lon + dlon
+
+
+class _CrossJoin(Join):
+    """JOIN que o SQLite não reordena: a tabela da esquerda é o laço externo.
+
+    Sem estatísticas (ANALYZE), o planejador prefere percorrer um índice de
+    `company` (`is_active`, `state`...) e consultar o R*Tree por linha, o
+    que lê a tabela inteira; `CROSS JOIN` fixa o R*Tree como ponto de partida.
+    """
+
+    inherit_cache = True
+
+
+@compiles(_CrossJoin, "sqlite")
+def _compile_cross_join(element, compiler, **kw):
+    # A esquerda é sempre o nome do índice, então o primeiro JOIN é este
+    return compiler.visit_join(element, **kw).replace(" JOIN ", " CROSS JOIN ", 1)
+
+
+def within_box(statement, bind, box: Tuple[float, float, float, float]):
+    """Restringe um SELECT de `company` às empresas dentro do retângulo.
+
+    No SQLite a consulta parte do R*Tree e busca as empresas pelo rowid;
+    nos demais bancos vira um filtro por faixa em `latitude`/`longitude`
+    (índice `ix_company_lat_lon`).
+    """
+    min_lat, max_lat, min_lon, max_lon = box
+    if geo_index_available(bind):
+        return statement.select_from(
+            _CrossJoin(
+                company_geo,
+                Company.__table__,
+                company_geo.c.id == literal_column("company.rowid"),
+            )
+        ).where(
+            company_geo.c.min_lat >= min_lat,
+            company_geo.c.max_lat <= max_lat,
+            company_geo.c.min_lon >= min_lon,
+            company_geo.c.max_lon <= max_lon,
+        )
+    return statement.where(
+        Company.latitude.between(min_lat, max_lat),
+        Company.longitude.between(min_lon, max_lon),
+    )
+
+
+def rank_by_distance(
+    session: Session, statement, lat: float, lon: float, radius_km: float
+) -> List[Tuple[float, uuid.UUID]]:
+    """(distância, id) das empresas a até `radius_km`, da mais próxima.
+
+    `statement` seleciona `Company.id`, `Company.latitude` e
+    `Company.longitude` e já deve estar restrito com `within_box`.
+    """
+    ranked = []
+    for company_id, company_lat, company_lon in session.exec(statement):
+        distance = haversine_km(lat, lon, company_lat, company_lon)
+        if distance <= radius_km:
+            ranked.append((distance, company_id))
+    ranked.sort()
+    return ranked
+
+
+def main(argv=None) -> None:
+    """Linha de comando para geocodificação e manutenção do índice."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("command", choices=["geocode", "rebuild"])
+    parser.add_argument("--db-url", help="URL do banco (padrão: db_url do rxconfig)")
+    args = parser.parse_args(argv)
+
+    from .database import create_db_and_tables, create_db_engine
+
+    engine = create_db_engine(args.db_url)
+    create_db_and_tables(engine)
+    if args.command == "geocode":
+        with engine.begin() as connection:
+            pairs = geocode_companies(connection)
+        print(f"{pairs} cidades geocodificadas.")
+    else:
+        if not geo_index_available(engine):
+            parser.error("o índice R*Tree só está disponível para SQLite")
+        rebuild_company_geo(engine)
+        print(f"Índice {GEO_TABLE} reconstruído.")
+
+
+if __name__ == "__main__":
+    main()
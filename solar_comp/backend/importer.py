@@ -0,0 +1,447 @@
+"""Importação em massa de empresas, serviços, projetos e avaliações.
+
+Os arquivos são lidos em streaming (CSV, JSON Lines ou um array JSON) e
+processados em lotes de `CHUNK_SIZE` registros, cada lote na sua própria
+transação:
+
+- os CNPJs são validados (dígitos verificadores) antes de tocar o banco;
+- uma única consulta por lote descobre quais CNPJs já estão cadastrados —
+  essas empresas não são duplicadas, mas recebem os serviços, projetos e
+  avaliações do registro;
+- empresas e filhos são gravados com executemany.
+
+Registros de empresa em JSON podem trazer `services`, `projects` e
+`reviews` aninhados. Arquivos só de filhos (`--kind services|projects|reviews`)
+referenciam a empresa por `company_cnpj`; avaliações referenciam o autor
+por `user_email`. Erros são reportados por linha e não interrompem a
+importação. Empresas sem `latitude`/`longitude` são geocodificadas pela
+base de municípios (`geo.geocode`). Ao final, `average_rating` e `total_reviews` são recalculados
+de uma vez. Exemplo:
+
+    python -m solar_comp.backend.importer empresas.csv
+    python -m solar_comp.backend.importer avaliacoes.csv --kind reviews
+"""
+
+import argparse
+import csv
+from dataclasses import dataclass, field
+import datetime
+from itertools import islice
+import json
+from pathlib import Path
+import time
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+import uuid
+
+from sqlalchemy import select
+from sqlalchemy.engine import Connection, Engine
+from sqlalchemy.exc import SQLAlchemyError
+
+from ..models import Company, CompanyProject, CompanyService, Review, User
+from .cnpj import is_valid_cnpj, normalize_cnpj
+from .companies import company_cache
+from .geo import geocode
+from .ratings import recompute_company_ratings
+from .rollups import rebuild_daily_activity
+from .stats import refresh_marketplace_stats
+
+# Mantém as listas IN abaixo do limite de 999 parâmetros de SQLites antigos
+CHUNK_SIZE = 500
+# Erros guardados no relatório; os demais só entram na contagem
+MAX_ERRORS = 1000
+KINDS = ("companies", "services", "projects", "reviews")
+CHILD_KINDS = KINDS[1:]
+# Erros de um registro malformado (campo com o tipo errado, por exemplo)
+_RECORD_ERRORS = (ValueError, TypeError, AttributeError)
+
+
+class RecordError(ValueError):
+    """Linha ilegível do arquivo; vai no lugar do registro, com a linha."""
+
+
+@dataclass
+class RowError:
+    """Erro de validação ou gravação de um registro."""
+
+    line: int
+    kind: str
+    message: str
+
+    def __str__(self) -> str:
+        return f"linha {self.line} ({self.kind}): {self.message}"
+
+
+@dataclass
+class ImportReport:
+    """Resultado da importação."""
+
+    records: int = 0
+    inserted: Dict[str, int] = field(default_factory=lambda: dict.fromkeys(KINDS, 0))
+    existing_companies: int = 0
+    error_count: int = 0
+    errors: List[RowError] = field(default_factory=list)
+    seconds: float = 0.0
+
+    @property
+    def records_per_second(self) -> float:
+        return self.records / self.seconds if self.seconds else 0.0
+
+
+def read_records(path: Path) -> Iterator[Tuple[int, dict]]:
+    """Lê os registros do arquivo, com o número da linha de origem.
+
+    `.csv` e `.jsonl` são lidos em streaming; um `.json` que começa com `[`
+    é carregado inteiro, e do contrário é tratado como JSON Lines. Uma linha
+    com JSON inválido vira um `RecordError`, reportado pelo importador sem
+    interromper a leitura.
+    """
+    path = Path(path)
+    if path.suffix.lower() == ".csv":
+        with path.open(newline="", encoding="utf-8-sig") as file:
+            reader = csv.DictReader(file)
+            for record in reader:
+                yield reader.line_num, record
+        return
+
+    with path.open(encoding="utf-8") as file:
+        first = file.read(1)
+        while first.isspace():
+            first = file.read(1)
+        file.seek(0)
+        if first == "[":
+            try:
+                records = json.load(file)
+            except json.JSONDecodeError as error:
+                yield error.lineno, RecordError(f"JSON inválido: {error.msg}")
+                return
+            for index, record in enumerate(records, start=1):
+                yield index, record
+            return
+        for number, line in enumerate(file, start=1):
+            if line.strip():
+                try:
+                    yield number, json.loads(line)
+                except json.JSONDecodeError as error:
+                    yield number, RecordError(f"JSON inválido: {error.msg}")
+
+
+def _text(record: dict, name: str, required: bool = False) -> Optional[str]:
+    value = record.get(name)
+    value = str(value).strip() if value is not None else ""
+    if required and not value:
+        raise ValueError(f"campo obrigatório: {name}")
+    return value or None
+
+
+def _number(record: dict, name: str, kind=float):
+    try:
+        return kind(record.get(name))
+    except (TypeError, ValueError):
+        raise ValueError(f"{name} inválido: {record.get(name)!r}") from None
+
+
+def _date(record: dict, name: str) -> datetime.date:
+    try:
+        return datetime.date.fromisoformat(str(record.get(name)))
+    except ValueError:
+        raise ValueError(f"{name} deve estar no formato AAAA-MM-DD") from None
+
+
+def _company_row(record: dict, now: datetime.datetime) -> dict:
+    cnpj = normalize_cnpj(_text(record, "cnpj", required=True))
+    if not is_valid_cnpj(cnpj):
+        raise ValueError(f"CNPJ inválido: {record.get('cnpj')}")
+    state = _text(record, "state", required=True).upper()
+    if len(state) != 2:
+        raise ValueError(f"UF inválida: {state}")
+    city = _text(record, "city", required=True)
+    if _text(record, "latitude") is not None and _text(record, "longitude") is not None:
+        position = (_number(record, "latitude"), _number(record, "longitude"))
+    else:
+        position = geocode(city, state) or (None, None)
+    return {
+        "id": uuid.uuid4(),
+        "name": _text(record, "name", required=True),
+        "description": _text(record, "description"),
+        "cnpj": cnpj,
+        "address": _text(record, "address"),
+        "city": city,
+        "state": state,
+        "latitude": position[0],
+        "longitude": position[1],
+        "phone": _text(record, "phone"),
+        "email": _text(record, "email"),
+        "website": _text(record, "website"),
+        "logo_url": _text(record, "logo_url"),
+        "created_at": now,
+        "updated_at": now,
+        "is_active": True,
+        "is_verified": False,
+        "average_rating": 0.0,
+        "total_reviews": 0,
+    }
+
+
+def _service_row(record: dict, company_id: uuid.UUID) -> dict:
+    return {
+        "id": uuid.uuid4(),
+        "company_id": company_id,
+        "name": _text(record, "name", required=True),
+        "description": _text(record, "description"),
+        "price_range": _text(record, "price_range"),
+        "is_active": True,
+    }
+
+
+def _project_row(record: dict, company_id: uuid.UUID) -> dict:
+    return {
+        "id": uuid.uuid4(),
+        "company_id": company_id,
+        "title": _text(record, "title", required=True),
+        "description": _text(record, "description"),
+        "location": _text(record, "location", required=True),
+        "completion_date": _date(record, "completion_date"),
+        "power_capacity": _number(record, "power_capacity"),
+        "image_urls": _text(record, "image_urls"),
+    }
+
+
+def _review_row(
+    record: dict, company_id: uuid.UUID, user_id: uuid.UUID, now: datetime.datetime
+) -> dict:
+    rating = _number(record, "rating", int)
+    if not 1 <= rating <= 5:
+        raise ValueError(f"rating deve estar entre 1 e 5: {rating}")
+    created = _text(record, "created_at")
+    return {
+        "id": uuid.uuid4(),
+        "company_id": company_id,
+        "user_id": user_id,
+        "rating": rating,
+        "comment": _text(record, "comment"),
+        "created_at": datetime.datetime.fromisoformat(created) if created else now,
+    }
+
+
+_CHILD_TABLES = {
+    "services": CompanyService.__table__,
+    "projects": CompanyProject.__table__,
+    "reviews": Review.__table__,
+}
+
+
+class BulkImporter:
+    """Importa arquivos em lotes; chame `finish()` ao final."""
+
+    def __init__(
+        self, engine: Engine, chunk_size: int = CHUNK_SIZE, max_errors: int = MAX_ERRORS
+    ):
+        self.engine = engine
+        self.chunk_size = chunk_size
+        self.max_errors = max_errors
+        self.report = ImportReport()
+        self._started = time.perf_counter()
+        # CNPJs já vistos nesta importação, para duplicatas entre lotes
+        self._seen_cnpjs: Dict[str, uuid.UUID] = {}
+        # Efeitos do lote em andamento, aplicados só após o commit
+        self._chunk_cnpjs: List[str] = []
+        self._chunk_inserted: Dict[str, int] = {}
+
+    def import_file(self, path: Path, kind: str = "companies") -> ImportReport:
+        return self.import_records(read_records(path), kind)
+
+    def import_records(
+        self, records: Iterable[Tuple[int, dict]], kind: str = "companies"
+    ) -> ImportReport:
+        if kind not in KINDS:
+            raise ValueError(f"tipo desconhecido: {kind}")
+        records = iter(records)
+        while chunk := list(islice(records, self.chunk_size)):
+            self.report.records += len(chunk)
+            chunk = self._readable(chunk, kind)
+            if not chunk:
+                continue
+            self._chunk_cnpjs = []
+            self._chunk_inserted = dict.fromkeys(KINDS, 0)
+            try:
+                with self.engine.begin() as connection:
+                    if kind == "companies":
+                        children = self._import_companies(connection, chunk)
+                    else:
+                        children = [(kind, line, record, None) for line, record in chunk]
+                    self._import_children(connection, children)
+            except SQLAlchemyError as error:
+                # O lote inteiro foi desfeito
+                first, last = chunk[0][0], chunk[-1][0]
+                self._error(first, kind, f"lote {first}-{last} não gravado: {error}")
+                for cnpj in self._chunk_cnpjs:
+                    del self._seen_cnpjs[cnpj]
+            else:
+                for name, count in self._chunk_inserted.items():
+                    self.report.inserted[name] += count
+        return self.report
+
+    def finish(self) -> ImportReport:
+        """Recalcula avaliações, rollups e estatísticas (passadas agregadas)
+        e limpa o cache."""
+        with self.engine.begin() as connection:
+            if self.report.inserted["reviews"]:
+                recompute_company_ratings(connection)
+                rebuild_daily_activity(connection)
+            refresh_marketplace_stats(connection)
+        company_cache.invalidate()
+        self.report.seconds = time.perf_counter() - self._started
+        return self.report
+
+    def _error(self, line: int, kind: str, message: str) -> None:
+        self.report.error_count += 1
+        if len(self.report.errors) < self.max_errors:
+            self.report.errors.append(RowError(line, kind, message))
+
+    def _readable(self, chunk: list, kind: str) -> list:
+        """Reporta e descarta as linhas ilegíveis e os registros que não são objetos."""
+        readable = []
+        for line, record in chunk:
+            if isinstance(record, RecordError):
+                self._error(line, kind, str(record))
+            elif not isinstance(record, dict):
+                self._error(line, kind, f"registro deve ser um objeto, não {type(record).__name__}")
+            else:
+                readable.append((line, record))
+        return readable
+
+    def _import_companies(self, connection: Connection, chunk) -> list:
+        now = datetime.datetime.now()
+        rows: Dict[int, dict] = {}
+        for line, record in chunk:
+            try:
+                rows[line] = _company_row(record, now)
+            except _RECORD_ERRORS as error:
+                self._error(line, "companies", str(error))
+
+        cnpjs = {row["cnpj"] for row in rows.values()} - self._seen_cnpjs.keys()
+        existing = dict(
+            connection.execute(
+                select(Company.cnpj, Company.id).where(Company.cnpj.in_(cnpjs))
+            ).all()
+        ) if cnpjs else {}
+        self._seen_cnpjs.update(existing)
+        self._chunk_cnpjs.extend(existing)
+
+        new_rows = []
+        children = []
+        for line, record in chunk:
+            row = rows.get(line)
+            if row is None:
+                continue
+            company_id = self._seen_cnpjs.get(row["cnpj"])
+            if company_id is None:
+                company_id = self._seen_cnpjs[row["cnpj"]] = row["id"]
+                self._chunk_cnpjs.append(row["cnpj"])
+                new_rows.append(row)
+            else:
+                self.report.existing_companies += 1
+            for kind in CHILD_KINDS:
+                nested = record.get(kind) or []
+                if not isinstance(nested, list):
+                    self._error(line, kind, f"{kind} deve ser uma lista")
+                    continue
+                for child in nested:
+                    if isinstance(child, dict):
+                        children.append((kind, line, child, company_id))
+                    else:
+                        self._error(line, kind, "cada item deve ser um objeto")
+
+        if new_rows:
+            connection.execute(Company.__table__.insert(), new_rows)
+            self._chunk_inserted["companies"] += len(new_rows)
+        return children
+
+    def _import_children(self, connection: Connection, children: list) -> None:
+        if not children:
+            return
+        # Uma consulta por lote para os CNPJs e e-mails referenciados
+        cnpjs = {
+            normalize_cnpj(str(record.get("company_cnpj") or ""))
+            for _, _, record, company_id in children
+            if company_id is None
+        }
+        companies = dict(self._seen_cnpjs)
+        missing = cnpjs - companies.keys()
+        if missing:
+            companies.update(
+                connection.execute(
+                    select(Company.cnpj, Company.id).where(Company.cnpj.in_(missing))
+                ).all()
+            )
+        emails = {
+            str(record.get("user_email") or "").strip()
+            for kind, _, record, _ in children
+            if kind == "reviews"
+        }
+        users = dict(
+            connection.execute(
+                select(User.email, User.id).where(User.email.in_(emails))
+            ).all()
+        ) if emails else {}
+
+        now = datetime.datetime.now()
+        rows: Dict[str, list] = {kind: [] for kind in CHILD_KINDS}
+        for kind, line, record, company_id in children:
+            try:
+                if company_id is None:
+                    cnpj = normalize_cnpj(str(record.get("company_cnpj") or ""))
+                    company_id = companies.get(cnpj)
+                    if company_id is None:
+                        raise ValueError(f"empresa não encontrada: {record.get('company_cnpj')}")
+                if kind == "services":
+                    rows[kind].append(_service_row(record, company_id))
+                elif kind == "projects":
+                    rows[kind].append(_project_row(record, company_id))
+                else:
+                    email = str(record.get("user_email") or "").strip()
+                    if email not in users:
+                        raise ValueError(f"usuário não encontrado: {email}")
+                    rows[kind].append(_review_row(record, company_id, users[email], now))
+            except _RECORD_ERRORS as error:
+                self._error(line, kind, str(error))
+
+        for kind, batch in rows.items():
+            if batch:
+                connection.execute(_CHILD_TABLES[kind].insert(), batch)
+                self._chunk_inserted[kind] += len(batch)
+
+
+def main(argv=None) -> int:
+    """Linha de comando da importação."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("paths", nargs="+", type=Path, help="arquivos .csv, .json ou .jsonl")
+    parser.add_argument("--kind", choices=KINDS, default="companies")
+    parser.add_argument("--chunk-size", type=int, default=CHUNK_SIZE)
+    parser.add_argument("--db-url", help="URL do banco (padrão: db_url do rxconfig)")
+    args = parser.parse_args(argv)
+
+    from .database import create_db_and_tables, create_db_engine
+
+    engine = create_db_engine(args.db_url)
+    create_db_and_tables(engine)
+    importer = BulkImporter(engine, chunk_size=args.chunk_size)
+    for path in args.paths:
+        importer.import_file(path, args.kind)
+    report = importer.finish()
+
+    for error in report.errors:
+        print(error)
+    if report.error_count > len(report.errors):
+        print(f"... e mais {report.error_count - len(report.errors)} erros")
+    inserted = ", ".join(f"{kind}: {count}" for kind, count in report.inserted.items())
+    print(
+        f"{report.records} registros em {report.seconds:.2f}s "
+        f"({report.records_per_second:.0f}/s). Inseridos: {inserted}. "
+        f"Empresas já cadastradas: {report.existing_companies}. Erros: {report.error_count}."
+    )
+    return 1 if report.error_count else 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
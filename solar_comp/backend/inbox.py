@@ -0,0 +1,241 @@
+"""Caixa de entrada: conversas paginadas e contadores de mensagens não lidas.
+
+O badge do topo lê `UnreadCounter`, uma linha pela chave primária, em vez
+de contar as mensagens. O contador é mantido na mesma transação de cada
+escrita:
+
+- `send_message` grava a mensagem e soma 1 ao contador de quem recebe;
+- `mark_read` marca como lidas só as mensagens que ainda não estavam (o
+  UPDATE informa quantas) e desconta esse número.
+
+As listagens usam keyset sobre (created_at, id), da mais recente para a
+mais antiga, percorrendo os índices `ix_message_receiver_read_created` e
+`ix_message_conversation` a partir do cursor (ver `_seek`). Para recalcular
+os contadores (mensagens gravadas por fora da aplicação):
+
+    python -m solar_comp.backend.inbox rebuild
+"""
+
+import argparse
+from dataclasses import dataclass, field
+import datetime
+import heapq
+from typing import List, Optional, Sequence, Tuple
+import uuid
+
+from sqlalchemy import delete, func, update
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.engine import Connection, Dialect
+from sqlalchemy.sql.expression import Insert
+from sqlmodel import Session, col, select
+
+from ..models.marketplace import Message, UnreadCounter
+
+# Tamanho padrão e máximo de uma página de mensagens
+PAGE_SIZE = 30
+MAX_PAGE_SIZE = 100
+
+_INSERTS = {"sqlite": sqlite.insert, "postgresql": postgresql.insert}
+
+
+@dataclass
+class MessagePage:
+    """Mensagens da mais recente para a mais antiga e o cursor da próxima página."""
+
+    messages: List[Message] = field(default_factory=list)
+    next_cursor: Optional[str] = None
+
+
+def encode_cursor(message: Message) -> str:
+    """Gera o cursor (created_at, id) de uma mensagem."""
+    return f"{message.created_at.isoformat()}/{message.id.hex}"
+
+
+def decode_cursor(cursor: Optional[str]) -> Optional[Tuple[datetime.datetime, uuid.UUID]]:
+    """Interpreta um cursor; retorna None se estiver ausente ou inválido."""
+    if not cursor:
+        return None
+    created_at, _, raw_id = cursor.rpartition("/")
+    try:
+        return datetime.datetime.fromisoformat(created_at), uuid.UUID(raw_id)
+    except ValueError:
+        return None
+
+
+def unread_increment(dialect: Dialect, user_id: uuid.UUID, delta: int = 1) -> Insert:
+    """Upsert que soma `delta` ao contador de não lidas de `user_id`."""
+    table = UnreadCounter.__table__
+    statement = _INSERTS[dialect.name](table).values(user_id=user_id, unread=delta)
+    return statement.on_conflict_do_update(
+        index_elements=[table.c.user_id],
+        set_={"unread": table.c.unread + statement.excluded.unread},
+    )
+
+
+def send_message(
+    session: Session, sender_id: uuid.UUID, receiver_id: uuid.UUID, content: str
+) -> Message:
+    """Grava uma mensagem e soma 1 às não lidas de quem recebe.
+
+    Não faz commit; em handlers assíncronos, use
+    `session.run_sync(send_message, ...)`.
+    """
+    message = Message(sender_id=sender_id, receiver_id=receiver_id, content=content)
+    session.add(message)
+    session.execute(unread_increment(session.get_bind().dialect, receiver_id))
+    return message
+
+
+def mark_read(
+    session: Session,
+    user_id: uuid.UUID,
+    message_ids: Optional[Sequence[uuid.UUID]] = None,
+    sender_id: Optional[uuid.UUID] = None,
+) -> int:
+    """Marca como lidas as mensagens recebidas por `user_id`.
+
+    Restringe às mensagens de `message_ids` e/ou à conversa com
+    `sender_id`; sem nenhum dos dois, marca a caixa inteira. Só as que
+    ainda não estavam lidas contam, então chamadas repetidas (ou
+    concorrentes) não descontam duas vezes. Retorna quantas foram marcadas.
+    """
+    message = Message.__table__
+    statement = (
+        update(message)
+        .where(message.c.receiver_id == user_id, message.c.read_at.is_(None))
+        .values(read_at=datetime.datetime.now())
+    )
+    if message_ids is not None:
+        statement = statement.where(message.c.id.in_(message_ids))
+    if sender_id is not None:
+        statement = statement.where(message.c.sender_id == sender_id)
+    marked = session.execute(statement).rowcount
+    if marked:
+        counter = UnreadCounter.__table__
+        session.execute(
+            update(counter)
+            .where(counter.c.user_id == user_id)
+            .values(unread=counter.c.unread - marked)
+        )
+    return marked
+
+
+def _seek(session: Session, statement, cursor: Optional[str], limit: int) -> List[Message]:
+    """Até `limit` mensagens antes do cursor, da mais recente para trás.
+
+    Como em `companies._seek`: `(created_at, id) < cursor` num OR não vira
+    faixa de índice no SQLite, então são duas faixas, o resto do empate em
+    `created_at` e, se faltar, as mensagens mais antigas; cada uma começa
+    direto no cursor.
+    """
+    newest_first = (col(Message.created_at).desc(), col(Message.id).desc())
+    key = decode_cursor(cursor)
+    if key is None:
+        return list(session.exec(statement.order_by(*newest_first).limit(limit)).all())
+    created_at, message_id = key
+    ties = statement.where(
+        Message.created_at == created_at, Message.id < message_id
+    ).order_by(col(Message.id).desc())
+    rows = list(session.exec(ties.limit(limit)).all())
+    if len(rows) < limit:
+        rest = statement.where(Message.created_at < created_at).order_by(*newest_first)
+        rows += session.exec(rest.limit(limit - len(rows))).all()
+    return rows
+
+
+def _page(rows: List[Message], page_size: int) -> MessagePage:
+    has_next = len(rows) > page_size
+    rows = rows[:page_size]
+    return MessagePage(
+        messages=rows,
+        next_cursor=encode_cursor(rows[-1]) if rows and has_next else None,
+    )
+
+
+def fetch_thread(
+    session: Session,
+    user_id: uuid.UUID,
+    other_id: uuid.UUID,
+    before: Optional[str] = None,
+    page_size: int = PAGE_SIZE,
+) -> MessagePage:
+    """Página da conversa entre dois usuários, da mais recente para trás.
+
+    Cada sentido da conversa é uma faixa de `ix_message_conversation`: as
+    duas são lidas já ordenadas, com no máximo uma página cada, e
+    intercaladas aqui, sem ordenar a conversa inteira.
+    """
+    page_size = max(1, min(page_size, MAX_PAGE_SIZE))
+    directions = []
+    for sender, receiver in ((user_id, other_id), (other_id, user_id)):
+        statement = select(Message).where(
+            Message.sender_id == sender, Message.receiver_id == receiver
+        )
+        directions.append(_seek(session, statement, before, page_size + 1))
+    rows = list(
+        heapq.merge(*directions, key=lambda message: (message.created_at, message.id), reverse=True)
+    )
+    return _page(rows[:page_size + 1], page_size)
+
+
+def fetch_unread(
+    session: Session,
+    user_id: uuid.UUID,
+    before: Optional[str] = None,
+    page_size: int = PAGE_SIZE,
+) -> MessagePage:
+    """Página das mensagens não lidas de `user_id`, da mais recente para trás."""
+    page_size = max(1, min(page_size, MAX_PAGE_SIZE))
+    statement = select(Message).where(
+        Message.receiver_id == user_id, col(Message.read_at).is_(None)
+    )
+    return _page(_seek(session, statement, before, page_size + 1), page_size)
+
+
+def rebuild_unread_counters(connection: Connection) -> int:
+    """Recalcula todos os contadores com um GROUP BY por destinatário.
+
+    Retorna o número de usuários com mensagens não lidas.
+    """
+    message = Message.__table__
+    rows = connection.execute(
+        select(message.c.receiver_id, func.count())
+        .where(message.c.read_at.is_(None))
+        .group_by(message.c.receiver_id)
+    ).all()
+    connection.execute(delete(UnreadCounter))
+    if rows:
+        connection.execute(
+            UnreadCounter.__table__.insert(),
+            [{"user_id": user_id, "unread": count} for user_id, count in rows],
+        )
+    return len(rows)
+
+
+async def load_unread_count(user_id: uuid.UUID) -> int:
+    """Mensagens não lidas de `user_id` (uma linha, pela chave primária)."""
+    from .database import async_session
+
+    async with async_session() as session:
+        counter = await session.get(UnreadCounter, user_id)
+    return counter.unread if counter else 0
+
+
+def main(argv=None) -> None:
+    """Linha de comando para recalcular os contadores de não lidas."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("command", choices=["rebuild"])
+    parser.add_argument("--db-url", help="URL do banco (padrão: db_url do rxconfig)")
+    args = parser.parse_args(argv)
+
+    from .database import create_db_and_tables, create_db_engine
+
+    engine = create_db_engine(args.db_url)
+    create_db_and_tables(engine)
+    with engine.begin() as connection:
+        users = rebuild_unread_counters(connection)
+    print(f"Contadores recalculados para {users} usuários.")
+
+
+if __name__ == "__main__":
+    main()
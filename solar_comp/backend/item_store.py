@@ -0,0 +1,271 @@
+"""Column-oriented storage for the table items."""
+
+from array import array
+from bisect import bisect_left, bisect_right
+from collections import OrderedDict, defaultdict
+import csv
+import datetime
+from pathlib import Path
+import threading
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+
+class ItemColumns:
+    """The rows of an items CSV held as typed, array-backed columns.
+
+    Payments are float64, dates are ordinals and statuses are small integer
+    codes into `status_labels`. Names are packed into one string with an
+    offsets array, so a row costs a few dozen bytes instead of a Python
+    object per field.
+
+    A sort permutation per column is built once at load, so changing the
+    sort column or direction only picks (or reverses) a cached index.
+
+    Search uses a trigram index over the lowercase row text, also built at
+    load: a query intersects the selective posting lists of its trigrams,
+    checks the candidates and orders them by their rank in the sort
+    permutation, so its cost follows the number of matches rather than the
+    row count. Loading builds all of this, which takes seconds on large
+    files; callers on the event loop run `load_item_columns` in a thread.
+    """
+
+    SORT_COLUMNS = ("name", "payment", "date", "status")
+
+    def __init__(self):
+        # Identifies the file contents this snapshot was parsed from
+        self.version = ""
+        self._name_data = ""
+        self._name_offsets = array("q", [0])
+        self.payments = array("d")
+        self.dates = array("l")
+        self.statuses = array("B")
+        self.status_labels: List[str] = []
+        self._orders: Dict[str, array] = {}
+        self._reversed_orders: Dict[str, array] = {}
+        self._ranks: Dict[str, array] = {}
+        # Lowercase search text of every row, packed like the names
+        self._text_data = ""
+        self._text_offsets = array("q", [0])
+        self._trigrams: Dict[str, array] = {}
+
+    @classmethod
+    def from_csv(cls, path: Path) -> "ItemColumns":
+        columns = cls()
+        names: List[str] = []
+        length = 0
+        codes: Dict[str, int] = {}
+        with Path(path).open(mode="r", encoding="utf-8") as file:
+            for row in csv.DictReader(file):
+                names.append(row["name"])
+                length += len(row["name"])
+                columns._name_offsets.append(length)
+                columns.payments.append(float(row["payment"]))
+                columns.dates.append(
+                    datetime.date.fromisoformat(row["date"]).toordinal()
+                )
+                status = row["status"]
+                if status not in codes:
+                    codes[status] = len(columns.status_labels)
+                    columns.status_labels.append(status)
+                columns.statuses.append(codes[status])
+        columns._name_data = "".join(names)
+        columns._build_orders()
+        columns._build_search_index()
+        return columns
+
+    def _build_orders(self):
+        for column in self.SORT_COLUMNS:
+            order = array("I", sorted(range(len(self)), key=self.sort_key(column)))
+            ranks = array("I", bytes(4 * len(order)))
+            for position, index in enumerate(order):
+                ranks[index] = position
+            self._orders[column] = order
+            self._ranks[column] = ranks
+        self._reversed_orders = {}
+
+    def _build_search_index(self):
+        texts: List[str] = []
+        length = 0
+        postings: Dict[str, List[int]] = defaultdict(list)
+        # Dates and statuses repeat a lot, so their trigrams are computed once
+        repeated: Dict[str, frozenset] = {}
+        for index in range(len(self)):
+            name, payment, date, status = fields = self.row_text(index)
+            # Fields are joined by a separator a query can never contain, so
+            # a match cannot span two fields (or, in the packed text, rows).
+            text = _FIELD_SEPARATOR.join(fields)
+            texts.append(text)
+            length += len(text) + 1
+            self._text_offsets.append(length)
+            grams = _trigrams(name) | _trigrams(payment)
+            for value in (date, status):
+                if value not in repeated:
+                    repeated[value] = _trigrams(value)
+                grams |= repeated[value]
+            for gram in grams:
+                postings[gram].append(index)
+        self._text_data = _FIELD_SEPARATOR.join(texts) + _FIELD_SEPARATOR
+        self._trigrams = {gram: array("I", rows) for gram, rows in postings.items()}
+
+    def __len__(self) -> int:
+        return len(self.payments)
+
+    def name(self, index: int) -> str:
+        return self._name_data[
+            self._name_offsets[index] : self._name_offsets[index + 1]
+        ]
+
+    def date(self, index: int) -> str:
+        return datetime.date.fromordinal(self.dates[index]).isoformat()
+
+    def status(self, index: int) -> str:
+        return self.status_labels[self.statuses[index]]
+
+    def row(self, index: int) -> dict:
+        """Materialize a single row as a dict of the item fields."""
+        return {
+            "name": self.name(index),
+            "payment": self.payments[index],
+            "date": self.date(index),
+            "status": self.status(index),
+        }
+
+    def rows(self, indices: Iterable[int]) -> List[dict]:
+        return [self.row(index) for index in indices]
+
+    def row_text(self, index: int) -> Tuple[str, str, str, str]:
+        """The searchable text of a row, one lowercase string per field."""
+        return (
+            self.name(index).lower(),
+            str(self.payments[index]).lower(),
+            self.date(index),
+            self.status(index).lower(),
+        )
+
+    def sort_key(self, column: str):
+        """A key function over row indices for sorting by `column`."""
+        if column == "payment":
+            return self.payments.__getitem__
+        if column == "date":
+            return self.dates.__getitem__
+        if column == "status":
+            ranks = [label.lower() for label in self.status_labels]
+            return lambda index: ranks[self.statuses[index]]
+        return lambda index: self.name(index).lower()
+
+    def order(self, column: str = "", reverse: bool = False) -> Sequence[int]:
+        """The cached permutation of all rows sorted by `column`.
+
+        Without a known column the rows keep their file order.
+        """
+        if column not in self._orders:
+            return range(len(self))
+        if not reverse:
+            return self._orders[column]
+        if column not in self._reversed_orders:
+            self._reversed_orders[column] = self._orders[column][::-1]
+        return self._reversed_orders[column]
+
+    def search(self, search: str) -> List[int]:
+        """Indices (ascending) of the rows with `search` in any field."""
+        search = search.lower().replace(_FIELD_SEPARATOR, "")
+        if not search:
+            return list(range(len(self)))
+        if len(search) < 3:
+            return self._scan(search)
+
+        grams = {search[i : i + 3] for i in range(len(search) - 2)}
+        postings = sorted(
+            (self._trigrams.get(gram, _EMPTY) for gram in grams), key=len
+        )
+        if len(search) == 3:
+            # A 3-character query is its only trigram, which never spans
+            # fields, so its posting is the answer. Longer queries can repeat
+            # one trigram ("0000") and still need the text check.
+            return list(postings[0])
+        # Trigrams shared by most rows (dates, statuses, "ite") filter almost
+        # nothing: probing each candidate in them costs more than checking
+        # the candidate's text, so intersection stops at the first dense one.
+        dense = len(self) * _DENSE_FRACTION
+        candidates: Sequence[int] = postings[0]
+        for posting in postings[1:]:
+            if not candidates or len(posting) > dense:
+                break
+            candidates = [index for index in candidates if _contains(posting, index)]
+        text = self._text
+        return [index for index in candidates if search in text(index)]
+
+    def query(self, search: str = "", sort: str = "", reverse: bool = False) -> Sequence[int]:
+        """Row indices matching `search`, ordered by `sort`."""
+        if not search:
+            return self.order(sort, reverse)
+        matches = self.search(search)
+        if sort in self._ranks:
+            matches.sort(key=self._ranks[sort].__getitem__, reverse=reverse)
+        return matches
+
+    def _text(self, index: int) -> str:
+        return self._text_data[
+            self._text_offsets[index] : self._text_offsets[index + 1] - 1
+        ]
+
+    def _scan(self, search: str) -> List[int]:
+        """Find queries too short for trigrams by scanning the packed text."""
+        matches = []
+        data, offsets = self._text_data, self._text_offsets
+        position = data.find(search)
+        while position != -1:
+            index = bisect_right(offsets, position) - 1
+            matches.append(index)
+            position = data.find(search, offsets[index + 1])
+        return matches
+
+
+_FIELD_SEPARATOR = "\x1f"
+# Posting lists longer than this share of the rows are not intersected
+_DENSE_FRACTION = 1 / 16
+_EMPTY = array("I")
+
+
+def _trigrams(value: str) -> frozenset:
+    return frozenset(value[i : i + 3] for i in range(len(value) - 2))
+
+
+def _contains(posting: array, index: int) -> bool:
+    """Binary search in a sorted posting list."""
+    position = bisect_left(posting, index)
+    return position < len(posting) and posting[position] == index
+
+
+# Parsed snapshots by version. The previous one is kept after the file
+# changes, so sessions that loaded it keep a consistent view until they reload.
+SNAPSHOT_LIMIT = 2
+
+_snapshots: "OrderedDict[str, ItemColumns]" = OrderedDict()
+_cache_lock = threading.Lock()
+
+
+def load_item_columns(path: Path) -> ItemColumns:
+    """Load `path` once per process, reloading only when the file changes.
+
+    Parsing takes seconds on large files; call it from a worker thread.
+    """
+    path = Path(path).resolve()
+    stat = path.stat()
+    version = f"{path}:{stat.st_mtime_ns}:{stat.st_size}"
+    with _cache_lock:
+        columns = _snapshots.get(version)
+        if columns is None:
+            columns = ItemColumns.from_csv(path)
+            columns.version = version
+            _snapshots[version] = columns
+            while len(_snapshots) > SNAPSHOT_LIMIT:
+                _snapshots.popitem(last=False)
+        _snapshots.move_to_end(version)
+        return columns
+
+
+def item_columns_snapshot(version: str) -> Optional[ItemColumns]:
+    """The already loaded snapshot `version`, without touching the file."""
+    with _cache_lock:
+        return _snapshots.get(version)
@@ -0,0 +1,494 @@
+"""Fila de gravação de leads (write-behind) com journal local.
+
+`LeadState.send_lead` só valida o formulário e chama `lead_queue.submit`:
+o lead recebe um id, é anexado ao journal (JSON Lines, com fsync agrupado
+entre os envios do mesmo instante) e o usuário já recebe a confirmação.
+Um worker em segundo plano grava os leads em lotes de até `BATCH_SIZE`, numa
+transação por lote, com uma única consulta de existência das empresas do
+lote; leads de empresas inexistentes são descartados e contados.
+
+O journal é dividido em segmentos (`leads-<n>.jsonl`); um segmento é
+apagado quando todos os seus leads estão no banco. Cada processo do app
+reserva um subdiretório `worker-<k>` de `LEAD_JOURNAL_DIR` com um lock
+exclusivo (`flock`), então vários workers podem apontar para o mesmo
+diretório. Na partida, os segmentos que sobraram no subdiretório reservado,
+e nos subdiretórios que nenhum processo vivo travou (quando há menos
+processos que antes), são reenviados à fila; como o id do lead é gerado no
+envio, um lead que já tinha sido gravado não é duplicado.
+"""
+
+import asyncio
+from collections import deque
+from dataclasses import asdict, dataclass, field
+import datetime
+import itertools
+import json
+import logging
+import os
+from pathlib import Path
+import time
+from typing import Deque, Dict, List, Optional, Set, TextIO, Tuple
+import uuid
+
+try:
+    import fcntl
+except ImportError:  # Windows: sem lock, um único processo por diretório
+    fcntl = None
+
+from sqlalchemy import select
+from sqlalchemy.engine import Connection
+
+from ..models.company import Company
+from ..models.marketplace import Lead, LeadNotification
+from .notifications import notification_dispatcher
+from .rollups import activity_increment
+from .stats import stats_increment
+
+logger = logging.getLogger(__name__)
+
+# Leads por transação; mantém a lista IN das empresas abaixo do limite de 999
+# parâmetros do SQLite
+BATCH_SIZE = 500
+# Espera para juntar mais leads antes de gravar um lote incompleto
+LINGER_SECONDS = 0.05
+# Espera antes de tentar de novo um lote que falhou
+RETRY_SECONDS = 1.0
+# Tamanho a partir do qual o segmento ativo do journal é trocado
+SEGMENT_BYTES = 4 * 1024 * 1024
+# Amostras guardadas para as latências (p95)
+LATENCY_WINDOW = 1024
+
+
+@dataclass
+class LeadRecord:
+    """Lead aceito e ainda não gravado em `lead`."""
+
+    id: uuid.UUID
+    company_id: uuid.UUID
+    name: str
+    email: str
+    phone: Optional[str]
+    message: str
+    created_at: datetime.datetime
+    segment: int = 0
+    replayed: bool = False
+    enqueued_at: float = field(default_factory=time.monotonic)
+
+    def to_json(self) -> str:
+        return json.dumps(
+            {
+                "id": self.id.hex,
+                "company_id": self.company_id.hex,
+                "name": self.name,
+                "email": self.email,
+                "phone": self.phone,
+                "message": self.message,
+                "created_at": self.created_at.isoformat(),
+            },
+            ensure_ascii=False,
+        )
+
+    @classmethod
+    def from_json(cls, line: str, segment: int) -> "LeadRecord":
+        data = json.loads(line)
+        return cls(
+            id=uuid.UUID(data["id"]),
+            company_id=uuid.UUID(data["company_id"]),
+            name=data["name"],
+            email=data["email"],
+            phone=data.get("phone"),
+            message=data["message"],
+            created_at=datetime.datetime.fromisoformat(data["created_at"]),
+            segment=segment,
+            replayed=True,
+        )
+
+    def row(self) -> dict:
+        return {
+            "id": self.id,
+            "company_id": self.company_id,
+            "name": self.name,
+            "email": self.email,
+            "phone": self.phone,
+            "message": self.message,
+            "created_at": self.created_at,
+            "status": "new",
+        }
+
+
+def _latency_summary(samples: Deque[float]) -> Dict[str, float]:
+    if not samples:
+        return {"last": 0.0, "mean": 0.0, "p95": 0.0, "max": 0.0}
+    ordered = sorted(samples)
+    return {
+        "last": samples[-1],
+        "mean": sum(ordered) / len(ordered),
+        "p95": ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))],
+        "max": ordered[-1],
+    }
+
+
+@dataclass
+class LeadQueueStats:
+    """Contadores da fila; latências em milissegundos."""
+
+    depth: int = 0  # leads no journal e ainda não gravados
+    submitted: int = 0
+    committed: int = 0
+    rejected: int = 0  # empresa inexistente
+    duplicates: int = 0  # reenviados do journal que já estavam gravados
+    batches: int = 0
+    failures: int = 0
+    journal_segments: int = 0
+    commit_latency_ms: Dict[str, float] = field(default_factory=dict)
+    ingest_latency_ms: Dict[str, float] = field(default_factory=dict)
+
+    def as_dict(self) -> dict:
+        return asdict(self)
+
+
+def commit_leads(connection: Connection, records: List[LeadRecord]) -> Tuple[int, int, int]:
+    """Grava um lote de leads numa transação já aberta.
+
+    Uma consulta verifica quais empresas do lote existem; leads reenviados
+    do journal também têm os ids conferidos, para não duplicar. Os avisos
+    às empresas entram no outbox na mesma transação. Retorna (gravados,
+    rejeitados, duplicados).
+    """
+    company = Company.__table__
+    lead = Lead.__table__
+    company_ids = {record.company_id for record in records}
+    existing = dict(
+        connection.execute(
+            select(company.c.id, company.c.email).where(company.c.id.in_(company_ids))
+        ).all()
+    )
+    accepted = [record for record in records if record.company_id in existing]
+    rejected = len(records) - len(accepted)
+
+    replayed = [record.id for record in accepted if record.replayed]
+    duplicates = 0
+    if replayed:
+        stored = set(connection.execute(select(lead.c.id).where(lead.c.id.in_(replayed))).scalars())
+        duplicates = len(stored)
+        accepted = [record for record in accepted if record.id not in stored]
+
+    if accepted:
+        connection.execute(lead.insert(), [record.row() for record in accepted])
+        notifications = notification_dispatcher.outbox_rows(accepted, existing)
+        if notifications:
+            connection.execute(LeadNotification.__table__.insert(), notifications)
+        connection.execute(stats_increment(leads=len(accepted)))
+        days: Dict[datetime.date, int] = {}
+        for record in accepted:
+            day = record.created_at.date()
+            days[day] = days.get(day, 0) + 1
+        for day, count in days.items():
+            connection.execute(activity_increment(connection.dialect, day, leads=count))
+    return len(accepted), rejected, duplicates
+
+
+class LeadQueue:
+    """Fila em memória + journal em disco + worker de gravação em lotes."""
+
+    def __init__(self, directory: Path, batch_size: int = BATCH_SIZE, linger: float = LINGER_SECONDS):
+        self.directory = Path(directory)
+        self.batch_size = batch_size
+        self.linger = linger
+        self._pending: Deque[LeadRecord] = deque()
+        self._ready: Optional[asyncio.Event] = None
+        self._journal: Optional[TextIO] = None
+        self._journal_dir: Optional[Path] = None
+        self._lock: Optional[TextIO] = None
+        self._segment = 0
+        self._outstanding: Dict[int, int] = {}  # segmento -> leads não gravados
+        self._sync_future: Optional[asyncio.Future] = None
+        self._syncs: Set[asyncio.Future] = set()
+        self._stats = LeadQueueStats()
+        self._commit_latency: Deque[float] = deque(maxlen=LATENCY_WINDOW)
+        self._ingest_latency: Deque[float] = deque(maxlen=LATENCY_WINDOW)
+
+    # Envio ------------------------------------------------------------
+
+    async def submit(
+        self,
+        company_id: uuid.UUID,
+        name: str,
+        email: str,
+        message: str,
+        phone: Optional[str] = None,
+    ) -> uuid.UUID:
+        """Aceita um lead: grava no journal (com fsync) e o põe na fila.
+
+        Retorna o id do lead. Erros de disco (`OSError`) chegam a quem
+        chamou, e o lead não é aceito. O lead conta como pendente no seu
+        segmento desde a escrita, para que o segmento não seja trocado e
+        apagado enquanto o fsync ainda está em andamento.
+        """
+        self._open()
+        record = LeadRecord(
+            id=uuid.uuid4(),
+            company_id=company_id,
+            name=name,
+            email=email,
+            phone=phone or None,
+            message=message,
+            created_at=datetime.datetime.now(),
+            segment=self._segment,
+        )
+        self._journal.write(record.to_json() + "\n")
+        self._hold(record.segment, 1)
+        try:
+            await self._sync()
+        except BaseException:
+            self._hold(record.segment, -1)
+            raise
+        self._pending.append(record)
+        self._ready.set()
+        self._stats.submitted += 1
+        return record.id
+
+    def _hold(self, segment: int, count: int) -> None:
+        self._outstanding[segment] = self._outstanding.get(segment, 0) + count
+
+    def _enqueue(self, record: LeadRecord) -> None:
+        self._hold(record.segment, 1)
+        self._pending.append(record)
+        self._ready.set()
+
+    async def _sync(self) -> None:
+        # Os envios da mesma volta do event loop compartilham um único fsync
+        loop = asyncio.get_running_loop()
+        if self._sync_future is None:
+            self._sync_future = loop.create_future()
+            loop.call_soon(self._start_sync)
+        await asyncio.shield(self._sync_future)
+
+    def _start_sync(self) -> None:
+        future, self._sync_future = self._sync_future, None
+        if future is None:
+            return  # Já adiantado por `_rotate`
+        try:
+            self._journal.flush()
+        except OSError as error:
+            future.set_exception(error)
+            return
+        task = asyncio.ensure_future(asyncio.to_thread(os.fsync, self._journal.fileno()))
+        self._syncs.add(task)
+
+        def done(task):
+            self._syncs.discard(task)
+            if task.exception() is not None:
+                future.set_exception(task.exception())
+            else:
+                future.set_result(None)
+
+        task.add_done_callback(done)
+
+    # Journal ----------------------------------------------------------
+
+    def _segment_path(self, segment: int) -> Path:
+        return self._journal_dir / f"leads-{segment:08d}.jsonl"
+
+    def _claim(self) -> Path:
+        """Reserva o primeiro subdiretório `worker-<k>` livre do journal.
+
+        O lock dura enquanto o processo viver; depois de uma queda, o
+        próximo processo que reservar o subdiretório reenvia seus leads.
+        """
+        for slot in itertools.count():
+            directory = self.directory / f"worker-{slot}"
+            directory.mkdir(parents=True, exist_ok=True)
+            if fcntl is None:
+                return directory
+            lock = _try_lock(directory)
+            if lock is not None:
+                self._lock = lock
+                return directory
+
+    def _adopt_orphans(self) -> None:
+        """Traz para o subdiretório reservado os segmentos dos que sobraram.
+
+        Com menos processos que na execução anterior, alguns `worker-<k>`
+        não são reservados por ninguém; os que não estão travados por outro
+        processo têm os segmentos movidos para cá e reenviados com os nossos.
+        """
+        if fcntl is None:
+            return
+        segments = [_segment_number(path) for path in self._journal_dir.glob("leads-*.jsonl")]
+        segment = max(segments, default=-1) + 1
+        for directory in sorted(self.directory.glob("worker-*")):
+            if directory == self._journal_dir:
+                continue
+            lock = _try_lock(directory)
+            if lock is None:
+                continue  # Em uso por outro processo
+            try:
+                for path in sorted(directory.glob("leads-*.jsonl"), key=_segment_number):
+                    path.rename(self._segment_path(segment))
+                    logger.info("Segmento órfão %s/%s adotado", directory.name, path.name)
+                    segment += 1
+            finally:
+                lock.close()
+
+    def _open(self) -> None:
+        """Abre o segmento ativo; na primeira vez, recupera o journal."""
+        if self._journal is not None:
+            return
+        self._ready = asyncio.Event()
+        self._journal_dir = self._claim()
+        self._adopt_orphans()
+        segments = sorted(
+            _segment_number(path) for path in self._journal_dir.glob("leads-*.jsonl")
+        )
+        kept = sum(self._replay(segment) for segment in segments)
+        self._segment = (segments[-1] + 1) if segments else 0
+        self._journal = open(self._segment_path(self._segment), "a", encoding="utf-8")
+        self._stats.journal_segments = kept + 1
+
+    def _replay(self, segment: int) -> bool:
+        """Reenvia os leads de um segmento; apaga-o se estiver vazio."""
+        path = self._segment_path(segment)
+        replayed = 0
+        with open(path, encoding="utf-8") as handle:
+            for line in handle:
+                try:
+                    self._enqueue(LeadRecord.from_json(line, segment))
+                    replayed += 1
+                except (ValueError, KeyError):
+                    # Linha cortada por uma queda no meio da escrita
+                    logger.warning("Linha inválida ignorada no journal %s", path.name)
+        if not replayed:
+            path.unlink()
+            return False
+        logger.info("%d leads recuperados do journal %s", replayed, path.name)
+        return True
+
+    async def _release(self, records: List[LeadRecord]) -> None:
+        """Apaga os segmentos cujos leads já estão todos gravados."""
+        for record in records:
+            self._outstanding[record.segment] -= 1
+        size = self._journal.tell()
+        if (self._outstanding.get(self._segment, 0) == 0 and size) or size >= SEGMENT_BYTES:
+            await self._rotate()
+        for segment, count in list(self._outstanding.items()):
+            if count == 0 and segment != self._segment:
+                del self._outstanding[segment]
+                self._segment_path(segment).unlink(missing_ok=True)
+                self._stats.journal_segments -= 1
+
+    async def _rotate(self) -> None:
+        # Antes de fechar o arquivo, adianta o fsync já agendado (senão ele
+        # sincronizaria o segmento novo) e espera todos os em andamento
+        while self._sync_future is not None or self._syncs:
+            if self._sync_future is not None:
+                self._start_sync()
+            await asyncio.gather(*self._syncs, return_exceptions=True)
+        self._journal.close()
+        self._outstanding.setdefault(self._segment, 0)
+        self._segment += 1
+        self._journal = open(self._segment_path(self._segment), "a", encoding="utf-8")
+        self._stats.journal_segments += 1
+
+    # Worker -----------------------------------------------------------
+
+    async def run(self) -> None:
+        """Grava os leads da fila em lotes, até ser cancelado."""
+        self._open()
+        while True:
+            await self._ready.wait()
+            if len(self._pending) < self.batch_size and self.linger:
+                await asyncio.sleep(self.linger)
+            batch = [
+                self._pending.popleft()
+                for _ in range(min(self.batch_size, len(self._pending)))
+            ]
+            if not self._pending:
+                self._ready.clear()
+            if batch and not await self._commit(batch):
+                await asyncio.sleep(RETRY_SECONDS)
+
+    async def drain(self) -> bool:
+        """Grava já todos os leads da fila, em lotes, sem esperar o worker.
+
+        Para na primeira falha (o lote volta à fila) e retorna False.
+        """
+        self._open()
+        while self._pending:
+            batch = [
+                self._pending.popleft()
+                for _ in range(min(self.batch_size, len(self._pending)))
+            ]
+            if not await self._commit(batch):
+                return False
+        self._ready.clear()
+        return True
+
+    async def _commit(self, batch: List[LeadRecord]) -> bool:
+        from .database import get_engine
+
+        def write():
+            with get_engine().begin() as connection:
+                return commit_leads(connection, batch)
+
+        started = time.monotonic()
+        try:
+            committed, rejected, duplicates = await asyncio.to_thread(write)
+        except Exception:
+            logger.exception("Falha ao gravar um lote de %d leads", len(batch))
+            self._stats.failures += 1
+            # Devolve o lote ao início da fila, na mesma ordem
+            self._pending.extendleft(reversed(batch))
+            self._ready.set()
+            return False
+        finished = time.monotonic()
+        self._commit_latency.append((finished - started) * 1000)
+        self._ingest_latency.extend(
+            (finished - record.enqueued_at) * 1000 for record in itertools.islice(batch, 0, None, 10)
+        )
+        self._stats.batches += 1
+        self._stats.committed += committed
+        self._stats.rejected += rejected
+        self._stats.duplicates += duplicates
+        if committed:
+            notification_dispatcher.wake()
+        await self._release(batch)
+        return True
+
+    def stats(self) -> LeadQueueStats:
+        """Cópia dos contadores, com a profundidade e as latências atuais."""
+        return LeadQueueStats(
+            **{
+                **asdict(self._stats),
+                "depth": sum(self._outstanding.values()),
+                "commit_latency_ms": _latency_summary(self._commit_latency),
+                "ingest_latency_ms": _latency_summary(self._ingest_latency),
+            }
+        )
+
+
+def _segment_number(path: Path) -> int:
+    return int(path.stem.split("-")[1])
+
+
+def _try_lock(directory: Path) -> Optional[TextIO]:
+    """Trava `directory` para este processo; None se outro já o travou."""
+    lock = open(directory / "lock", "a")
+    try:
+        fcntl.flock(lock, fcntl.LOCK_EX | fcntl.LOCK_NB)
+    except BlockingIOError:
+        lock.close()
+        return None
+    return lock
+
+
+lead_queue = LeadQueue(Path(os.environ.get("LEAD_JOURNAL_DIR", "lead_journal")))
+
+
+async def run_lead_worker():
+    """Tarefa de ciclo de vida: grava os leads da fila enquanto o app roda.
+
+    O que não for gravado antes do desligamento continua no journal e é
+    reenviado na próxima partida.
+    """
+    await lead_queue.run()
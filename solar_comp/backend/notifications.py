@@ -0,0 +1,538 @@
+"""Avisos de novos leads para as empresas (outbox + dispatcher).
+
+O worker de leads (backend/leads.py) grava, na mesma transação dos leads,
+um aviso em `leadnotification` para cada canal configurado: e-mail para o
+endereço da empresa (se `LEAD_SMTP_HOST` estiver definido) e webhook para
+`LEAD_WEBHOOK_URL`. O envio do formulário nunca espera a rede.
+
+O dispatcher, uma tarefa de ciclo de vida, lê os avisos vencidos em lotes e
+junta os do mesmo destino numa mensagem só. Ele limita as mensagens por
+empresa e canal (token bucket, `LEAD_NOTIFY_RATE_PER_MINUTE`; 0 desliga o
+limite) e os envios simultâneos (`LEAD_NOTIFY_CONCURRENCY`). Falhas são reagendadas com backoff
+exponencial; depois de `max_attempts` tentativas o aviso fica `failed`.
+
+Com vários processos, cada aviso lido é tomado antes do envio: um UPDATE
+condicional adia `next_attempt_at` por `lease_seconds`, e só o processo cujo
+UPDATE pegou o aviso o envia. A entrega é "pelo menos uma vez": uma queda
+entre o envio e a marcação reenvia o lote quando a posse vence.
+
+Para testar com substitutos locais: `LEAD_SMTP_HOST=localhost
+LEAD_SMTP_PORT=1025` com um servidor SMTP de depuração (mailpit, ou
+`python -m smtpd -n -c DebuggingServer localhost:1025` no Python 3.11) e
+`LEAD_WEBHOOK_URL` apontando para qualquer servidor HTTP local.
+
+Uso: python -m solar_comp.backend.notifications {status|retry-failed}
+"""
+
+import argparse
+import asyncio
+from dataclasses import asdict, dataclass, field
+import datetime
+from email.message import EmailMessage
+import logging
+import os
+import random
+import smtplib
+import time
+from typing import Dict, Iterable, List, Mapping, Optional, Tuple
+import uuid
+
+import httpx
+from sqlalchemy import bindparam, func, select
+from sqlalchemy.engine import Connection
+
+from ..models.marketplace import Lead, LeadNotification
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass(frozen=True)
+class NotificationSettings:
+    """Transportes e limites do dispatcher."""
+
+    smtp_host: str = ""  # vazio desliga o canal de e-mail
+    smtp_port: int = 25
+    smtp_sender: str = "leads@solarmarketplace.com.br"
+    smtp_username: str = ""
+    smtp_password: str = ""
+    smtp_starttls: bool = False
+    webhook_url: str = ""  # vazio desliga o canal de webhook
+    timeout: float = 10.0
+    concurrency: int = 10
+    batch_size: int = 200
+    max_leads_per_message: int = 50
+    rate_per_minute: float = 6.0  # mensagens por empresa e canal; 0 = sem limite
+    burst: int = 3
+    max_attempts: int = 8
+    backoff_seconds: float = 5.0
+    max_backoff_seconds: float = 3600.0
+    poll_seconds: float = 2.0
+    lease_seconds: float = 300.0  # posse de um aviso lido, bem acima do envio
+
+    @classmethod
+    def from_env(cls) -> "NotificationSettings":
+        env = os.environ.get
+        return cls(
+            smtp_host=env("LEAD_SMTP_HOST", ""),
+            smtp_port=int(env("LEAD_SMTP_PORT", 25)),
+            smtp_sender=env("LEAD_SMTP_FROM", cls.smtp_sender),
+            smtp_username=env("LEAD_SMTP_USERNAME", ""),
+            smtp_password=env("LEAD_SMTP_PASSWORD", ""),
+            smtp_starttls=env("LEAD_SMTP_STARTTLS", "") in ("1", "true"),
+            webhook_url=env("LEAD_WEBHOOK_URL", ""),
+            concurrency=int(env("LEAD_NOTIFY_CONCURRENCY", cls.concurrency)),
+            rate_per_minute=float(env("LEAD_NOTIFY_RATE_PER_MINUTE", cls.rate_per_minute)),
+        )
+
+
+@dataclass
+class LeadMessage:
+    """Uma mensagem para um destino, com um ou mais avisos pendentes."""
+
+    channel: str
+    recipient: str
+    company_id: uuid.UUID
+    rows: List[Mapping] = field(default_factory=list)
+
+    def subject(self) -> str:
+        if len(self.rows) == 1:
+            return "Novo pedido de orçamento"
+        return f"{len(self.rows)} novos pedidos de orçamento"
+
+    def text(self) -> str:
+        parts = []
+        for row in self.rows:
+            contact = row["email"] + (f" / {row['phone']}" if row["phone"] else "")
+            parts.append(f"{row['name']} ({contact}) em {row['created_at']:%d/%m/%Y %H:%M}\n{row['message']}")
+        return "\n\n".join(parts)
+
+    def payload(self) -> dict:
+        return {
+            "company_id": str(self.company_id),
+            "leads": [
+                {
+                    "id": str(row["lead_id"]),
+                    "name": row["name"],
+                    "email": row["email"],
+                    "phone": row["phone"],
+                    "message": row["message"],
+                    "created_at": row["created_at"].isoformat(),
+                }
+                for row in self.rows
+            ],
+        }
+
+
+class SmtpTransport:
+    """Envia as mensagens por e-mail (smtplib, numa thread)."""
+
+    def __init__(self, settings: NotificationSettings):
+        self.settings = settings
+
+    async def send(self, message: LeadMessage) -> None:
+        await asyncio.to_thread(self._send, message)
+
+    def _send(self, message: LeadMessage) -> None:
+        settings = self.settings
+        email = EmailMessage()
+        email["From"] = settings.smtp_sender
+        email["To"] = message.recipient
+        email["Subject"] = message.subject()
+        email.set_content(message.text())
+        with smtplib.SMTP(settings.smtp_host, settings.smtp_port, timeout=settings.timeout) as smtp:
+            if settings.smtp_starttls:
+                smtp.starttls()
+            if settings.smtp_username:
+                smtp.login(settings.smtp_username, settings.smtp_password)
+            smtp.send_message(email)
+
+
+class HttpTransport:
+    """Envia as mensagens como JSON por POST; respostas de erro viram falha."""
+
+    def __init__(self, settings: NotificationSettings):
+        self.settings = settings
+        self._client: Optional[httpx.AsyncClient] = None
+
+    async def send(self, message: LeadMessage) -> None:
+        if self._client is None:
+            self._client = httpx.AsyncClient(timeout=self.settings.timeout)
+        response = await self._client.post(message.recipient, json=message.payload())
+        response.raise_for_status()
+
+    async def aclose(self) -> None:
+        """Fecha as conexões abertas; um envio posterior abre outro cliente."""
+        client, self._client = self._client, None
+        if client is not None:
+            await client.aclose()
+
+
+class RateLimiter:
+    """Token bucket por chave: `burst` envios seguidos, depois `rate_per_minute`.
+
+    Com `rate_per_minute` <= 0 não há limite. Um balde parado por tempo
+    suficiente para encher de novo é igual a um novo, então é descartado.
+    """
+
+    def __init__(self, rate_per_minute: float, burst: int):
+        self.rate = max(rate_per_minute, 0.0) / 60
+        self.burst = burst
+        self._buckets: Dict[object, Tuple[float, float]] = {}
+        self._swept = 0.0
+
+    def acquire(self, key, now: float) -> float:
+        """Consome uma ficha; retorna 0 ou os segundos até haver uma."""
+        if not self.rate:
+            return 0.0
+        self._sweep(now)
+        tokens, updated = self._buckets.get(key, (self.burst, now))
+        tokens = min(self.burst, tokens + (now - updated) * self.rate)
+        if tokens >= 1:
+            self._buckets[key] = (tokens - 1, now)
+            return 0.0
+        self._buckets[key] = (tokens, now)
+        return (1 - tokens) / self.rate
+
+    def _sweep(self, now: float) -> None:
+        # No máximo uma varredura por tempo de recarga completa
+        refill = self.burst / self.rate
+        if now - self._swept < refill:
+            return
+        self._swept = now
+        self._buckets = {
+            key: (tokens, updated)
+            for key, (tokens, updated) in self._buckets.items()
+            if tokens + (now - updated) * self.rate < self.burst
+        }
+
+
+@dataclass
+class DispatcherStats:
+    """Contadores do dispatcher."""
+
+    rounds: int = 0
+    claimed: int = 0  # avisos tomados do outbox (incluindo os adiados)
+    contended: int = 0  # avisos lidos, mas tomados antes por outro processo
+    delivered: int = 0  # avisos entregues
+    messages: int = 0  # mensagens entregues (cada uma com 1+ avisos)
+    retried: int = 0  # avisos reagendados após falha
+    failed: int = 0  # avisos abandonados após max_attempts
+    rate_limited: int = 0  # avisos adiados pelo limite por empresa
+    in_flight: int = 0
+    sends: int = 0  # tentativas de envio (com sucesso ou não)
+    send_ms_total: float = 0.0
+    send_ms_max: float = 0.0
+
+    @property
+    def send_ms_mean(self) -> float:
+        return self.send_ms_total / self.sends if self.sends else 0.0
+
+    def as_dict(self) -> dict:
+        return {**asdict(self), "send_ms_mean": self.send_ms_mean}
+
+
+class LeadDispatcher:
+    """Lê o outbox e entrega os avisos pelos transportes configurados."""
+
+    def __init__(self, settings: NotificationSettings):
+        self.settings = settings
+        self.transports: Dict[str, object] = {}
+        if settings.smtp_host:
+            self.transports["email"] = SmtpTransport(settings)
+        if settings.webhook_url:
+            self.transports["webhook"] = HttpTransport(settings)
+        self._limiter = RateLimiter(settings.rate_per_minute, settings.burst)
+        self._semaphore = asyncio.Semaphore(settings.concurrency)
+        self._wake: Optional[asyncio.Event] = None
+        self._stats = DispatcherStats()
+
+    def outbox_rows(self, leads: Iterable, emails: Mapping[uuid.UUID, Optional[str]]) -> List[dict]:
+        """Avisos de cada lead (com `id` e `company_id`) nos canais ativos.
+
+        `emails` mapeia a empresa para o seu e-mail de contato.
+        """
+        now = datetime.datetime.now()
+        rows = []
+        for lead in leads:
+            targets = []
+            if "email" in self.transports and emails.get(lead.company_id):
+                targets.append(("email", emails[lead.company_id]))
+            if "webhook" in self.transports:
+                targets.append(("webhook", self.settings.webhook_url))
+            for channel, recipient in targets:
+                rows.append(
+                    {
+                        "id": uuid.uuid4(),
+                        "lead_id": lead.id,
+                        "company_id": lead.company_id,
+                        "channel": channel,
+                        "recipient": recipient,
+                        "status": "pending",
+                        "attempts": 0,
+                        "next_attempt_at": now,
+                        "created_at": now,
+                    }
+                )
+        return rows
+
+    def wake(self) -> None:
+        """Avisa que há avisos novos, sem esperar o próximo ciclo."""
+        if self._wake is not None:
+            self._wake.set()
+
+    async def run(self) -> None:
+        """Entrega os avisos pendentes, até ser cancelado.
+
+        Ao sair, fecha as conexões dos transportes.
+        """
+        self._wake = asyncio.Event()
+        try:
+            while True:
+                self._wake.clear()
+                try:
+                    claimed = await self.dispatch_once()
+                except Exception:
+                    logger.exception("Falha ao enviar avisos de leads")
+                    claimed = 0
+                if claimed < self.settings.batch_size:
+                    try:
+                        await asyncio.wait_for(self._wake.wait(), self.settings.poll_seconds)
+                    except asyncio.TimeoutError:
+                        pass
+        finally:
+            await self.aclose()
+
+    async def aclose(self) -> None:
+        """Fecha os transportes que mantêm conexões (o cliente HTTP)."""
+        for transport in self.transports.values():
+            if hasattr(transport, "aclose"):
+                await transport.aclose()
+
+    async def dispatch_once(self) -> int:
+        """Uma rodada: lê um lote vencido, envia e grava os resultados.
+
+        Retorna quantos avisos foram lidos.
+        """
+        from .database import get_engine
+
+        now = datetime.datetime.now()
+        lease_until = now + datetime.timedelta(seconds=self.settings.lease_seconds)
+
+        def read():
+            with get_engine().connect() as connection:
+                due = due_notifications(connection, now, self.settings.batch_size)
+            if not due:
+                return due, []
+            # Transação própria: a leitura acima não segura lock de escrita
+            with get_engine().begin() as connection:
+                return due, claim_notifications(connection, due, now, lease_until)
+
+        due, rows = await asyncio.to_thread(read)
+        self._stats.contended += len(due) - len(rows)
+        if not rows:
+            return len(due)
+        self._stats.rounds += 1
+        self._stats.claimed += len(rows)
+
+        updates = []
+        sends = []
+        clock = time.monotonic()
+        for message in self._messages(rows):
+            wait = self._limiter.acquire((message.company_id, message.channel), clock)
+            if wait:
+                # Adiado sem contar tentativa; os avisos que chegarem até lá
+                # vão na mesma mensagem
+                self._stats.rate_limited += len(message.rows)
+                later = now + datetime.timedelta(seconds=wait)
+                updates.extend(
+                    _update(row, "pending", row["attempts"], later, row["last_error"])
+                    for row in message.rows
+                )
+            else:
+                sends.append(message)
+
+        errors = await asyncio.gather(*(self._send(message) for message in sends))
+        for message, error in zip(sends, errors):
+            updates.extend(self._outcome(message, error, now))
+
+        def write():
+            with get_engine().begin() as connection:
+                record_outcomes(connection, updates)
+
+        await asyncio.to_thread(write)
+        return len(rows)
+
+    def _messages(self, rows: List[Mapping]) -> List[LeadMessage]:
+        groups: Dict[Tuple, List[Mapping]] = {}
+        for row in rows:
+            groups.setdefault((row["company_id"], row["channel"], row["recipient"]), []).append(row)
+        size = self.settings.max_leads_per_message
+        return [
+            LeadMessage(channel, recipient, company_id, group[start:start + size])
+            for (company_id, channel, recipient), group in groups.items()
+            for start in range(0, len(group), size)
+        ]
+
+    async def _send(self, message: LeadMessage) -> Optional[str]:
+        """Envia uma mensagem; retorna a descrição do erro, se houver."""
+        async with self._semaphore:
+            stats = self._stats
+            stats.in_flight += 1
+            started = time.monotonic()
+            try:
+                await self.transports[message.channel].send(message)
+                return None
+            except Exception as error:
+                detail = str(error).splitlines()[0] if str(error) else ""
+                return f"{type(error).__name__}: {detail}"[:500]
+            finally:
+                elapsed = (time.monotonic() - started) * 1000
+                stats.in_flight -= 1
+                stats.sends += 1
+                stats.send_ms_total += elapsed
+                stats.send_ms_max = max(stats.send_ms_max, elapsed)
+
+    def _outcome(self, message: LeadMessage, error: Optional[str], now: datetime.datetime) -> List[dict]:
+        settings = self.settings
+        updates = []
+        if error is None:
+            self._stats.messages += 1
+        else:
+            logger.warning("Falha ao enviar aviso de lead (%s): %s", message.channel, error)
+        for row in message.rows:
+            attempts = row["attempts"] + 1
+            if error is None:
+                self._stats.delivered += 1
+                updates.append(_update(row, "sent", attempts, now, None, sent_at=now))
+            elif attempts >= settings.max_attempts:
+                self._stats.failed += 1
+                updates.append(_update(row, "failed", attempts, now, error))
+            else:
+                self._stats.retried += 1
+                delay = min(
+                    settings.backoff_seconds * 2 ** (attempts - 1), settings.max_backoff_seconds
+                ) * random.uniform(0.5, 1.0)
+                later = now + datetime.timedelta(seconds=delay)
+                updates.append(_update(row, "pending", attempts, later, error))
+        return updates
+
+    def stats(self) -> DispatcherStats:
+        """Cópia dos contadores atuais."""
+        return DispatcherStats(**asdict(self._stats))
+
+
+def _update(row, status, attempts, next_attempt_at, last_error, sent_at=None) -> dict:
+    return {
+        "notification_id": row["id"],
+        "status": status,
+        "attempts": attempts,
+        "next_attempt_at": next_attempt_at,
+        "last_error": last_error,
+        "sent_at": sent_at,
+    }
+
+
+def due_notifications(connection: Connection, now: datetime.datetime, limit: int) -> List[Mapping]:
+    """Avisos pendentes vencidos, com os dados do lead, na ordem de vencimento."""
+    notification = LeadNotification.__table__
+    lead = Lead.__table__
+    statement = (
+        select(
+            notification.c.id,
+            notification.c.company_id,
+            notification.c.channel,
+            notification.c.recipient,
+            notification.c.attempts,
+            notification.c.last_error,
+            lead.c.id.label("lead_id"),
+            lead.c.name,
+            lead.c.email,
+            lead.c.phone,
+            lead.c.message,
+            lead.c.created_at,
+        )
+        .join(lead, lead.c.id == notification.c.lead_id)
+        .where(notification.c.status == "pending", notification.c.next_attempt_at <= now)
+        .order_by(notification.c.next_attempt_at)
+        .limit(limit)
+    )
+    return list(connection.execute(statement).mappings())
+
+
+def claim_notifications(
+    connection: Connection,
+    rows: List[Mapping],
+    now: datetime.datetime,
+    lease_until: datetime.datetime,
+) -> List[Mapping]:
+    """Toma posse dos avisos lidos, adiando-os para `lease_until`.
+
+    O UPDATE só pega os que continuam pendentes e vencidos, então, se outro
+    processo leu os mesmos avisos, só um dos dois os recebe. Retorna as
+    linhas tomadas por este.
+    """
+    notification = LeadNotification.__table__
+    claimed = set(
+        connection.execute(
+            notification.update()
+            .where(
+                notification.c.id.in_([row["id"] for row in rows]),
+                notification.c.status == "pending",
+                notification.c.next_attempt_at <= now,
+            )
+            .values(next_attempt_at=lease_until)
+            .returning(notification.c.id)
+        ).scalars()
+    )
+    return [row for row in rows if row["id"] in claimed]
+
+
+def record_outcomes(connection: Connection, updates: List[dict]) -> None:
+    """Grava o resultado dos envios com um único UPDATE executemany."""
+    if not updates:
+        return
+    notification = LeadNotification.__table__
+    connection.execute(
+        notification.update().where(notification.c.id == bindparam("notification_id")),
+        updates,
+    )
+
+
+notification_dispatcher = LeadDispatcher(NotificationSettings.from_env())
+
+
+async def dispatch_lead_notifications():
+    """Tarefa de ciclo de vida: entrega os avisos de leads às empresas."""
+    await notification_dispatcher.run()
+
+
+def main(argv=None) -> None:
+    """Linha de comando para acompanhar e reenfileirar os avisos."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("command", choices=["status", "retry-failed"])
+    parser.add_argument("--db-url", help="URL do banco (padrão: db_url do rxconfig)")
+    args = parser.parse_args(argv)
+
+    from .database import create_db_and_tables, create_db_engine
+
+    engine = create_db_engine(args.db_url)
+    create_db_and_tables(engine)
+    notification = LeadNotification.__table__
+    with engine.begin() as connection:
+        if args.command == "retry-failed":
+            result = connection.execute(
+                notification.update()
+                .where(notification.c.status == "failed")
+                .values(status="pending", attempts=0, next_attempt_at=datetime.datetime.now())
+            )
+            print(f"{result.rowcount} avisos reenfileirados")
+        counts = connection.execute(
+            select(notification.c.channel, notification.c.status, func.count())
+            .group_by(notification.c.channel, notification.c.status)
+        )
+        for channel, status, count in counts:
+            print(f"{channel:8} {status:8} {count}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,166 @@
+"""Hash de senhas com bcrypt fora do event loop.
+
+Cada hash bcrypt custa centenas de milissegundos de CPU. O `PasswordHasher`
+executa essas chamadas num pool de threads limitado (o bcrypt libera o GIL),
+recusa trabalho quando a fila passa do limite e guarda métricas de latência.
+O custo (work factor) pode ser calibrado na inicialização para atingir uma
+latência alvo, nunca abaixo de `DEFAULT_ROUNDS`; hashes com custo abaixo do
+atual são refeitos no login. As métricas ficam em `/api/metrics/passwords`.
+"""
+
+import asyncio
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import asdict, dataclass
+import os
+import threading
+import time
+from typing import Deque, Optional
+
+import bcrypt
+
+MAX_ROUNDS = 15
+DEFAULT_ROUNDS = 12
+
+
+class PasswordHasherBusy(Exception):
+    """A fila de hashing está cheia; o chamador deve tentar mais tarde."""
+
+
+@dataclass
+class HasherMetrics:
+    """Métricas do pool de hashing."""
+
+    rounds: int
+    submitted: int
+    completed: int
+    rejected: int
+    pending: int
+    latency_p50_ms: float
+    latency_p95_ms: float
+    latency_max_ms: float
+
+    def as_dict(self) -> dict:
+        return asdict(self)
+
+
+def hash_rounds(hashed: str) -> Optional[int]:
+    """Custo (log2 das iterações) de um hash bcrypt, como `$2b$12$...`."""
+    parts = hashed.split("$")
+    if len(parts) < 4 or not parts[2].isdigit():
+        return None
+    return int(parts[2])
+
+
+class PasswordHasher:
+    """Pool limitado para gerar e verificar hashes bcrypt."""
+
+    def __init__(
+        self,
+        rounds: int = DEFAULT_ROUNDS,
+        max_workers: int = 2,
+        max_pending: int = 64,
+        latency_window: int = 512,
+    ):
+        self.rounds = rounds
+        self.max_pending = max_pending
+        self._executor = ThreadPoolExecutor(
+            max_workers=max_workers, thread_name_prefix="bcrypt"
+        )
+        self._lock = threading.Lock()
+        self._pending = 0
+        self._submitted = 0
+        self._completed = 0
+        self._rejected = 0
+        self._latencies: Deque[float] = deque(maxlen=latency_window)
+
+    async def hash(self, password: str) -> str:
+        """Gera o hash de uma senha com o custo atual."""
+        rounds = self.rounds
+        hashed = await self._run(
+            lambda: bcrypt.hashpw(password.encode(), bcrypt.gensalt(rounds))
+        )
+        return hashed.decode()
+
+    async def verify(self, password: str, hashed: str) -> bool:
+        """Confere uma senha com o hash armazenado."""
+        return await self._run(
+            lambda: bcrypt.checkpw(password.encode(), hashed.encode())
+        )
+
+    def needs_rehash(self, hashed: str) -> bool:
+        """Indica se o hash foi gerado com um custo menor que o atual."""
+        return (hash_rounds(hashed) or 0) < self.rounds
+
+    def calibrate(
+        self,
+        target_ms: float = 250.0,
+        min_rounds: int = DEFAULT_ROUNDS,
+        max_rounds: int = MAX_ROUNDS,
+    ) -> int:
+        """Escolhe o maior custo cuja latência estimada cabe no alvo.
+
+        Mede um hash com `min_rounds` e extrapola, já que cada round a mais
+        dobra o tempo. Nunca fica abaixo de `min_rounds`: num servidor rápido
+        o custo sobe, num lento continua em `DEFAULT_ROUNDS`.
+        """
+        start = time.perf_counter()
+        bcrypt.hashpw(b"calibration", bcrypt.gensalt(min_rounds))
+        elapsed_ms = (time.perf_counter() - start) * 1000
+        rounds = min_rounds
+        while rounds < max_rounds and elapsed_ms * 2 <= target_ms:
+            rounds += 1
+            elapsed_ms *= 2
+        self.rounds = rounds
+        return rounds
+
+    def metrics(self) -> HasherMetrics:
+        """Cópia das métricas atuais."""
+        with self._lock:
+            latencies = sorted(self._latencies)
+            return HasherMetrics(
+                rounds=self.rounds,
+                submitted=self._submitted,
+                completed=self._completed,
+                rejected=self._rejected,
+                pending=self._pending,
+                latency_p50_ms=_percentile(latencies, 0.50),
+                latency_p95_ms=_percentile(latencies, 0.95),
+                latency_max_ms=latencies[-1] if latencies else 0.0,
+            )
+
+    async def _run(self, func):
+        with self._lock:
+            if self._pending >= self.max_pending:
+                self._rejected += 1
+                raise PasswordHasherBusy()
+            self._pending += 1
+            self._submitted += 1
+        start = time.perf_counter()
+        try:
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(self._executor, func)
+        finally:
+            elapsed_ms = (time.perf_counter() - start) * 1000
+            with self._lock:
+                self._pending -= 1
+                self._completed += 1
+                self._latencies.append(elapsed_ms)
+
+
+def _percentile(values, fraction: float) -> float:
+    if not values:
+        return 0.0
+    return values[min(len(values) - 1, int(fraction * len(values)))]
+
+
+password_hasher = PasswordHasher(
+    max_workers=int(os.environ.get("BCRYPT_WORKERS", 2)),
+    max_pending=int(os.environ.get("BCRYPT_MAX_PENDING", 64)),
+)
+
+
+async def calibrate_password_hashing():
+    """Tarefa de inicialização: calibra o custo para `BCRYPT_TARGET_MS`."""
+    target_ms = float(os.environ.get("BCRYPT_TARGET_MS", 250))
+    await asyncio.to_thread(password_hasher.calibrate, target_ms)
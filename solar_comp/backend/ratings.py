@@ -0,0 +1,223 @@
+"""Agregados de avaliação das empresas.
+
+`Company` guarda `rating_sum` e `total_reviews`, e `average_rating` é a
+razão entre os dois. Cada avaliação gravada por `add_review` ou removida
+por `delete_review` ajusta esses contadores com um único UPDATE atômico
+(`SET rating_sum = rating_sum + :nota, ...`), sem reler as avaliações da
+empresa. Cargas em massa usam `recompute_company_ratings`, e divergências
+(por exemplo, avaliações gravadas por fora da aplicação) são encontradas e
+corrigidas com:
+
+    python -m solar_comp.backend.ratings check [--repair]
+"""
+
+import argparse
+from dataclasses import dataclass
+from typing import List, Optional
+import uuid
+
+from sqlalchemy import bindparam, case, func, select, update
+from sqlalchemy.engine import Connection
+from sqlmodel import Session
+
+from ..models.company import Company
+from ..models.marketplace import Review
+from .rollups import activity_decrement, activity_increment
+from .stats import review_deltas, stats_increment
+
+
+@dataclass(frozen=True)
+class RatingDrift:
+    """Empresa cujos contadores não batem com as avaliações gravadas."""
+
+    company_id: uuid.UUID
+    stored_total: int
+    stored_sum: int
+    stored_average: float
+    total: int
+    rating_sum: int
+
+    @property
+    def average(self) -> float:
+        return self.rating_sum / self.total if self.total else 0.0
+
+
+def _average(rating_sum, total):
+    """Média a partir de soma e contagem (0 para empresas sem avaliações)."""
+    return case((total > 0, rating_sum * 1.0 / total), else_=0.0)
+
+
+def _apply_rating(session: Session, company_id: uuid.UUID, rating: int, count: int) -> None:
+    # As expressões do SET leem os valores antigos da linha, então a média
+    # usa a soma e a contagem já ajustadas sem uma segunda leitura
+    rating_sum = Company.rating_sum + rating
+    total = Company.total_reviews + count
+    session.execute(
+        update(Company)
+        .where(Company.id == company_id)
+        .values(rating_sum=rating_sum, total_reviews=total, average_rating=_average(rating_sum, total))
+    )
+
+
+def add_review(
+    session: Session,
+    company_id: uuid.UUID,
+    user_id: uuid.UUID,
+    rating: int,
+    comment: Optional[str] = None,
+) -> Review:
+    """Grava uma avaliação e atualiza os contadores da empresa.
+
+    Não faz commit: a avaliação e o UPDATE entram na transação de quem
+    chamou. Em handlers assíncronos, use `session.run_sync(add_review, ...)`.
+    """
+    if not 1 <= rating <= 5:
+        raise ValueError("A nota deve estar entre 1 e 5")
+    review = Review(company_id=company_id, user_id=user_id, rating=rating, comment=comment)
+    session.add(review)
+    _apply_rating(session, company_id, rating, 1)
+    session.execute(stats_increment(**review_deltas(rating)))
+    session.execute(activity_increment(session.get_bind().dialect, reviews=1))
+    return review
+
+
+def delete_review(session: Session, review: Review) -> None:
+    """Remove uma avaliação e desconta a nota dos contadores da empresa."""
+    company_id, rating, day = review.company_id, review.rating, review.created_at.date()
+    session.delete(review)
+    _apply_rating(session, company_id, -rating, -1)
+    session.execute(stats_increment(**review_deltas(rating, -1)))
+    session.execute(activity_decrement(day, reviews=1))
+
+
+def _actual_ratings():
+    review = Review.__table__
+    return (
+        select(
+            review.c.company_id,
+            func.count().label("total"),
+            func.sum(review.c.rating).label("rating_sum"),
+        )
+        .group_by(review.c.company_id)
+        .subquery()
+    )
+
+
+def check_company_ratings(connection: Connection) -> List[RatingDrift]:
+    """Empresas cujos contadores divergem das avaliações, em uma só consulta."""
+    company = Company.__table__
+    actual = _actual_ratings()
+    total = func.coalesce(actual.c.total, 0)
+    rating_sum = func.coalesce(actual.c.rating_sum, 0)
+    rows = connection.execute(
+        select(
+            company.c.id,
+            company.c.total_reviews,
+            company.c.rating_sum,
+            company.c.average_rating,
+            total.label("total"),
+            rating_sum.label("rating_sum_actual"),
+        )
+        .select_from(company.outerjoin(actual, actual.c.company_id == company.c.id))
+        .where(
+            (company.c.total_reviews != total)
+            | (company.c.rating_sum != rating_sum)
+            | (func.abs(company.c.average_rating - _average(rating_sum, total)) > 1e-9)
+        )
+    ).all()
+    return [
+        RatingDrift(
+            company_id=row.id,
+            stored_total=row.total_reviews,
+            stored_sum=row.rating_sum,
+            stored_average=row.average_rating,
+            total=row.total,
+            rating_sum=row.rating_sum_actual,
+        )
+        for row in rows
+    ]
+
+
+def _write_ratings(connection: Connection, params: List[dict]) -> None:
+    company = Company.__table__
+    connection.execute(
+        company.update()
+        .where(company.c.id == bindparam("b_id"))
+        .values(
+            total_reviews=bindparam("b_total"),
+            rating_sum=bindparam("b_sum"),
+            average_rating=bindparam("b_average"),
+        ),
+        params,
+    )
+
+
+def repair_company_ratings(connection: Connection, drift: List[RatingDrift]) -> int:
+    """Corrige, em lote, as empresas apontadas por `check_company_ratings`."""
+    if drift:
+        _write_ratings(
+            connection,
+            [
+                {"b_id": item.company_id, "b_total": item.total, "b_sum": item.rating_sum, "b_average": item.average}
+                for item in drift
+            ],
+        )
+    return len(drift)
+
+
+def recompute_company_ratings(connection: Connection) -> int:
+    """Recalcula os contadores de todas as empresas a partir de `review`.
+
+    Uma única consulta agrupada lê as avaliações; as empresas são então
+    atualizadas em lote. Usado após cargas em massa. Retorna o número de
+    empresas com avaliações.
+    """
+    actual = _actual_ratings()
+    rows = connection.execute(select(actual)).all()
+
+    connection.execute(
+        Company.__table__.update().values(total_reviews=0, rating_sum=0, average_rating=0.0)
+    )
+    if rows:
+        _write_ratings(
+            connection,
+            [
+                {
+                    "b_id": row.company_id,
+                    "b_total": row.total,
+                    "b_sum": row.rating_sum,
+                    "b_average": row.rating_sum / row.total,
+                }
+                for row in rows
+            ],
+        )
+    return len(rows)
+
+
+def main(argv=None) -> int:
+    """Linha de comando do verificador de consistência."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("command", choices=["check"])
+    parser.add_argument("--repair", action="store_true", help="corrige as divergências")
+    parser.add_argument("--db-url", help="URL do banco (padrão: db_url do rxconfig)")
+    args = parser.parse_args(argv)
+
+    from .database import create_db_and_tables, create_db_engine
+
+    engine = create_db_engine(args.db_url)
+    create_db_and_tables(engine)
+    with engine.begin() as connection:
+        drift = check_company_ratings(connection)
+        for item in drift[:20]:
+            print(
+                f"{item.company_id}: {item.stored_total} avaliações / soma {item.stored_sum} "
+                f"gravadas, {item.total} / {item.rating_sum} reais"
+            )
+        if args.repair:
+            repair_company_ratings(connection, drift)
+    print(f"{len(drift)} empresas divergentes" + (" corrigidas." if args.repair else "."))
+    return 1 if drift and not args.repair else 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
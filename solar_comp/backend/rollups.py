@@ -0,0 +1,155 @@
+"""Rollup diário de novos usuários, leads e avaliações (`DailyActivity`).
+
+Cada escrita soma 1 ao balde do dia com um upsert
+(`INSERT ... ON CONFLICT (day) DO UPDATE SET leads = leads + 1`), então os
+gráficos leem uma linha por dia, qualquer que seja o volume das tabelas de
+origem. Para reconstruir o rollup a partir de `created_at` (bancos antigos
+ou dados gravados por fora da aplicação):
+
+    python -m solar_comp.backend.rollups rebuild
+"""
+
+import argparse
+from collections import defaultdict
+import datetime
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+from sqlalchemy import Update, case, delete, func, update
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.engine import Connection, Dialect
+from sqlalchemy.sql.expression import Insert
+from sqlmodel import select
+
+from ..models.marketplace import DailyActivity, Lead, Review
+from ..models.user import User
+from .cache import TTLCache
+from .downsample import lttb
+
+SERIES = ("users", "leads", "reviews")
+_SOURCES = {"users": User, "leads": Lead, "reviews": Review}
+_INSERTS = {"sqlite": sqlite.insert, "postgresql": postgresql.insert}
+
+# Séries já reduzidas, por (série, dias, pontos, dia final). O TTL curto
+# deixa entrar a atividade do dia corrente.
+SERIES_CACHE_SIZE = 128
+SERIES_CACHE_TTL = 60.0
+series_cache = TTLCache(maxsize=SERIES_CACHE_SIZE, ttl=SERIES_CACHE_TTL)
+
+
+def activity_increment(
+    dialect: Dialect, day: Optional[datetime.date] = None, **deltas: int
+) -> Insert:
+    """Upsert que soma `deltas` ao balde de `day` (hoje, por padrão).
+
+    Exemplo: `await session.execute(activity_increment(session.bind.dialect, leads=1))`.
+    """
+    table = DailyActivity.__table__
+    statement = _INSERTS[dialect.name](table).values(
+        day=day or datetime.date.today(), **deltas
+    )
+    return statement.on_conflict_do_update(
+        index_elements=[table.c.day],
+        set_={name: table.c[name] + statement.excluded[name] for name in deltas},
+    )
+
+
+def activity_decrement(day: datetime.date, **deltas: int) -> Update:
+    """UPDATE que desconta `deltas` do balde de `day`, sem passar de zero.
+
+    Só altera um balde existente: descontar de um dia sem linha (atividade
+    anterior ao rollup) não cria um balde negativo.
+    """
+    table = DailyActivity.__table__
+    return (
+        update(table)
+        .where(table.c.day == day)
+        .values(
+            {
+                name: case((table.c[name] > delta, table.c[name] - delta), else_=0)
+                for name, delta in deltas.items()
+            }
+        )
+    )
+
+
+def rebuild_daily_activity(connection: Connection) -> int:
+    """Recalcula o rollup inteiro com um GROUP BY por dia em cada tabela.
+
+    Retorna o número de dias com atividade.
+    """
+    days: Dict[datetime.date, dict] = defaultdict(lambda: dict.fromkeys(SERIES, 0))
+    for name, model in _SOURCES.items():
+        day = func.date(model.created_at)
+        for value, count in connection.execute(select(day, func.count()).group_by(day)):
+            days[datetime.date.fromisoformat(str(value))][name] = count
+
+    connection.execute(delete(DailyActivity))
+    if days:
+        connection.execute(
+            DailyActivity.__table__.insert(),
+            [{"day": day, **counts} for day, counts in sorted(days.items())],
+        )
+    return len(days)
+
+
+async def load_daily_activity(days: int, until: Optional[datetime.date] = None) -> List[DailyActivity]:
+    """Um registro por dia dos últimos `days` dias, com zeros nos dias vazios."""
+    from .database import async_session
+
+    until = until or datetime.date.today()
+    start = until - datetime.timedelta(days=days - 1)
+    async with async_session() as session:
+        rows = (
+            await session.exec(
+                select(DailyActivity)
+                .where(DailyActivity.day >= start, DailyActivity.day <= until)
+                .order_by(DailyActivity.day)
+            )
+        ).all()
+    by_day = {row.day: row for row in rows}
+    return [
+        by_day.get(day) or DailyActivity(day=day, users=0, leads=0, reviews=0)
+        for day in (start + datetime.timedelta(days=offset) for offset in range(days))
+    ]
+
+
+async def load_activity_series(
+    series: str, days: int, points: int
+) -> Tuple[Tuple[datetime.date, int], ...]:
+    """Série `series` dos últimos `days` dias reduzida a até `points` pontos.
+
+    Usa LTTB e fica em cache por (série, intervalo, resolução), então trocar
+    de aba ou de intervalo não repete a leitura nem a redução.
+    """
+    if series not in SERIES:
+        raise ValueError(f"série desconhecida: {series}")
+    key = (series, days, points, datetime.date.today())
+
+    async def load():
+        rows = await load_daily_activity(days)
+        x = np.fromiter((row.day.toordinal() for row in rows), dtype=float, count=len(rows))
+        y = np.fromiter((getattr(row, series) for row in rows), dtype=float, count=len(rows))
+        return tuple((rows[index].day, int(y[index])) for index in lttb(x, y, points))
+
+    return await series_cache.aget_or_load(key, load)
+
+
+def main(argv=None) -> None:
+    """Linha de comando de manutenção do rollup."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("command", choices=["rebuild"])
+    parser.add_argument("--db-url", help="URL do banco (padrão: db_url do rxconfig)")
+    args = parser.parse_args(argv)
+
+    from .database import create_db_and_tables, create_db_engine
+
+    engine = create_db_engine(args.db_url)
+    create_db_and_tables(engine)
+    with engine.begin() as connection:
+        days = rebuild_daily_activity(connection)
+    print(f"Rollup reconstruído: {days} dias com atividade.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,138 @@
+"""Busca textual de empresas com SQLite FTS5.
+
+O índice `company_fts` usa a própria tabela `company` como conteúdo externo
+(`content_rowid` é o rowid implícito de `company`) e é mantido por triggers,
+então qualquer escrita em `company` — formulário, importação ou SQL manual —
+já fica pesquisável. Um VACUUM pode renumerar esses rowids; nesse caso, ou
+para indexar um banco que já tinha empresas, rode:
+
+    python -m solar_comp.backend.search rebuild
+"""
+
+import argparse
+import re
+from typing import Optional
+
+from sqlalchemy import column, func, literal_column, table, text
+from sqlalchemy.engine import Connection, Engine
+
+FTS_TABLE = "company_fts"
+
+# Pesos do BM25 para as colunas (name, description)
+NAME_WEIGHT = 10.0
+DESCRIPTION_WEIGHT = 1.0
+
+_FTS_DDL = [
+    f"""
+    CREATE VIRTUAL TABLE IF NOT EXISTS {FTS_TABLE} USING fts5(
+        name,
+        description,
+        content='company',
+        content_rowid='rowid',
+        tokenize='unicode61 remove_diacritics 2'
+    )
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS company_fts_ai AFTER INSERT ON company BEGIN
+        INSERT INTO {FTS_TABLE}(rowid, name, description)
+        VALUES (new.rowid, new.name, new.description);
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS company_fts_ad AFTER DELETE ON company BEGIN
+        INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, name, description)
+        VALUES ('delete', old.rowid, old.name, old.description);
+    END
+    """,
+    f"""
+    CREATE TRIGGER IF NOT EXISTS company_fts_au AFTER UPDATE OF name, description ON company BEGIN
+        INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, name, description)
+        VALUES ('delete', old.rowid, old.name, old.description);
+        INSERT INTO {FTS_TABLE}(rowid, name, description)
+        VALUES (new.rowid, new.name, new.description);
+    END
+    """,
+]
+
+# Representação do índice para uso em consultas (junção via rowid)
+company_fts = table(FTS_TABLE, column("rowid"))
+
+_TOKEN_RE = re.compile(r"\w+", re.UNICODE)
+
+
+def fts_available(bind) -> bool:
+    """Indica se o banco suporta o índice FTS5 (apenas SQLite)."""
+    return bind.dialect.name == "sqlite"
+
+
+def ensure_company_search(engine: Engine) -> bool:
+    """Cria o índice FTS5 e os triggers, se ainda não existirem.
+
+    Retorna True se o índice acabou de ser criado; nesse caso ele é
+    populado com as empresas que já estão no banco.
+    """
+    if not fts_available(engine):
+        return False
+    with engine.begin() as connection:
+        exists = connection.execute(
+            text("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = :name"),
+            {"name": FTS_TABLE},
+        ).first()
+        for statement in _FTS_DDL:
+            connection.exec_driver_sql(statement)
+        if not exists:
+            _rebuild(connection)
+    return not exists
+
+
+def rebuild_company_search(engine: Engine) -> None:
+    """Reconstrói o índice FTS5 a partir da tabela `company`."""
+    ensure_company_search(engine)
+    with engine.begin() as connection:
+        _rebuild(connection)
+
+
+def _rebuild(connection: Connection) -> None:
+    connection.exec_driver_sql(f"INSERT INTO {FTS_TABLE}({FTS_TABLE}) VALUES ('rebuild')")
+
+
+def match_expression(query: str) -> Optional[str]:
+    """Converte o texto digitado numa expressão MATCH com prefixos.
+
+    Cada palavra vira um termo com prefixo (`"sol"*`), combinados com AND,
+    o que evita que aspas ou operadores digitados quebrem a consulta.
+    """
+    tokens = _TOKEN_RE.findall(query.lower())
+    if not tokens:
+        return None
+    return " ".join(f'"{token}"*' for token in tokens)
+
+
+def fts_match(expression: str):
+    """Cláusula WHERE que aplica a expressão MATCH ao índice."""
+    return text(f"{FTS_TABLE} MATCH :fts_query").bindparams(fts_query=expression)
+
+
+def fts_rank():
+    """Ordenação por relevância (BM25; valores menores são melhores)."""
+    return func.bm25(literal_column(FTS_TABLE), NAME_WEIGHT, DESCRIPTION_WEIGHT)
+
+
+def main(argv=None) -> None:
+    """Linha de comando para manutenção do índice de busca."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("command", choices=["rebuild"])
+    parser.add_argument("--db-url", help="URL do banco (padrão: db_url do rxconfig)")
+    args = parser.parse_args(argv)
+
+    from .database import create_db_engine
+
+    engine = create_db_engine(args.db_url)
+    if not fts_available(engine):
+        parser.error("o índice FTS5 só está disponível para SQLite")
+    rebuild_company_search(engine)
+    print(f"Índice {FTS_TABLE} reconstruído.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,460 @@
+"""Carga de dados sintéticos do marketplace para testes de carga.
+
+Gera usuários, empresas (com CNPJs válidos), serviços, projetos,
+avaliações, leads e mensagens de forma determinística a partir de uma
+semente, e insere tudo com executemany em lotes dentro de uma única
+transação — sem `session.add` por linha. Exemplo:
+
+    python -m solar_comp.backend.seed --companies 10000 --reviews 1000000
+
+Todos os usuários gerados usam a senha `SEED_PASSWORD`, com um único hash
+bcrypt calculado antes da carga. O salt desse hash também vem da semente,
+então a mesma semente gera exatamente as mesmas linhas, hash incluído.
+"""
+
+import argparse
+from dataclasses import dataclass, field
+import datetime
+from itertools import islice
+import random
+import time
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+import uuid
+
+import bcrypt
+from sqlalchemy import Table
+from sqlalchemy.engine import Connection, Engine
+
+from ..models import (
+    Company,
+    CompanyProject,
+    CompanyService,
+    Lead,
+    Message,
+    Review,
+    User,
+)
+from .cnpj import make_cnpj
+from .geo import geocode
+from .inbox import rebuild_unread_counters
+from .passwords import DEFAULT_ROUNDS
+from .ratings import recompute_company_ratings
+from .rollups import rebuild_daily_activity
+from .stats import refresh_marketplace_stats
+
+BATCH_SIZE = 10_000
+SEED_PASSWORD = "solar123"
+
+# Data de referência fixa, para que a mesma semente gere os mesmos dados
+REFERENCE_DATE = datetime.datetime(2025, 1, 1)
+HISTORY_DAYS = 730
+
+# Dispersão (graus, ~5 km) das empresas em torno do centro do município
+LOCATION_SPREAD = 0.05
+
+# Cidades e população aproximada (milhares), usada como peso do sorteio
+CITIES: List[Tuple[str, str, int]] = [
+    ("São Paulo", "SP", 11451),
+    ("Rio de Janeiro", "RJ", 6211),
+    ("Brasília", "DF", 2817),
+    ("Fortaleza", "CE", 2428),
+    ("Salvador", "BA", 2418),
+    ("Belo Horizonte", "MG", 2315),
+    ("Manaus", "AM", 2063),
+    ("Curitiba", "PR", 1773),
+    ("Recife", "PE", 1488),
+    ("Goiânia", "GO", 1437),
+    ("Porto Alegre", "RS", 1332),
+    ("Belém", "PA", 1303),
+    ("Guarulhos", "SP", 1291),
+    ("Campinas", "SP", 1139),
+    ("São Luís", "MA", 1037),
+    ("Maceió", "AL", 957),
+    ("Campo Grande", "MS", 898),
+    ("São Gonçalo", "RJ", 896),
+    ("Teresina", "PI", 866),
+    ("João Pessoa", "PB", 833),
+    ("São Bernardo do Campo", "SP", 810),
+    ("Duque de Caxias", "RJ", 808),
+    ("Nova Iguaçu", "RJ", 785),
+    ("Natal", "RN", 751),
+    ("Santo André", "SP", 748),
+    ("Osasco", "SP", 728),
+    ("Sorocaba", "SP", 723),
+    ("Uberlândia", "MG", 713),
+    ("Ribeirão Preto", "SP", 698),
+    ("São José dos Campos", "SP", 697),
+    ("Cuiabá", "MT", 650),
+    ("Jaboatão dos Guararapes", "PE", 644),
+    ("Contagem", "MG", 621),
+    ("Joinville", "SC", 616),
+    ("Feira de Santana", "BA", 616),
+    ("Aracaju", "SE", 602),
+    ("Londrina", "PR", 555),
+    ("Juiz de Fora", "MG", 540),
+    ("Florianópolis", "SC", 537),
+    ("Aparecida de Goiânia", "GO", 527),
+    ("Porto Velho", "RO", 460),
+    ("Vila Velha", "ES", 467),
+    ("Macapá", "AP", 442),
+    ("Maringá", "PR", 409),
+    ("Rio Branco", "AC", 364),
+    ("Boa Vista", "RR", 413),
+    ("Vitória", "ES", 322),
+    ("Palmas", "TO", 302),
+    ("Petrolina", "PE", 386),
+    ("Mossoró", "RN", 264),
+]
+
+FIRST_NAMES = [
+    "Ana", "Bruno", "Carla", "Daniel", "Eduarda", "Felipe", "Gabriela",
+    "Henrique", "Isabela", "João", "Larissa", "Lucas", "Mariana", "Mateus",
+    "Natália", "Pedro", "Rafaela", "Rodrigo", "Sofia", "Thiago", "Vitória",
+]
+LAST_NAMES = [
+    "Silva", "Santos", "Oliveira", "Souza", "Rodrigues", "Ferreira", "Alves",
+    "Pereira", "Lima", "Gomes", "Costa", "Ribeiro", "Martins", "Carvalho",
+]
+COMPANY_PREFIXES = ["Solar", "Sol", "Energia", "Luz", "Foton", "Brilho", "Raio", "Eco"]
+COMPANY_SUFFIXES = ["Energia Solar", "Fotovoltaica", "Renováveis", "Sustentável", "Tech", "Power"]
+SERVICES = [
+    ("Instalação residencial", "R$ 15.000 - R$ 40.000"),
+    ("Instalação comercial", "R$ 50.000 - R$ 300.000"),
+    ("Usina solar", "Sob consulta"),
+    ("Manutenção preventiva", "R$ 300 - R$ 1.500"),
+    ("Limpeza de painéis", "R$ 200 - R$ 800"),
+    ("Projeto e homologação", "R$ 1.000 - R$ 5.000"),
+    ("Baterias e armazenamento", "R$ 20.000 - R$ 80.000"),
+]
+REVIEW_COMMENTS = [
+    "Ótimo atendimento e instalação rápida.",
+    "A conta de luz caiu bastante, recomendo.",
+    "Equipe atenciosa, mas houve atraso na homologação.",
+    "Projeto bem explicado e preço justo.",
+    "Tive problemas com o inversor, mas resolveram.",
+    None,
+]
+LEAD_MESSAGES = [
+    "Gostaria de um orçamento para minha casa.",
+    "Qual o prazo de instalação para uma empresa?",
+    "Vocês trabalham com financiamento?",
+    "Preciso de manutenção no meu sistema.",
+]
+LEAD_STATUSES = (["new", "contacted", "converted", "closed"], [50, 30, 10, 10])
+
+
+@dataclass
+class SeedConfig:
+    """Volumes da carga e semente do gerador."""
+
+    companies: int = 1_000
+    users: int = 10_000
+    reviews: int = 50_000
+    leads: int = 20_000
+    messages: int = 20_000
+    max_services: int = 4
+    max_projects: int = 5
+    seed: int = 42
+    password: str = SEED_PASSWORD
+    password_rounds: int = DEFAULT_ROUNDS
+
+
+@dataclass
+class SeedReport:
+    """Linhas inseridas e tempo gasto por tabela."""
+
+    rows: Dict[str, int] = field(default_factory=dict)
+    seconds: Dict[str, float] = field(default_factory=dict)
+
+    @property
+    def total_seconds(self) -> float:
+        return sum(self.seconds.values())
+
+
+def insert_batches(
+    connection: Connection, table: Table, rows: Iterable[dict], batch_size: int = BATCH_SIZE
+) -> int:
+    """Insere as linhas com executemany, `batch_size` por vez."""
+    total = 0
+    rows = iter(rows)
+    while batch := list(islice(rows, batch_size)):
+        connection.execute(table.insert(), batch)
+        total += len(batch)
+    return total
+
+
+# Alfabeto base64 do bcrypt; o 22º caractere do salt só carrega 2 bits
+_BCRYPT_ALPHABET = "./ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz0123456789"
+
+
+def _seeded_salt(seed: int, rounds: int) -> bytes:
+    """Salt bcrypt derivado da semente (`bcrypt.gensalt` é aleatório).
+
+    Usa um gerador próprio para não deslocar a sequência das demais linhas.
+    """
+    rng = random.Random(f"bcrypt:{seed}")
+    salt = "".join(rng.choice(_BCRYPT_ALPHABET) for _ in range(21)) + rng.choice(".Oeu")
+    return f"$2b${rounds:02d}${salt}".encode()
+
+
+class _Generator:
+    """Gera as linhas de cada tabela a partir de um único `random.Random`."""
+
+    def __init__(self, config: SeedConfig):
+        self.config = config
+        self.rng = random.Random(config.seed)
+        self.hashed_password = bcrypt.hashpw(
+            config.password.encode(), _seeded_salt(config.seed, config.password_rounds)
+        ).decode()
+        self.company_ids: List[uuid.UUID] = []
+        self.company_cities: List[Tuple[str, str]] = []
+        self.company_quality: List[float] = []
+        self.company_user_ids: List[uuid.UUID] = []
+        self.consumer_ids: List[uuid.UUID] = []
+        self._cities = [(city, state) for city, state, _ in CITIES]
+        self._city_weights = [population for _, _, population in CITIES]
+        # Ids crescentes (prefixo sorteado + contador): cada insert cai no fim
+        # do índice da chave primária, em vez de uma página aleatória
+        self._id_prefix = self.rng.getrandbits(64) << 64
+        self._id_counter = 0
+
+    def uuid(self) -> uuid.UUID:
+        self._id_counter += 1
+        return uuid.UUID(int=self._id_prefix | self._id_counter, version=4)
+
+    def timestamp(self) -> datetime.datetime:
+        return REFERENCE_DATE - datetime.timedelta(
+            seconds=self.rng.randrange(HISTORY_DAYS * 86400)
+        )
+
+    def person(self) -> str:
+        return f"{self.rng.choice(FIRST_NAMES)} {self.rng.choice(LAST_NAMES)}"
+
+    def phone(self) -> str:
+        return f"({self.rng.randint(11, 99)}) 9{self.rng.randint(1000, 9999)}-{self.rng.randint(1000, 9999)}"
+
+    def companies(self) -> Iterator[dict]:
+        rng = self.rng
+        cities = rng.choices(self._cities, weights=self._city_weights, k=self.config.companies)
+        for index, (city, state) in enumerate(cities):
+            company_id = self.uuid()
+            name = f"{rng.choice(COMPANY_PREFIXES)} {rng.choice(COMPANY_SUFFIXES)} {city} {index}"
+            created = self.timestamp()
+            self.company_ids.append(company_id)
+            self.company_cities.append((city, state))
+            self.company_quality.append(rng.uniform(2.5, 5.0))
+            latitude, longitude = geocode(city, state)
+            yield {
+                "id": company_id,
+                "name": name,
+                "description": f"Empresa de energia solar em {city}/{state}, "
+                f"com {rng.randint(1, 30)} anos de experiência em sistemas fotovoltaicos.",
+                "cnpj": make_cnpj(index + 1),
+                "address": f"Rua {rng.choice(LAST_NAMES)}, {rng.randint(1, 3000)}",
+                "city": city,
+                "state": state,
+                "latitude": round(rng.gauss(latitude, LOCATION_SPREAD), 5),
+                "longitude": round(rng.gauss(longitude, LOCATION_SPREAD), 5),
+                "phone": self.phone(),
+                "email": f"contato@empresa{index}.com.br",
+                "website": f"https://empresa{index}.com.br",
+                "logo_url": None,
+                "created_at": created,
+                "updated_at": created,
+                "is_active": rng.random() < 0.95,
+                "is_verified": rng.random() < 0.3,
+                "average_rating": 0.0,
+                "total_reviews": 0,
+            }
+
+    def users(self) -> Iterator[dict]:
+        # Um usuário por empresa, seguido dos consumidores
+        for index, company_id in enumerate(self.company_ids):
+            user_id = self.uuid()
+            self.company_user_ids.append(user_id)
+            yield self._user(user_id, f"admin@empresa{index}.com.br", "company", company_id)
+        for index in range(self.config.users):
+            user_id = self.uuid()
+            self.consumer_ids.append(user_id)
+            yield self._user(user_id, f"cliente{index}@exemplo.com.br", "consumer", None)
+
+    def _user(self, user_id, email, user_type, company_id) -> dict:
+        created = self.timestamp()
+        return {
+            "id": user_id,
+            "email": email,
+            "hashed_password": self.hashed_password,
+            "full_name": self.person(),
+            "user_type": user_type,
+            "created_at": created,
+            "updated_at": created,
+            "is_active": True,
+            "company_id": company_id,
+        }
+
+    def services(self) -> Iterator[dict]:
+        for company_id in self.company_ids:
+            count = self.rng.randint(1, self.config.max_services)
+            for name, price_range in self.rng.sample(SERVICES, min(count, len(SERVICES))):
+                yield {
+                    "id": self.uuid(),
+                    "company_id": company_id,
+                    "name": name,
+                    "description": None,
+                    "price_range": price_range,
+                    "is_active": True,
+                }
+
+    def projects(self) -> Iterator[dict]:
+        rng = self.rng
+        for company_id, (city, state) in zip(self.company_ids, self.company_cities):
+            for _ in range(rng.randint(0, self.config.max_projects)):
+                capacity = round(rng.lognormvariate(2.0, 1.0), 2)
+                yield {
+                    "id": self.uuid(),
+                    "company_id": company_id,
+                    "title": f"Sistema de {capacity} kWp",
+                    "description": None,
+                    "location": f"{city}/{state}",
+                    "completion_date": self.timestamp().date(),
+                    "power_capacity": capacity,
+                    "image_urls": None,
+                }
+
+    def reviews(self) -> Iterator[dict]:
+        if not self.company_ids or not self.consumer_ids:
+            return
+        # Caminho mais volumoso: sorteios com random() direto, sem randrange
+        random, gauss, new_id = self.rng.random, self.rng.gauss, self.uuid
+        company_ids, quality = self.company_ids, self.company_quality
+        consumers = self.consumer_ids
+        companies, users = len(company_ids), len(consumers)
+        span = HISTORY_DAYS * 86400
+        for _ in range(self.config.reviews):
+            index = int(random() * companies)
+            rating = min(5, max(1, round(gauss(quality[index], 0.8))))
+            yield {
+                "id": new_id(),
+                "company_id": company_ids[index],
+                "user_id": consumers[int(random() * users)],
+                "rating": rating,
+                "comment": REVIEW_COMMENTS[int(random() * len(REVIEW_COMMENTS))],
+                "created_at": REFERENCE_DATE - datetime.timedelta(seconds=int(random() * span)),
+            }
+
+    def leads(self) -> Iterator[dict]:
+        if not self.company_ids:
+            return
+        rng = self.rng
+        statuses = rng.choices(*LEAD_STATUSES, k=self.config.leads)
+        for status in statuses:
+            name = self.person()
+            yield {
+                "id": self.uuid(),
+                "company_id": rng.choice(self.company_ids),
+                "name": name,
+                "email": f"{name.split()[0].lower()}{rng.randrange(10**6)}@exemplo.com.br",
+                "phone": self.phone(),
+                "message": rng.choice(LEAD_MESSAGES),
+                "created_at": self.timestamp(),
+                "status": status,
+            }
+
+    def messages(self) -> Iterator[dict]:
+        if not self.company_user_ids or not self.consumer_ids:
+            return
+        rng = self.rng
+        for _ in range(self.config.messages):
+            consumer = rng.choice(self.consumer_ids)
+            company_user = rng.choice(self.company_user_ids)
+            sender, receiver = (
+                (consumer, company_user) if rng.random() < 0.6 else (company_user, consumer)
+            )
+            created = self.timestamp()
+            read = rng.random() < 0.7
+            yield {
+                "id": self.uuid(),
+                "sender_id": sender,
+                "receiver_id": receiver,
+                "content": rng.choice(LEAD_MESSAGES),
+                "created_at": created,
+                "read_at": created + datetime.timedelta(hours=rng.randint(1, 72)) if read else None,
+            }
+
+
+def seed_database(engine: Engine, config: Optional[SeedConfig] = None) -> SeedReport:
+    """Gera e insere os dados de `config` em uma única transação.
+
+    A ordem respeita as chaves estrangeiras; ao final, os contadores de
+    avaliação das empresas, o rollup diário, as mensagens não lidas e o
+    resumo do marketplace são recalculados.
+    """
+    config = config or SeedConfig()
+    generator = _Generator(config)
+    report = SeedReport()
+    steps = [
+        (Company.__table__, generator.companies),
+        (User.__table__, generator.users),
+        (CompanyService.__table__, generator.services),
+        (CompanyProject.__table__, generator.projects),
+        (Review.__table__, generator.reviews),
+        (Lead.__table__, generator.leads),
+        (Message.__table__, generator.messages),
+    ]
+    with engine.begin() as connection:
+        for table, rows in steps:
+            start = time.perf_counter()
+            report.rows[table.name] = insert_batches(connection, table, rows())
+            report.seconds[table.name] = time.perf_counter() - start
+        start = time.perf_counter()
+        recompute_company_ratings(connection)
+        rebuild_daily_activity(connection)
+        rebuild_unread_counters(connection)
+        refresh_marketplace_stats(connection)
+        report.seconds["aggregates"] = time.perf_counter() - start
+    return report
+
+
+def main(argv=None) -> None:
+    """Linha de comando da carga sintética."""
+    defaults = SeedConfig()
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--db-url", help="URL do banco (padrão: db_url do rxconfig)")
+    parser.add_argument("--seed", type=int, default=defaults.seed)
+    parser.add_argument("--companies", type=int, default=defaults.companies)
+    parser.add_argument("--users", type=int, default=defaults.users)
+    parser.add_argument("--reviews", type=int, default=defaults.reviews)
+    parser.add_argument("--leads", type=int, default=defaults.leads)
+    parser.add_argument("--messages", type=int, default=defaults.messages)
+    parser.add_argument(
+        "--password-rounds",
+        type=int,
+        default=defaults.password_rounds,
+        help="custo bcrypt do hash compartilhado pelos usuários",
+    )
+    args = parser.parse_args(argv)
+
+    from .database import create_db_and_tables, create_db_engine
+
+    engine = create_db_engine(args.db_url)
+    create_db_and_tables(engine)
+    report = seed_database(
+        engine,
+        SeedConfig(
+            companies=args.companies,
+            users=args.users,
+            reviews=args.reviews,
+            leads=args.leads,
+            messages=args.messages,
+            seed=args.seed,
+            password_rounds=args.password_rounds,
+        ),
+    )
+    for name, seconds in report.seconds.items():
+        rows = report.rows.get(name)
+        print(f"{name:<16} {rows if rows is not None else '':>10} {seconds:8.2f}s")
+    print(f"Total: {report.total_seconds:.2f}s (senha dos usuários: {SEED_PASSWORD})")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,139 @@
+"""Estatísticas do marketplace pré-calculadas em `MarketplaceStats`.
+
+As páginas leem uma única linha em vez de rodar COUNT/AVG sobre as tabelas
+a cada visita. A linha é mantida de duas formas:
+
+- incrementalmente: cada escrita (empresa, usuário, lead, avaliação) soma
+  seus deltas com `stats_increment(...)` na mesma transação;
+- periodicamente: `refresh_stats_periodically` recalcula tudo com consultas
+  agregadas a cada `STATS_REFRESH_SECONDS`, corrigindo o que foi gravado por
+  fora da aplicação e atualizando os totais de 30 dias atrás.
+"""
+
+import asyncio
+import datetime
+import logging
+import os
+from typing import Optional
+
+from sqlalchemy import case, func, select, update
+from sqlalchemy.engine import Connection
+from sqlalchemy.sql.expression import Update
+
+from ..models.company import Company, CompanyProject
+from ..models.marketplace import Lead, MarketplaceStats, Review
+from ..models.user import User
+
+logger = logging.getLogger(__name__)
+
+STATS_ID = 1
+COMPARISON_DAYS = 30
+SATISFIED_RATING = 4
+
+
+def stats_increment(**deltas: int) -> Update:
+    """UPDATE atômico que soma `deltas` aos contadores do resumo.
+
+    Exemplo: `await session.exec(stats_increment(leads=1))`.
+    """
+    columns = MarketplaceStats.__table__.c
+    return (
+        update(MarketplaceStats)
+        .where(MarketplaceStats.id == STATS_ID)
+        .values({columns[name]: columns[name] + delta for name, delta in deltas.items()})
+    )
+
+
+def review_deltas(rating: int, count: int = 1) -> dict:
+    """Deltas do resumo para `count` avaliações (negativo ao remover)."""
+    return {
+        "reviews": count,
+        "rating_sum": rating * count,
+        "satisfied_reviews": count if rating >= SATISFIED_RATING else 0,
+    }
+
+
+def _count(table, *columns, cutoff: Optional[datetime.datetime] = None):
+    """COUNT(*) e, opcionalmente, quantos registros são anteriores a `cutoff`."""
+    expressions = [func.count()]
+    if cutoff is not None:
+        expressions.append(func.coalesce(func.sum(case((table.c.created_at < cutoff, 1), else_=0)), 0))
+    return select(*expressions, *columns).select_from(table)
+
+
+def compute_marketplace_stats(connection: Connection) -> dict:
+    """Calcula todos os contadores com uma consulta agregada por tabela."""
+    cutoff = datetime.datetime.now() - datetime.timedelta(days=COMPARISON_DAYS)
+    company = Company.__table__
+    review = Review.__table__
+
+    companies, verified = connection.execute(
+        select(
+            func.count(),
+            func.coalesce(func.sum(case((company.c.is_verified, 1), else_=0)), 0),
+        ).where(company.c.is_active)
+    ).one()
+    users, users_month_ago = connection.execute(_count(User.__table__, cutoff=cutoff)).one()
+    leads, leads_month_ago = connection.execute(_count(Lead.__table__, cutoff=cutoff)).one()
+    reviews, reviews_month_ago, rating_sum, satisfied = connection.execute(
+        _count(
+            review,
+            func.coalesce(func.sum(review.c.rating), 0),
+            func.coalesce(func.sum(case((review.c.rating >= SATISFIED_RATING, 1), else_=0)), 0),
+            cutoff=cutoff,
+        )
+    ).one()
+    projects = connection.execute(select(func.count()).select_from(CompanyProject.__table__)).scalar_one()
+
+    return {
+        "companies": companies,
+        "verified_companies": verified,
+        "projects": projects,
+        "users": users,
+        "leads": leads,
+        "reviews": reviews,
+        "rating_sum": rating_sum,
+        "satisfied_reviews": satisfied,
+        "users_month_ago": users_month_ago,
+        "leads_month_ago": leads_month_ago,
+        "reviews_month_ago": reviews_month_ago,
+        "refreshed_at": datetime.datetime.now(),
+    }
+
+
+def refresh_marketplace_stats(connection: Connection) -> dict:
+    """Recalcula e grava a linha do resumo (criando-a se preciso)."""
+    values = compute_marketplace_stats(connection)
+    table = MarketplaceStats.__table__
+    result = connection.execute(table.update().where(table.c.id == STATS_ID).values(values))
+    if not result.rowcount:
+        connection.execute(table.insert().values(id=STATS_ID, **values))
+    return values
+
+
+async def load_marketplace_stats() -> MarketplaceStats:
+    """Lê o resumo (uma linha, pela chave primária)."""
+    from .database import async_session
+
+    async with async_session() as session:
+        stats = await session.get(MarketplaceStats, STATS_ID)
+    return stats or MarketplaceStats()
+
+
+def _refresh() -> None:
+    from .database import get_engine
+
+    with get_engine().begin() as connection:
+        refresh_marketplace_stats(connection)
+
+
+async def refresh_stats_periodically():
+    """Tarefa de ciclo de vida: recalcula o resumo na partida e a cada
+    `STATS_REFRESH_SECONDS` (padrão: uma hora)."""
+    interval = float(os.environ.get("STATS_REFRESH_SECONDS", 3600))
+    while True:
+        try:
+            await asyncio.to_thread(_refresh)
+        except Exception:
+            logger.exception("Falha ao recalcular as estatísticas do marketplace")
+        await asyncio.sleep(interval)
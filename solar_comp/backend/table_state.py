@@ -1,9 +1,13 @@
-import csv
+import asyncio
 from pathlib import Path
-from typing import List
+from typing import List, Tuple
+from urllib.parse import urlencode
 
 import reflex as rx
 
+from .item_store import ItemColumns, item_columns_snapshot, load_item_columns
+
+ITEMS_PATH = Path("items.csv")
 
 class Item(rx.Base):
     """The item class."""
@@ -14,10 +18,24 @@ class Item(rx.Base):
     status: str
 
 
+def load_rows(column_store: bool) -> Tuple[ItemColumns, List[Item]]:
+    """The column store and, unless rows stay in columns, the Item list."""
+    columns = load_item_columns(ITEMS_PATH)
+    if column_store:
+        return columns, []
+    return columns, [Item(**row) for row in columns.rows(range(len(columns)))]
+
+
 class TableState(rx.State):
     """The state class."""
 
-    items: List[Item] = []
+    # Backend-only: the rows never go to the browser, only the current page
+    _items: List[Item] = []
+    # Version of the column snapshot `_items` was built from (see item_store)
+    _columns_version: str = ""
+
+    # Keep rows in server-side typed columns and only build Items for the page
+    column_store: bool = False
 
     search_value: str = ""
     sort_value: str = ""
@@ -27,43 +45,41 @@ class TableState(rx.State):
     offset: int = 0
     limit: int = 12  # Number of rows per page
 
-    @rx.var(cache=True)
+    @rx.var(cache=True, backend=True)
     def filtered_sorted_items(self) -> List[Item]:
-        items = self.items
-
-        # Filter items based on selected item
-        if self.sort_value:
-            if self.sort_value in ["payment"]:
-                items = sorted(
-                    items,
-                    key=lambda item: float(getattr(item, self.sort_value)),
-                    reverse=self.sort_reverse,
-                )
-            else:
-                items = sorted(
-                    items,
-                    key=lambda item: str(getattr(item, self.sort_value)).lower(),
-                    reverse=self.sort_reverse,
-                )
-
-        # Filter items based on search value
-        if self.search_value:
-            search_value = self.search_value.lower()
-            items = [
-                item
-                for item in items
-                if any(
-                    search_value in str(getattr(item, attr)).lower()
-                    for attr in [
-                        "name",
-                        "payment",
-                        "date",
-                        "status",
-                    ]
-                )
-            ]
-
-        return items
+        # Only the snapshot loaded by load_entries: the file is never parsed
+        # here, on the event loop, and indices always match `_items`. A
+        # snapshot dropped after the file changed twice shows nothing until
+        # the next load_entries.
+        columns = item_columns_snapshot(self._columns_version)
+        if columns is None:
+            return []
+        if self.column_store:
+            indices = columns.query(
+                self.search_value, self.sort_value, self.sort_reverse
+            )
+            page = indices[self.offset : self.offset + self.limit]
+            return [Item(**row) for row in columns.rows(page)]
+
+        # Sorting uses the permutations cached by the column store; the row
+        # list was built from the same snapshot, in the same order.
+        items = self._items
+        if not items:
+            return []
+        indices = columns.query(self.search_value, self.sort_value, self.sort_reverse)
+        return [items[index] for index in indices]
+
+    @rx.var(cache=True)
+    def export_url(self) -> str:
+        """Backend URL streaming the rows of the current search and sort."""
+        query = urlencode(
+            {
+                "search": self.search_value,
+                "sort": self.sort_value,
+                "reverse": int(self.sort_reverse),
+            }
+        )
+        return f"{rx.config.get_config().api_url}/api/items/export?{query}"
 
     @rx.var(cache=True)
     def page_number(self) -> int:
@@ -77,6 +93,9 @@ class TableState(rx.State):
 
     @rx.var(cache=True, initial_value=[])
     def get_current_page(self) -> list[Item]:
+        if self.column_store:
+            # Already limited to the current page
+            return self.filtered_sorted_items
         start_index = self.offset
         end_index = start_index + self.limit
         return self.filtered_sorted_items[start_index:end_index]
@@ -95,12 +114,24 @@ class TableState(rx.State):
     def last_page(self):
         self.offset = (self.total_pages - 1) * self.limit
 
-    def load_entries(self):
-        with Path("items.csv").open(mode="r", encoding="utf-8") as file:
-            reader = csv.DictReader(file)
-            self.items = [Item(**row) for row in reader]
-            self.total_items = len(self.items)
+    @rx.event(background=True)
+    async def load_entries(self):
+        """Load the items in a worker thread.
+
+        Parsing the CSV and building the sort and search indexes takes
+        seconds on large files; in a background event the other sessions
+        keep being served meanwhile.
+        """
+        async with self:
+            column_store = self.column_store
+        columns, items = await asyncio.to_thread(load_rows, column_store)
+        async with self:
+            self._set_entries(columns, items)
+
+    def _set_entries(self, columns: ItemColumns, items: List[Item]):
+        self._items = items
+        self._columns_version = columns.version
+        self.total_items = len(columns)
 
     def toggle_sort(self):
         self.sort_reverse = not self.sort_reverse
-        self.load_entries()
@@ -1,6 +1,6 @@
 from .user import User
 from .company import Company, CompanyService, CompanyProject
-from .marketplace import Review, Lead, Message
+from .marketplace import Review, Lead, LeadNotification, Message, MarketplaceStats, DailyActivity, UnreadCounter
 
 __all__ = [
     "User",
@@ -9,5 +9,9 @@ __all__ = [
     "CompanyProject",
     "Review",
     "Lead",
-    "Message"
+    "LeadNotification",
+    "Message",
+    "MarketplaceStats",
+    "DailyActivity",
+    "UnreadCounter",
 ]
@@ -1,3 +1,4 @@
+from sqlalchemy import Index, func
 from sqlmodel import Field, Relationship, SQLModel
 from typing import Optional, List
 import datetime
@@ -16,14 +17,18 @@ class Company(SQLModel, table=True):
     email: Optional[str] = None
     website: Optional[str] = None
     logo_url: Optional[str] = None
+    # Coordenadas do município (geocodificação offline em backend/geo.py)
+    latitude: Optional[float] = None
+    longitude: Optional[float] = None
     created_at: datetime.datetime = Field(default_factory=datetime.datetime.now)
     updated_at: datetime.datetime = Field(default_factory=datetime.datetime.now)
     is_active: bool = Field(default=True)
     is_verified: bool = Field(default=False)
     
-    # Métricas
+    # Métricas (mantidas por backend/ratings.py a cada avaliação gravada)
     average_rating: float = Field(default=0.0)
     total_reviews: int = Field(default=0)
+    rating_sum: int = Field(default=0, sa_column_kwargs={"server_default": "0"})
     
     # Relacionamentos
     users: List["User"] = Relationship(back_populates="company")
@@ -31,6 +36,34 @@ class Company(SQLModel, table=True):
     projects: List["CompanyProject"] = Relationship(back_populates="company")
     reviews: List["Review"] = Relationship(back_populates="company")
 
+# Índice da listagem filtrada: empresas ativas por cidade (sem diferenciar
+# maiúsculas) e faixa de avaliação, na ordem (average_rating, id) da paginação.
+Index(
+    "ix_company_active_city_rating",
+    Company.__table__.c.is_active,
+    func.lower(Company.__table__.c.city),
+    Company.__table__.c.average_rating,
+    Company.__table__.c.id,
+)
+# Listagem sem cidade (a página padrão) e filtrada só por UF: as páginas são
+# lidas direto na ordem (average_rating, id), sem ordenar as empresas ativas
+Index(
+    "ix_company_active_rating",
+    Company.__table__.c.is_active,
+    Company.__table__.c.average_rating,
+    Company.__table__.c.id,
+)
+Index(
+    "ix_company_active_state_rating",
+    Company.__table__.c.is_active,
+    Company.__table__.c.state,
+    Company.__table__.c.average_rating,
+    Company.__table__.c.id,
+)
+
+# Busca por raio fora do SQLite (lá o índice espacial é o R*Tree company_geo)
+Index("ix_company_lat_lon", Company.__table__.c.latitude, Company.__table__.c.longitude)
+
 class CompanyService(SQLModel, table=True):
     """Modelo para serviços oferecidos por empresas."""
     id: uuid.UUID = Field(default_factory=uuid.uuid4, primary_key=True)
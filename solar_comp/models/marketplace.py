@@ -1,3 +1,4 @@
+from sqlalchemy import Index
 from sqlmodel import Field, Relationship, SQLModel
 from typing import Optional, Dict, Any
 import datetime
@@ -27,6 +28,31 @@ class Lead(SQLModel, table=True):
     created_at: datetime.datetime = Field(default_factory=datetime.datetime.now)
     status: str = Field(default="new")  # new, contacted, converted, closed
 
+class LeadNotification(SQLModel, table=True):
+    """Aviso de lead a enviar para a empresa (outbox).
+
+    Gravado na mesma transação do lead e enviado por
+    backend/notifications.py.
+    """
+    id: uuid.UUID = Field(default_factory=uuid.uuid4, primary_key=True)
+    lead_id: uuid.UUID = Field(foreign_key="lead.id")
+    company_id: uuid.UUID = Field(foreign_key="company.id")
+    channel: str  # email, webhook
+    recipient: str  # endereço de e-mail ou URL
+    status: str = Field(default="pending")  # pending, sent, failed
+    attempts: int = Field(default=0)
+    next_attempt_at: datetime.datetime = Field(default_factory=datetime.datetime.now)
+    last_error: Optional[str] = None
+    created_at: datetime.datetime = Field(default_factory=datetime.datetime.now)
+    sent_at: Optional[datetime.datetime] = None
+
+# Fila do dispatcher: avisos pendentes na ordem da próxima tentativa
+Index(
+    "ix_leadnotification_status_due",
+    LeadNotification.__table__.c.status,
+    LeadNotification.__table__.c.next_attempt_at,
+)
+
 class Message(SQLModel, table=True):
     """Modelo para mensagens entre usuários e empresas."""
     id: uuid.UUID = Field(default_factory=uuid.uuid4, primary_key=True)
@@ -35,3 +61,61 @@ class Message(SQLModel, table=True):
     content: str
     created_at: datetime.datetime = Field(default_factory=datetime.datetime.now)
     read_at: Optional[datetime.datetime] = None
+
+# Caixa de entrada (não lidas primeiro, read_at IS NULL) e conversa entre
+# dois usuários, ambas na ordem (created_at, id) da paginação por keyset;
+# ver backend/inbox.py
+Index(
+    "ix_message_receiver_read_created",
+    Message.__table__.c.receiver_id,
+    Message.__table__.c.read_at,
+    Message.__table__.c.created_at,
+    Message.__table__.c.id,
+)
+Index(
+    "ix_message_conversation",
+    Message.__table__.c.sender_id,
+    Message.__table__.c.receiver_id,
+    Message.__table__.c.created_at,
+    Message.__table__.c.id,
+)
+
+class UnreadCounter(SQLModel, table=True):
+    """Mensagens não lidas por usuário (badge do topo), sem COUNT(*).
+
+    Mantido por backend/inbox.py: +1 a cada mensagem recebida e -n quando
+    n mensagens são marcadas como lidas.
+    """
+    user_id: uuid.UUID = Field(foreign_key="user.id", primary_key=True)
+    unread: int = Field(default=0)
+
+class MarketplaceStats(SQLModel, table=True):
+    """Resumo pré-calculado das estatísticas do marketplace (linha única).
+
+    Mantido por backend/stats.py: incrementado a cada escrita e recalculado
+    periodicamente.
+    """
+    id: int = Field(default=1, primary_key=True)
+    companies: int = Field(default=0)  # empresas ativas
+    verified_companies: int = Field(default=0)
+    projects: int = Field(default=0)
+    users: int = Field(default=0)
+    leads: int = Field(default=0)
+    reviews: int = Field(default=0)
+    rating_sum: int = Field(default=0)
+    satisfied_reviews: int = Field(default=0)  # notas 4 e 5
+    # Totais de 30 dias atrás, para a variação exibida no painel
+    users_month_ago: int = Field(default=0)
+    leads_month_ago: int = Field(default=0)
+    reviews_month_ago: int = Field(default=0)
+    refreshed_at: datetime.datetime = Field(default_factory=datetime.datetime.now)
+
+class DailyActivity(SQLModel, table=True):
+    """Novos usuários, leads e avaliações por dia (base dos gráficos).
+
+    Cada escrita soma 1 ao dia corrente; ver backend/rollups.py.
+    """
+    day: datetime.date = Field(primary_key=True)
+    users: int = Field(default=0)
+    leads: int = Field(default=0)
+    reviews: int = Field(default=0)
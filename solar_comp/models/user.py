@@ -16,4 +16,5 @@ class User(SQLModel, table=True):
     
     # Relacionamentos (serão definidos posteriormente)
     company_id: Optional[uuid.UUID] = Field(default=None, foreign_key="company.id")
+    company: Optional["Company"] = Relationship(back_populates="users")
     reviews: List["Review"] = Relationship(back_populates="user")
@@ -1,9 +1,19 @@
 """Página de listagem de empresas."""
 
+import os
+
 import reflex as rx
 from ..components.navbar_new import navbar
 from ..components.base import card, section_container, stats_card
 from ..state.company import CompanyState, LeadState, CompanyData
+from ..state.stats import MarketplaceStatsState
+
+# Espera (ms) após a última tecla antes de enviar a busca ao servidor; 0 envia
+# a cada tecla
+SEARCH_DEBOUNCE_MS = int(os.environ.get("SEARCH_DEBOUNCE_MS", 300))
+
+# Sugestões de cidade servidas pelo backend (ver assets/city_autocomplete.js)
+CITY_SUGGEST_URL = f"{rx.config.get_config().api_url}/api/cities"
 
 def rating_select() -> rx.Component:
     """Componente de select para avaliação."""
@@ -18,24 +28,97 @@ def rating_select() -> rx.Component:
         on_change=CompanyState.set_min_rating,
     )
 
+def radius_select() -> rx.Component:
+    """Componente de select para o raio da busca por proximidade."""
+    return rx.select.root(
+        rx.select.trigger(placeholder="Raio"),
+        rx.select.content(
+            rx.select.item("10 km", value="10"),
+            rx.select.item("25 km", value="25"),
+            rx.select.item("50 km", value="50"),
+            rx.select.item("100 km", value="100"),
+            rx.select.item("250 km", value="250"),
+        ),
+        value=CompanyState.radius_km,
+        on_change=CompanyState.set_radius_km,
+    )
+
+def nearby_filters() -> rx.Component:
+    """Controles da busca por raio ("perto de mim")."""
+    return rx.flex(
+        rx.button(
+            "📍 Perto de mim",
+            on_click=CompanyState.locate_me,
+            variant="outline",
+            color_scheme="orange",
+            size="2",
+        ),
+        rx.button(
+            "Perto da cidade",
+            on_click=CompanyState.search_near_city,
+            variant="outline",
+            color_scheme="orange",
+            size="2",
+        ),
+        radius_select(),
+        rx.cond(
+            CompanyState.near_label != "",
+            rx.hstack(
+                rx.text(f"Mais próximas de {CompanyState.near_label}", size="2", color="gray.600"),
+                rx.button("Limpar", on_click=CompanyState.clear_location, variant="ghost", size="1"),
+                spacing="2",
+                align="center",
+            ),
+        ),
+        rx.cond(
+            CompanyState.location_error != "",
+            rx.text(CompanyState.location_error, size="2", color="red.500"),
+        ),
+        spacing="3",
+        width="100%",
+        wrap="wrap",
+        align_items="center",
+    )
+
 def search_filters() -> rx.Component:
     """Componente de filtros de busca."""
     return rx.box(
         rx.vstack(
             rx.heading("Encontre Empresas de Energia Solar", size="4", mb=4),
             rx.flex(
-                rx.input(
-                    placeholder="Buscar por nome ou descrição...",
+                rx.debounce_input(
+                    rx.input(
+                        placeholder="Buscar por nome ou descrição...",
+                        on_change=CompanyState.set_search_query,
+                        flex=2,
+                    ),
                     value=CompanyState.search_query,
-                    on_change=CompanyState.set_search_query,
-                    flex=2,
+                    debounce_timeout=SEARCH_DEBOUNCE_MS,
+                    force_notify_by_enter=True,
                 ),
-                rx.input(
-                    placeholder="Cidade",
-                    value=CompanyState.selected_city,
-                    on_change=CompanyState.set_selected_city,
+                rx.box(
+                    rx.input(
+                        placeholder="Cidade",
+                        default_value=CompanyState.selected_city,
+                        # Recria o campo quando o estado muda a cidade
+                        key=CompanyState.selected_city,
+                        on_blur=CompanyState.set_selected_city,
+                        custom_attrs={
+                            "list": "city-suggestions",
+                            "autoComplete": "off",
+                            "data-suggest-url": CITY_SUGGEST_URL,
+                        },
+                    ),
+                    rx.el.datalist(id="city-suggestions"),
                     flex=1,
                 ),
+                rx.input(
+                    placeholder="UF",
+                    value=CompanyState.selected_state,
+                    on_change=CompanyState.set_selected_state,
+                    max_length=2,
+                    width="4em",
+                ),
                 rating_select(),
                 rx.button(
                     "Buscar",
@@ -48,6 +131,7 @@ def search_filters() -> rx.Component:
                 wrap=rx.breakpoints(initial="wrap", sm="nowrap"),
                 align_items="center",
             ),
+            nearby_filters(),
             spacing="4",
             width="100%",
         ),
@@ -78,6 +162,10 @@ def company_card(company: CompanyData) -> rx.Component:
                         color="gray.600",
                         size="2",
                     ),
+                    rx.cond(
+                        company.distance_label != "",
+                        rx.text(f"📍 a {company.distance_label}", color="orange.600", size="2"),
+                    ),
                     align="start",
                     spacing="1",
                 ),
@@ -152,6 +240,31 @@ def company_card(company: CompanyData) -> rx.Component:
         transition="all 0.3s ease",
     )
 
+def companies_pagination() -> rx.Component:
+    """Controles de navegação entre páginas de empresas."""
+    return rx.hstack(
+        rx.button(
+            "Anterior",
+            on_click=CompanyState.prev_page,
+            disabled=CompanyState.prev_cursor == "",
+            variant="outline",
+            color_scheme="orange",
+        ),
+        rx.text(f"Página {CompanyState.page_number}", size="2", color="gray.600"),
+        rx.button(
+            "Próxima",
+            on_click=CompanyState.next_page,
+            disabled=CompanyState.next_cursor == "",
+            variant="outline",
+            color_scheme="orange",
+        ),
+        spacing="4",
+        align="center",
+        justify="center",
+        width="100%",
+        mt=6,
+    )
+
 def companies_grid() -> rx.Component:
     """Grid de empresas."""
     return rx.box(
@@ -162,17 +275,21 @@ def companies_grid() -> rx.Component:
                 height="200px",
             ),
             rx.cond(
-                CompanyState.companies,
-                rx.flex(
-                    rx.foreach(
-                        CompanyState.filter_companies,  # <-- Corrigido aqui
-                        company_card,
+                CompanyState.filter_companies,
+                rx.vstack(
+                    rx.flex(
+                        rx.foreach(
+                            CompanyState.filter_companies,  # <-- Corrigido aqui
+                            company_card,
+                        ),
+                        wrap=True,
+                        gap="6",
+                        width="100%",
+                        direction=rx.breakpoints(initial="column", sm="row"),
+                        justify="flex-start",
                     ),
-                    wrap=True,
-                    gap="6",
+                    companies_pagination(),
                     width="100%",
-                    direction=rx.breakpoints(initial="column", sm="row"),
-                    justify="flex-start",
                 ),
                 rx.center(
                     rx.vstack(
@@ -198,10 +315,10 @@ def marketplace_stats() -> rx.Component:
     return section_container(
         [
             rx.flex(
-                stats_card("150+", "Empresas Cadastradas", "building"),
-                stats_card("2.500+", "Projetos Realizados", "sun"),
-                stats_card("4.8/5", "Avaliação Média", "star"),
-                stats_card("95%", "Clientes Satisfeitos", "heart"),
+                stats_card(MarketplaceStatsState.companies_label, "Empresas Cadastradas", "building"),
+                stats_card(MarketplaceStatsState.projects_label, "Projetos Realizados", "sun"),
+                stats_card(MarketplaceStatsState.average_rating_label, "Avaliação Média", "star"),
+                stats_card(MarketplaceStatsState.satisfaction_label, "Clientes Satisfeitos", "heart"),
                 direction=rx.breakpoints(initial="column", sm="row"),
                 gap="4",
                 width="100%",
@@ -222,7 +339,8 @@ def empresas_page() -> rx.Component:
             search_filters(),
             companies_grid(),
         ]),
+        rx.script(src="/city_autocomplete.js"),
         spacing="0",
         width="100%",
-        on_mount=CompanyState.load_companies,
+        on_mount=[CompanyState.load_companies, MarketplaceStatsState.load_stats],
     )
@@ -1,20 +1,21 @@
 """The overview page of the app."""
 
-import datetime
-
 import reflex as rx
 
 from .. import styles
 from ..components.card import card
 from ..components.notification import notification
+from ..state.inbox import InboxState
+from ..state.stats import MarketplaceStatsState
 from ..templates import template
 from ..views.acquisition_view import acquisition
 from ..views.charts import (
     StatsState,
     area_toggle,
-    orders_chart,
+    leads_chart,
     pie_chart,
-    revenue_chart,
+    range_select,
+    reviews_chart,
     timeframe_select,
     users_chart,
 )
@@ -26,9 +27,9 @@ def _time_data() -> rx.Component:
     return rx.hstack(
         rx.tooltip(
             rx.icon("info", size=20),
-            content=f"{(datetime.datetime.now() - datetime.timedelta(days=30)).strftime('%b %d, %Y')} - {datetime.datetime.now().strftime('%b %d, %Y')}",
+            content=StatsState.range_label,
         ),
-        rx.text("Last 30 days", size="4", weight="medium"),
+        range_select(),
         align="center",
         spacing="2",
         display=["none", "none", "flex"],
@@ -45,7 +46,11 @@ def tab_content_header() -> rx.Component:
     )
 
 
-@template(route="/", title="Overview", on_load=StatsState.randomize_data)
+@template(
+    route="/",
+    title="Overview",
+    on_load=[StatsState.load_data, MarketplaceStatsState.load_stats, InboxState.load_unread],
+)
 def index() -> rx.Component:
     """The overview page.
 
@@ -67,7 +72,7 @@ def index() -> rx.Component:
             ),
             rx.flex(
                 notification("bell", "cyan", 12),
-                notification("message-square-text", "plum", 6),
+                notification("message-square-text", "plum", InboxState.unread),
                 spacing="4",
                 width="100%",
                 wrap="nowrap",
@@ -83,8 +88,8 @@ def index() -> rx.Component:
                 tab_content_header(),
                 rx.segmented_control.root(
                     rx.segmented_control.item("Users", value="users"),
-                    rx.segmented_control.item("Revenue", value="revenue"),
-                    rx.segmented_control.item("Orders", value="orders"),
+                    rx.segmented_control.item("Leads", value="leads"),
+                    rx.segmented_control.item("Reviews", value="reviews"),
                     margin_bottom="1.5em",
                     default_value="users",
                     on_change=StatsState.set_selected_tab,
@@ -95,8 +100,8 @@ def index() -> rx.Component:
             rx.match(
                 StatsState.selected_tab,
                 ("users", users_chart()),
-                ("revenue", revenue_chart()),
-                ("orders", orders_chart()),
+                ("leads", leads_chart()),
+                ("reviews", reviews_chart()),
             ),
         ),
         rx.grid(
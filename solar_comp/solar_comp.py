@@ -1,19 +1,25 @@
 """Solar Marketplace - Aplicação Reflex."""
 
 import reflex as rx
-from sqlmodel import Session, SQLModel, create_engine
 from . import styles
 from .pages import *
 from .models import *
 from .state import AuthState
+from .backend.api import api
+from .backend.cities import refresh_city_index_periodically
+from .backend.database import create_db_and_tables as init_db, get_engine
+from .backend.delta_metrics import delta_size_middleware
+from .backend.leads import run_lead_worker
+from .backend.notifications import dispatch_lead_notifications
+from .backend.passwords import calibrate_password_hashing
+from .backend.stats import refresh_stats_periodically
 
-# Database setup
-DATABASE_URL = "sqlite:///solar_marketplace.db"  # URL fixa para desenvolvimento
-engine = create_engine(DATABASE_URL)
+# Database setup: a mesma engine (e configuração) usada pelos handlers
+engine = get_engine()
 
 def create_db_and_tables():
     """Cria as tabelas do banco de dados."""
-    SQLModel.metadata.create_all(engine)
+    init_db(engine)
 
 # Create the app
 app = rx.App(
@@ -23,8 +29,23 @@ app = rx.App(
         appearance="light",
         accent_color="orange",
     ),
+    api_transformer=api,
 )
 
+# Mede o tamanho das atualizações enviadas a cada evento
+app.add_middleware(delta_size_middleware)
+
+# Calibra o custo do bcrypt quando o backend inicia
+app.register_lifespan_task(calibrate_password_hashing)
+# Recalcula o resumo de estatísticas na partida e periodicamente
+app.register_lifespan_task(refresh_stats_periodically)
+# Monta (e atualiza periodicamente) o índice do autocompletar de cidades
+app.register_lifespan_task(refresh_city_index_periodically)
+# Grava em lotes os leads aceitos pelo formulário de contato
+app.register_lifespan_task(run_lead_worker)
+# Envia às empresas os avisos de leads gravados no outbox
+app.register_lifespan_task(dispatch_lead_notifications)
+
 # Importar páginas
 from .pages import index, login_page, register_page
 from .pages.empresas import empresas_page
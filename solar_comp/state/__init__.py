@@ -1,4 +1,13 @@
 from .auth import AuthState
-from .company import CompanyState, LeadState
+from .company import CompanyState, LeadState, ReviewState
+from .inbox import InboxState
+from .stats import MarketplaceStatsState
 
-__all__ = ["AuthState", "CompanyState", "LeadState"]
+__all__ = [
+    "AuthState",
+    "CompanyState",
+    "InboxState",
+    "LeadState",
+    "ReviewState",
+    "MarketplaceStatsState",
+]
@@ -1,8 +1,11 @@
 import reflex as rx
-from sqlmodel import Session, select
+from sqlmodel import select
 from typing import Optional
-import bcrypt
 
+from ..backend.database import async_session
+from ..backend.passwords import PasswordHasherBusy, password_hasher
+from ..backend.rollups import activity_increment
+from ..backend.stats import stats_increment
 from ..models.user import User
 from ..models.company import Company
 
@@ -24,20 +27,37 @@ class AuthState(rx.State):
     full_name: str = ""
     form_error: Optional[str] = None
     
-    def login(self) -> bool:
+    async def login(self) -> bool:
         """Realiza o login do usuário usando os dados do estado."""
-        with Session(self.app.db_engine) as session:
-            user = session.exec(
-                select(User).where(User.email == self.email)
+        async with async_session() as session:
+            user = (
+                await session.exec(select(User).where(User.email == self.email))
             ).first()
             
             if not user:
                 self.login_error = "Usuário não encontrado"
                 return False
 
-            if not bcrypt.checkpw(self.password.encode(), user.hashed_password.encode()):
+            try:
+                valid = await password_hasher.verify(self.password, user.hashed_password)
+            except PasswordHasherBusy:
+                self.login_error = "Muitas tentativas no momento, tente novamente"
+                return False
+
+            if not valid:
                 self.login_error = "Senha incorreta"
                 return False
+
+            if password_hasher.needs_rehash(user.hashed_password):
+                # Atualiza hashes gerados com um custo antigo; com o pool
+                # cheio fica para o próximo login, sem barrar este
+                try:
+                    user.hashed_password = await password_hasher.hash(self.password)
+                except PasswordHasherBusy:
+                    pass
+                else:
+                    session.add(user)
+                    await session.commit()
             
             # Login bem sucedido
             self.user_id = str(user.id)
@@ -55,16 +75,16 @@ class AuthState(rx.State):
         self.user_type = None
         self.is_authenticated = False
     
-    def register(self, user_type: str = "consumer") -> bool:
+    async def register(self, user_type: str = "consumer") -> bool:
         """Registra um novo usuário utilizando os dados do formulário."""
         if self.password != self.confirm_password:
             self.form_error = "As senhas não coincidem"
             return False
 
-        with Session(self.app.db_engine) as session:
+        async with async_session() as session:
             # Verifica se email já existe
-            existing_user = session.exec(
-                select(User).where(User.email == self.email)
+            existing_user = (
+                await session.exec(select(User).where(User.email == self.email))
             ).first()
             
             if existing_user:
@@ -72,7 +92,11 @@ class AuthState(rx.State):
                 return False
             
             # Cria novo usuário
-            hashed_password = bcrypt.hashpw(self.password.encode(), bcrypt.gensalt()).decode()
+            try:
+                hashed_password = await password_hasher.hash(self.password)
+            except PasswordHasherBusy:
+                self.form_error = "Muitas tentativas no momento, tente novamente"
+                return False
             new_user = User(
                 email=self.email,
                 hashed_password=hashed_password,
@@ -81,8 +105,10 @@ class AuthState(rx.State):
             )
             
             session.add(new_user)
-            session.commit()
-            session.refresh(new_user)
+            await session.execute(stats_increment(users=1))
+            await session.execute(activity_increment(session.bind.dialect, users=1))
+            await session.commit()
+            await session.refresh(new_user)
             
             # Auto-login após registro
             self.user_id = str(new_user.id)
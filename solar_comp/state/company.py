@@ -1,7 +1,7 @@
 """Estado para gerenciar empresas e marketplace."""
 
 import reflex as rx
-from sqlmodel import Session, select
+from sqlmodel import select
 from typing import List, Optional, Dict, Any
 
 
@@ -19,25 +19,99 @@ class CompanyData(rx.Base):
     email: str = ""
     website: str = ""
     is_verified: bool = False
+    distance_label: str = ""
 from datetime import datetime
+import uuid
 
+from ..backend.companies import (
+    PAGE_SIZE,
+    CompanyFilters,
+    company_cache,
+    fetch_company_page,
+    page_cache_key,
+    search_coalescer,
+)
+from ..backend.cities import city_index
+from ..backend.cnpj import is_valid_cnpj, normalize_cnpj
+from ..backend.database import async_session
+from ..backend.geo import geocode
+from ..backend.leads import lead_queue
+from ..backend.ratings import add_review
+from ..backend.stats import stats_increment
 from ..models.company import Company, CompanyService, CompanyProject
-from ..models.marketplace import Review, Lead
+from ..models.marketplace import Review
+from .auth import AuthState
+
+# Posição do navegador como [latitude, longitude], ou null se indisponível.
+# O Reflex espera a Promise antes de chamar o callback.
+GEOLOCATION_SCRIPT = """
+new Promise((resolve) => {
+    if (!navigator.geolocation) { resolve(null); return; }
+    navigator.geolocation.getCurrentPosition(
+        (position) => resolve([position.coords.latitude, position.coords.longitude]),
+        () => resolve(null),
+        {timeout: 10000, maximumAge: 600000}
+    );
+})
+"""
+
+
+def _format_distance(distance: Optional[float]) -> str:
+    """Distância para exibição ("800 m", "12,4 km")."""
+    if distance is None:
+        return ""
+    if distance < 1:
+        return f"{round(distance * 1000)} m"
+    return f"{distance:.1f} km".replace(".", ",")
+
+
+def _to_company_data(company: Company, distance: Optional[float] = None) -> CompanyData:
+    """Converte um registro de empresa para a representação da UI."""
+    return CompanyData(
+        id=str(company.id),
+        name=company.name,
+        description=company.description or "",
+        city=company.city,
+        state=company.state,
+        average_rating=company.average_rating,
+        total_reviews=company.total_reviews,
+        phone=company.phone or "",
+        email=company.email or "",
+        website=company.website or "",
+        is_verified=company.is_verified,
+        distance_label=_format_distance(distance),
+    )
 
 
 class CompanyState(rx.State):
     """Estado para gerenciar operações de empresas."""
 
-    # Estado das empresas
-    companies: List[CompanyData] = []
+    # Estado das empresas (backend-only; o navegador recebe filter_companies)
+    _companies: List[CompanyData] = []
     selected_company: Optional[CompanyData] = None
     loading: bool = False
 
+    # Paginação (keyset sobre average_rating/id, com offset como fallback)
+    page_size: int = PAGE_SIZE
+    page_offset: int = 0
+    next_cursor: str = ""
+    prev_cursor: str = ""
+    # Incrementado a cada recarga: resultados de buscas antigas são descartados
+    _search_seq: int = 0
+
     # Filtros de busca
     search_query: str = ""
     selected_city: str = ""
+    selected_state: str = ""
     min_rating: str = "0"  # Usando string para compatibilidade com select
 
+    # Busca por raio: centro (posição do navegador ou de uma cidade) e raio
+    near_latitude: Optional[float] = None
+    near_longitude: Optional[float] = None
+    near_label: str = ""
+    radius_km: str = "25"
+    location_error: str = ""
+
     # Formulário de empresa
     company_name: str = ""
     company_description: str = ""
@@ -50,66 +124,228 @@ class CompanyState(rx.State):
     company_website: str = ""
     form_error: Optional[str] = None
 
-    def load_companies(self):
-        """Carrega lista de empresas ativas."""
+    def set_search_query(self, query: str):
+        """Atualiza a busca textual e agenda a recarga da primeira página."""
+        self.search_query = query
+        return self._schedule_search()
+
+    def set_selected_city(self, city: str):
+        """Atualiza o filtro de cidade e agenda a recarga da primeira página.
+
+        Sugestões do autocompletar chegam como "Cidade/UF" e preenchem
+        também a UF.
+        """
+        state = self.selected_state
+        name, _, suffix = city.rpartition("/")
+        if name and len(suffix.strip()) == 2:
+            city, state = name, suffix.strip().upper()
+        city = city.strip()
+        if (city, state) == (self.selected_city, self.selected_state):
+            return  # O campo perde o foco sem mudança: não recarrega
+        self.selected_city, self.selected_state = city, state
+        return self._schedule_search()
+
+    def set_selected_state(self, state: str):
+        """Atualiza o filtro de UF e agenda a recarga da primeira página."""
+        self.selected_state = state
+        return self._schedule_search()
+
+    def set_min_rating(self, min_rating: str):
+        """Atualiza a avaliação mínima e agenda a recarga da primeira página."""
+        self.min_rating = min_rating
+        return self._schedule_search()
+
+    def set_radius_km(self, radius_km: str):
+        """Atualiza o raio da busca e agenda a recarga da primeira página."""
+        self.radius_km = radius_km
+        return self._schedule_search()
+
+    def _schedule_search(self):
+        """Marca a lista como desatualizada e dispara `search_companies`."""
+        self._search_seq += 1
         self.loading = True
-        with Session(self.app.db_engine) as session:
-            companies = session.exec(
-                select(Company).where(Company.is_active == True)
-            ).all()
-            
-            self.companies = [
-                CompanyData(
-                    id=str(company.id),
-                    name=company.name,
-                    description=company.description or "",
-                    city=company.city,
-                    state=company.state,
-                    average_rating=company.average_rating,
-                    total_reviews=company.total_reviews,
-                    phone=company.phone or "",
-                    email=company.email or "",
-                    website=company.website or "",
-                    is_verified=company.is_verified,
-                )
-                for company in companies
-            ]
+        return CompanyState.search_companies
+
+    @rx.event(background=True)
+    async def search_companies(self):
+        """Recarrega a primeira página em segundo plano, coalescendo rajadas.
+
+        Roda fora do lock do estado, então as teclas seguintes continuam
+        chegando; uma busca mais nova da mesma sessão cancela esta ainda em
+        andamento (`search_coalescer`), e só o resultado dos filtros mais
+        recentes é aplicado.
+        """
+        result = await search_coalescer.run(
+            self.router.session.client_token, self._search_latest
+        )
+        if result is None:
+            return
+        seq, (companies, next_cursor, prev_cursor) = result
+        async with self:
+            if seq != self._search_seq:
+                return  # Os filtros mudaram durante a consulta
+            self.page_offset = 0
+            self._companies = list(companies)
+            self.next_cursor = next_cursor
+            self.prev_cursor = prev_cursor
+            self.loading = False
+
+    async def _search_latest(self) -> tuple:
+        """Primeira página para os filtros atuais, com a versão deles."""
+        async with self:
+            seq, filters = self._search_seq, self._filters()
+        return seq, await self._fetch_page(filters, None, None, 0)
+
+    def locate_me(self):
+        """Pede a posição ao navegador; a busca segue em `set_location`."""
+        self.location_error = ""
+        return rx.call_script(GEOLOCATION_SCRIPT, callback=CompanyState.set_location)
+
+    async def set_location(self, position: Optional[List[float]]):
+        """Centraliza a busca por raio na posição devolvida pelo navegador."""
+        if not position:
+            self.location_error = "Não foi possível obter sua localização"
+            return
+        self.near_latitude, self.near_longitude = float(position[0]), float(position[1])
+        self.near_label = "sua localização"
+        self.location_error = ""
+        await self.load_companies()
+
+    async def search_near_city(self):
+        """Centraliza a busca por raio na cidade/UF digitadas nos filtros.
+
+        O filtro de cidade é limpo, senão só a própria cidade entraria no raio.
+        """
+        position = geocode(self.selected_city, self.selected_state)
+        if position is None:
+            self.location_error = "Informe cidade e UF de um município conhecido"
+            return
+        self.near_latitude, self.near_longitude = position
+        self.near_label = f"{self.selected_city.strip()}/{self.selected_state.strip().upper()}"
+        self.selected_city = ""
+        self.location_error = ""
+        await self.load_companies()
+
+    async def clear_location(self):
+        """Volta para a listagem por avaliação."""
+        self.near_latitude = None
+        self.near_longitude = None
+        self.near_label = ""
+        self.location_error = ""
+        await self.load_companies()
+
+    def _filters(self) -> CompanyFilters:
+        """Filtros atuais da página, normalizados."""
+        near = None
+        if self.near_latitude is not None and self.near_longitude is not None:
+            near = (self.near_latitude, self.near_longitude)
+        return CompanyFilters.from_form(
+            query=self.search_query,
+            city=self.selected_city,
+            state=self.selected_state,
+            min_rating=self.min_rating,
+            near=near,
+            radius_km=self.radius_km,
+        )
+
+    async def load_companies(self):
+        """Carrega a primeira página de empresas ativas."""
+        self.page_offset = 0
+        await self._load_page(offset=0)
+
+    async def next_page(self):
+        """Avança para a próxima página de empresas."""
+        if self.next_cursor:
+            await self._load_page(after=self.next_cursor)
+            self.page_offset += self.page_size
+
+    async def prev_page(self):
+        """Volta para a página anterior de empresas."""
+        if self.prev_cursor:
+            await self._load_page(before=self.prev_cursor)
+            self.page_offset = max(0, self.page_offset - self.page_size)
+
+    async def go_to_page(self, page: int):
+        """Vai direto para uma página, usando offset."""
+        self.page_offset = max(0, (int(page) - 1) * self.page_size)
+        await self._load_page(offset=self.page_offset)
+
+    @rx.var
+    def page_number(self) -> int:
+        """Número da página atual, começando em 1."""
+        return self.page_offset // self.page_size + 1
+
+    async def _load_page(
+        self,
+        after: Optional[str] = None,
+        before: Optional[str] = None,
+        offset: int = 0,
+    ):
+        """Busca uma única página e substitui a lista da sessão por ela.
+
+        As páginas passam pelo cache do processo, então sessões diferentes
+        com os mesmos filtros não repetem a consulta.
+        """
+        self._search_seq += 1
+        self.loading = True
+        companies, next_cursor, prev_cursor = await self._fetch_page(
+            self._filters(), after, before, offset
+        )
+        self._companies = list(companies)
+        self.next_cursor = next_cursor
+        self.prev_cursor = prev_cursor
         self.loading = False
 
+    async def _fetch_page(
+        self,
+        filters: CompanyFilters,
+        after: Optional[str],
+        before: Optional[str],
+        offset: int,
+    ) -> tuple:
+        """Uma página pelo cache do processo (consulta o banco só no miss)."""
+        key = page_cache_key(filters, after, before, offset, self.page_size)
+        return await company_cache.aget_or_load(
+            key,
+            lambda: self._query_page(filters, after, before, offset),
+        )
+
+    async def _query_page(
+        self,
+        filters: CompanyFilters,
+        after: Optional[str],
+        before: Optional[str],
+        offset: int,
+    ) -> tuple:
+        """Consulta uma página no banco, no formato guardado em cache."""
+        async with async_session() as session:
+            page = await session.run_sync(
+                lambda sync_session: fetch_company_page(
+                    sync_session,
+                    after=after,
+                    before=before,
+                    offset=offset,
+                    page_size=self.page_size,
+                    filters=filters,
+                )
+            )
+            distances = page.distances or [None] * len(page.companies)
+            companies = tuple(
+                _to_company_data(company, distance)
+                for company, distance in zip(page.companies, distances)
+            )
+        return companies, page.next_cursor or "", page.prev_cursor or ""
+
+    @rx.var(cache=True)
     def filter_companies(self) -> List[CompanyData]:
-        """Filtra empresas baseado nos critérios de busca."""
-        filtered = self.companies
-        
-        if self.search_query:
-            query = self.search_query.lower()
-            filtered = [
-                company
-                for company in filtered
-                if query in company.name.lower()
-                or query in company.description.lower()
-            ]
-        
-        if self.selected_city:
-            filtered = [
-                company
-                for company in filtered
-                if company.city.lower() == self.selected_city.lower()
-            ]
-        
-        try:
-            min_rating = float(self.min_rating)
-            if min_rating > 0:
-                filtered = [
-                    company
-                    for company in filtered
-                    if company.average_rating >= min_rating
-                ]
-        except (ValueError, TypeError):
-            pass  # Ignora se não for um número válido
-        
-        return filtered
+        """Empresas da página atual.
 
-    def register_company(self):
+        Busca textual, cidade, UF e avaliação mínima já são aplicadas na
+        consulta SQL, então só as empresas que atendem aos filtros chegam aqui.
+        """
+        return self._companies
+
+    async def register_company(self):
         """Registra uma nova empresa."""
         # Validações
         if not all([
@@ -121,28 +357,34 @@ class CompanyState(rx.State):
             self.form_error = "Por favor, preencha todos os campos obrigatórios"
             return
         
-        if len(self.company_cnpj) != 14:
-            self.form_error = "CNPJ deve ter 14 dígitos"
+        cnpj = normalize_cnpj(self.company_cnpj)
+        if not is_valid_cnpj(cnpj):
+            self.form_error = "CNPJ inválido"
             return
         
-        with Session(self.app.db_engine) as session:
+        async with async_session() as session:
             # Verificar se CNPJ já existe
-            existing = session.exec(
-                select(Company).where(Company.cnpj == self.company_cnpj)
+            existing = (
+                await session.exec(
+                    select(Company).where(Company.cnpj == cnpj)
+                )
             ).first()
             
             if existing:
                 self.form_error = "CNPJ já cadastrado"
                 return
             
-            # Criar nova empresa
+            # Criar nova empresa (coordenadas do município, se conhecido)
+            latitude, longitude = geocode(self.company_city, self.company_state) or (None, None)
             new_company = Company(
                 name=self.company_name,
                 description=self.company_description,
-                cnpj=self.company_cnpj,
+                cnpj=cnpj,
                 address=self.company_address,
                 city=self.company_city,
                 state=self.company_state,
+                latitude=latitude,
+                longitude=longitude,
                 phone=self.company_phone,
                 email=self.company_email,
                 website=self.company_website,
@@ -152,21 +394,24 @@ class CompanyState(rx.State):
             
             try:
                 session.add(new_company)
-                session.commit()
-                session.refresh(new_company)
+                await session.execute(stats_increment(companies=1))
+                await session.commit()
+                await session.refresh(new_company)
+                company_cache.invalidate()
+                city_index.add(new_company.city, new_company.state)
                 
                 # Limpar formulário
                 self._clear_form()
                 self.form_error = None
                 
                 # Recarregar lista
-                self.load_companies()
+                await self.load_companies()
                 
                 return rx.redirect("/empresas")
             
             except Exception as e:
                 self.form_error = "Erro ao cadastrar empresa. Tente novamente."
-                session.rollback()
+                await session.rollback()
 
     def _clear_form(self):
         """Limpa os campos do formulário."""
@@ -193,8 +438,8 @@ class LeadState(rx.State):
     form_error: Optional[str] = None
     form_success: bool = False
 
-    def send_lead(self):
-        """Envia um lead para uma empresa."""
+    async def send_lead(self):
+        """Envia um lead para uma empresa (gravado em lote; ver backend/leads.py)."""
         if not all([
             self.lead_name,
             self.lead_email,
@@ -204,38 +449,29 @@ class LeadState(rx.State):
             self.form_error = "Por favor, preencha todos os campos obrigatórios"
             return
         
-        with Session(self.app.db_engine) as session:
-            # Verificar se empresa existe
-            company = session.exec(
-                select(Company).where(Company.id == self.selected_company_id)
-            ).first()
-            
-            if not company:
-                self.form_error = "Empresa não encontrada"
-                return
-            
-            # Criar novo lead
-            new_lead = Lead(
-                company_id=self.selected_company_id,
+        try:
+            company_id = uuid.UUID(self.selected_company_id)
+        except ValueError:
+            self.form_error = "Empresa não encontrada"
+            return
+
+        # A existência da empresa é conferida pelo worker, uma vez por lote
+        try:
+            await lead_queue.submit(
+                company_id=company_id,
                 name=self.lead_name,
                 email=self.lead_email,
                 phone=self.lead_phone,
                 message=self.lead_message,
-                created_at=datetime.now(),
             )
-            
-            try:
-                session.add(new_lead)
-                session.commit()
-                
-                # Limpar formulário e mostrar sucesso
-                self._clear_lead_form()
-                self.form_success = True
-                self.form_error = None
-            
-            except Exception as e:
-                self.form_error = "Erro ao enviar mensagem. Tente novamente."
-                session.rollback()
+        except OSError:
+            self.form_error = "Erro ao enviar mensagem. Tente novamente."
+            return
+
+        # Limpar formulário e mostrar sucesso
+        self._clear_lead_form()
+        self.form_success = True
+        self.form_error = None
 
     def _clear_lead_form(self):
         """Limpa o formulário de lead."""
@@ -244,3 +480,54 @@ class LeadState(rx.State):
         self.lead_phone = ""
         self.lead_message = ""
         self.form_success = False
+
+
+class ReviewState(rx.State):
+    """Estado para avaliar empresas."""
+
+    selected_company_id: Optional[str] = None
+    review_rating: int = 5
+    review_comment: str = ""
+    form_error: Optional[str] = None
+    form_success: bool = False
+
+    async def submit_review(self):
+        """Grava a avaliação do usuário logado para a empresa selecionada."""
+        auth = await self.get_state(AuthState)
+        if not auth.is_authenticated:
+            self.form_error = "Faça login para avaliar uma empresa"
+            return
+        if not 1 <= self.review_rating <= 5:
+            self.form_error = "A nota deve estar entre 1 e 5"
+            return
+
+        try:
+            company_id = uuid.UUID(self.selected_company_id or "")
+        except ValueError:
+            self.form_error = "Empresa não encontrada"
+            return
+
+        async with async_session() as session:
+            if not await session.get(Company, company_id):
+                self.form_error = "Empresa não encontrada"
+                return
+            try:
+                # Grava a avaliação e soma a nota aos contadores da empresa
+                # na mesma transação, sem recalcular a média
+                await session.run_sync(
+                    add_review,
+                    company_id,
+                    uuid.UUID(auth.user_id),
+                    self.review_rating,
+                    self.review_comment or None,
+                )
+                await session.commit()
+            except Exception:
+                self.form_error = "Erro ao enviar avaliação. Tente novamente."
+                await session.rollback()
+                return
+
+        company_cache.invalidate()
+        self.review_comment = ""
+        self.form_error = None
+        self.form_success = True
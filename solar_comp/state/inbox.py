@@ -0,0 +1,22 @@
+"""Estado da caixa de entrada exibido no topo das páginas."""
+
+import uuid
+
+import reflex as rx
+
+from ..backend.inbox import load_unread_count
+from .auth import AuthState
+
+
+class InboxState(rx.State):
+    """Mensagens não lidas do usuário logado, lidas de `UnreadCounter`."""
+
+    unread: int = 0
+
+    async def load_unread(self):
+        """Carrega o contador do badge (uma linha, sem COUNT(*))."""
+        auth = await self.get_state(AuthState)
+        if not auth.is_authenticated or not auth.user_id:
+            self.unread = 0
+            return
+        self.unread = await load_unread_count(uuid.UUID(auth.user_id))
@@ -0,0 +1,90 @@
+"""Estado das estatísticas do marketplace exibidas nas páginas."""
+
+import reflex as rx
+
+from ..backend.stats import load_marketplace_stats
+
+
+def _format_count(value: int) -> str:
+    """Número com separador de milhar brasileiro (12.345)."""
+    return f"{value:,}".replace(",", ".")
+
+
+def _change(value: int, previous: int) -> float:
+    """Variação percentual em relação ao valor anterior."""
+    if previous == 0:
+        return 0.0 if value == 0 else 100.0
+    return round((value - previous) / previous * 100, 2)
+
+
+class MarketplaceStatsState(rx.State):
+    """Números do resumo `MarketplaceStats`, lidos de uma única linha."""
+
+    companies: int = 0
+    projects: int = 0
+    users: int = 0
+    leads: int = 0
+    reviews: int = 0
+    rating_sum: int = 0
+    satisfied_reviews: int = 0
+    users_month_ago: int = 0
+    leads_month_ago: int = 0
+    reviews_month_ago: int = 0
+
+    async def load_stats(self):
+        """Carrega o resumo pré-calculado."""
+        stats = await load_marketplace_stats()
+        self.companies = stats.companies
+        self.projects = stats.projects
+        self.users = stats.users
+        self.leads = stats.leads
+        self.reviews = stats.reviews
+        self.rating_sum = stats.rating_sum
+        self.satisfied_reviews = stats.satisfied_reviews
+        self.users_month_ago = stats.users_month_ago
+        self.leads_month_ago = stats.leads_month_ago
+        self.reviews_month_ago = stats.reviews_month_ago
+
+    @rx.var
+    def companies_label(self) -> str:
+        return _format_count(self.companies)
+
+    @rx.var
+    def projects_label(self) -> str:
+        return _format_count(self.projects)
+
+    @rx.var
+    def average_rating_label(self) -> str:
+        if not self.reviews:
+            return "-"
+        return f"{self.rating_sum / self.reviews:.1f}/5".replace(".", ",")
+
+    @rx.var
+    def satisfaction_label(self) -> str:
+        if not self.reviews:
+            return "-"
+        return f"{round(self.satisfied_reviews / self.reviews * 100)}%"
+
+    @rx.var
+    def users_label(self) -> str:
+        return _format_count(self.users)
+
+    @rx.var
+    def leads_label(self) -> str:
+        return _format_count(self.leads)
+
+    @rx.var
+    def reviews_label(self) -> str:
+        return _format_count(self.reviews)
+
+    @rx.var
+    def users_change(self) -> float:
+        return _change(self.users, self.users_month_ago)
+
+    @rx.var
+    def leads_change(self) -> float:
+        return _change(self.leads, self.leads_month_ago)
+
+    @rx.var
+    def reviews_change(self) -> float:
+        return _change(self.reviews, self.reviews_month_ago)
@@ -1,19 +1,34 @@
 import datetime
-import random
 
 import reflex as rx
 from reflex.components.radix.themes.base import (
     LiteralAccentColor,
 )
 
+from ..backend.rollups import load_activity_series
+
+
+RANGE_OPTIONS = {
+    "30": "Last 30 days",
+    "90": "Last 90 days",
+    "365": "Last year",
+    "1825": "Last 5 years",
+}
+# Horizontal pixels per chart point, and the bounds for the point count
+PIXELS_PER_POINT = 6
+MIN_POINTS = 30
+MAX_POINTS = 400
+
 
 class StatsState(rx.State):
     area_toggle: bool = True
     selected_tab: str = "users"
     timeframe: str = "Monthly"
-    users_data = []
-    revenue_data = []
-    orders_data = []
+    range_days: str = "30"
+    chart_points: int = 150
+    users_data: list[dict] = []
+    leads_data: list[dict] = []
+    reviews_data: list[dict] = []
     device_data = []
     yearly_device_data = []
 
@@ -24,39 +39,40 @@ class StatsState(rx.State):
     def toggle_areachart(self):
         self.area_toggle = not self.area_toggle
 
-    def randomize_data(self):
-        # If data is already populated, don't randomize
-        if self.users_data:
-            return
-
-        for i in range(30, -1, -1):  # Include today's data
-            self.revenue_data.append(
-                {
-                    "Date": (
-                        datetime.datetime.now() - datetime.timedelta(days=i)
-                    ).strftime("%m-%d"),
-                    "Revenue": random.randint(1000, 5000),
-                }
-            )
-        for i in range(30, -1, -1):
-            self.orders_data.append(
-                {
-                    "Date": (
-                        datetime.datetime.now() - datetime.timedelta(days=i)
-                    ).strftime("%m-%d"),
-                    "Orders": random.randint(100, 500),
-                }
-            )
-
-        for i in range(30, -1, -1):
-            self.users_data.append(
-                {
-                    "Date": (
-                        datetime.datetime.now() - datetime.timedelta(days=i)
-                    ).strftime("%m-%d"),
-                    "Users": random.randint(100, 500),
-                }
-            )
+    @rx.var
+    def range_label(self) -> str:
+        today = datetime.date.today()
+        start = today - datetime.timedelta(days=int(self.range_days) - 1)
+        return f"{start.strftime('%b %d, %Y')} - {today.strftime('%b %d, %Y')}"
+
+    @rx.event
+    async def set_range_days(self, days: str):
+        self.range_days = days
+        await self.load_activity()
+
+    @rx.event
+    async def set_chart_width(self, width: int):
+        """Size the series to the chart: one point every few pixels."""
+        points = max(MIN_POINTS, min(MAX_POINTS, int(width or 0) // PIXELS_PER_POINT))
+        if points != self.chart_points:
+            self.chart_points = points
+            await self.load_activity()
+
+    async def _series(self, series: str, key: str) -> list[dict]:
+        days = int(self.range_days)
+        date_format = "%m-%d" if days <= 90 else "%Y-%m-%d"
+        points = await load_activity_series(series, days, self.chart_points)
+        return [{"Date": day.strftime(date_format), key: value} for day, value in points]
+
+    async def load_activity(self):
+        """Read the daily rollup for the selected range, downsampled to the
+        chart resolution."""
+        self.users_data = await self._series("users", "Users")
+        self.leads_data = await self._series("leads", "Leads")
+        self.reviews_data = await self._series("reviews", "Reviews")
+
+    async def load_data(self):
+        await self.load_activity()
 
         self.device_data = [
             {"name": "Desktop", "value": 23, "fill": "var(--blue-8)"},
@@ -72,6 +88,8 @@ class StatsState(rx.State):
             {"name": "Other", "value": 9, "fill": "var(--red-8)"},
         ]
 
+        return rx.call_script("window.innerWidth", callback=StatsState.set_chart_width)
+
 
 def area_toggle() -> rx.Component:
     return rx.cond(
@@ -170,7 +188,7 @@ def users_chart() -> rx.Component:
     )
 
 
-def revenue_chart() -> rx.Component:
+def leads_chart() -> rx.Component:
     return rx.cond(
         StatsState.area_toggle,
         rx.recharts.area_chart(
@@ -180,7 +198,7 @@ def revenue_chart() -> rx.Component:
                 stroke_dasharray="3 3",
             ),
             rx.recharts.area(
-                data_key="Revenue",
+                data_key="Leads",
                 stroke=rx.color("green", 9),
                 fill="url(#colorGreen)",
                 type_="monotone",
@@ -188,7 +206,7 @@ def revenue_chart() -> rx.Component:
             rx.recharts.x_axis(data_key="Date", scale="auto"),
             rx.recharts.y_axis(),
             rx.recharts.legend(),
-            data=StatsState.revenue_data,
+            data=StatsState.leads_data,
             height=425,
         ),
         rx.recharts.bar_chart(
@@ -197,20 +215,20 @@ def revenue_chart() -> rx.Component:
                 stroke_dasharray="3 3",
             ),
             rx.recharts.bar(
-                data_key="Revenue",
+                data_key="Leads",
                 stroke=rx.color("green", 9),
                 fill=rx.color("green", 7),
             ),
             rx.recharts.x_axis(data_key="Date", scale="auto"),
             rx.recharts.y_axis(),
             rx.recharts.legend(),
-            data=StatsState.revenue_data,
+            data=StatsState.leads_data,
             height=425,
         ),
     )
 
 
-def orders_chart() -> rx.Component:
+def reviews_chart() -> rx.Component:
     return rx.cond(
         StatsState.area_toggle,
         rx.recharts.area_chart(
@@ -220,7 +238,7 @@ def orders_chart() -> rx.Component:
                 stroke_dasharray="3 3",
             ),
             rx.recharts.area(
-                data_key="Orders",
+                data_key="Reviews",
                 stroke=rx.color("purple", 9),
                 fill="url(#colorPurple)",
                 type_="monotone",
@@ -228,7 +246,7 @@ def orders_chart() -> rx.Component:
             rx.recharts.x_axis(data_key="Date", scale="auto"),
             rx.recharts.y_axis(),
             rx.recharts.legend(),
-            data=StatsState.orders_data,
+            data=StatsState.reviews_data,
             height=425,
         ),
         rx.recharts.bar_chart(
@@ -237,14 +255,14 @@ def orders_chart() -> rx.Component:
                 stroke_dasharray="3 3",
             ),
             rx.recharts.bar(
-                data_key="Orders",
+                data_key="Reviews",
                 stroke=rx.color("purple", 9),
                 fill=rx.color("purple", 7),
             ),
             rx.recharts.x_axis(data_key="Date", scale="auto"),
             rx.recharts.y_axis(),
             rx.recharts.legend(),
-            data=StatsState.orders_data,
+            data=StatsState.reviews_data,
             height=425,
         ),
     )
@@ -294,3 +312,14 @@ def timeframe_select() -> rx.Component:
         variant="surface",
         on_change=StatsState.set_timeframe,
     )
+
+
+def range_select() -> rx.Component:
+    return rx.select.root(
+        rx.select.trigger(variant="surface"),
+        rx.select.content(
+            *[rx.select.item(label, value=days) for days, label in RANGE_OPTIONS.items()]
+        ),
+        value=StatsState.range_days,
+        on_change=StatsState.set_range_days,
+    )
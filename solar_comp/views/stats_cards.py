@@ -2,26 +2,19 @@ import reflex as rx
 from reflex.components.radix.themes.base import LiteralAccentColor
 
 from .. import styles
+from ..state.stats import MarketplaceStatsState
 
 
 def stats_card(
     stat_name: str,
-    value: int,
-    prev_value: int,
+    value: rx.Var[str],
+    change: rx.Var[float],
     icon: str,
     icon_color: LiteralAccentColor,
-    extra_char: str = "",
 ) -> rx.Component:
-    percentage_change = (
-        round(((value - prev_value) / prev_value) * 100, 2)
-        if prev_value != 0
-        else 0
-        if value == 0
-        else float("inf")
-    )
-    change = "increase" if value > prev_value else "decrease"
-    arrow_icon = "trending-up" if value > prev_value else "trending-down"
-    arrow_color = "grass" if value > prev_value else "tomato"
+    """A total with its percentage change from 30 days ago."""
+    increased = change >= 0
+    arrow_color = rx.cond(increased, rx.color("grass", 9), rx.color("tomato", 9))
     return rx.card(
         rx.vstack(
             rx.hstack(
@@ -33,7 +26,7 @@ def stats_card(
                 ),
                 rx.vstack(
                     rx.heading(
-                        f"{extra_char}{value:,}",
+                        value,
                         size="6",
                         weight="bold",
                     ),
@@ -50,22 +43,23 @@ def stats_card(
             ),
             rx.hstack(
                 rx.hstack(
-                    rx.icon(
-                        tag=arrow_icon,
-                        size=24,
-                        color=rx.color(arrow_color, 9),
+                    rx.cond(
+                        increased,
+                        rx.icon(tag="trending-up", size=24, color=arrow_color),
+                        rx.icon(tag="trending-down", size=24, color=arrow_color),
                     ),
                     rx.text(
-                        f"{percentage_change}%",
+                        f"{change}%",
                         size="3",
-                        color=rx.color(arrow_color, 9),
+                        color=arrow_color,
                         weight="medium",
                     ),
                     spacing="2",
                     align="center",
                 ),
                 rx.text(
-                    f"{change} from last month",
+                    rx.cond(increased, "increase", "decrease"),
+                    " from last month",
                     size="2",
                     color=rx.color("gray", 10),
                 ),
@@ -84,24 +78,23 @@ def stats_cards() -> rx.Component:
     return rx.grid(
         stats_card(
             stat_name="Users",
-            value=4200,
-            prev_value=3000,
+            value=MarketplaceStatsState.users_label,
+            change=MarketplaceStatsState.users_change,
             icon="users",
             icon_color="blue",
         ),
         stats_card(
-            stat_name="Revenue",
-            value=12000,
-            prev_value=15000,
-            icon="dollar-sign",
+            stat_name="Leads",
+            value=MarketplaceStatsState.leads_label,
+            change=MarketplaceStatsState.leads_change,
+            icon="mail",
             icon_color="green",
-            extra_char="$",
         ),
         stats_card(
-            stat_name="Orders",
-            value=300,
-            prev_value=250,
-            icon="shopping-cart",
+            stat_name="Reviews",
+            value=MarketplaceStatsState.reviews_label,
+            change=MarketplaceStatsState.reviews_change,
+            icon="star",
             icon_color="purple",
         ),
         gap="1rem",
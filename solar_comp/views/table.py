@@ -161,7 +161,7 @@ def main_table() -> rx.Component:
                 size="3",
                 variant="surface",
                 display=["none", "none", "none", "flex"],
-                on_click=rx.download(url="/items.csv"),
+                on_click=rx.download(url=TableState.export_url),
             ),
             spacing="3",
             justify="between",
@@ -0,0 +1,53 @@
+"""Fixtures compartilhadas: um banco SQLite temporário com a carga sintética."""
+
+import contextlib
+from typing import List
+
+import pytest
+from sqlalchemy import event
+
+# table_state antes de database: o rx.State precisa ser carregado antes do
+# sqlmodel, como acontece na importação do app
+from solar_comp.backend import table_state  # noqa: F401
+from solar_comp.backend.database import configure_engines, create_db_and_tables
+from solar_comp.backend.seed import SeedConfig, seed_database
+
+SEED = SeedConfig(
+    companies=600, users=200, reviews=1_000, leads=200, messages=500, password_rounds=4
+)
+
+
+@pytest.fixture(scope="session")
+def engine(tmp_path_factory):
+    """Engine de um banco semeado, também usada pelos módulos do app."""
+    path = tmp_path_factory.mktemp("db") / "test.db"
+    engine = configure_engines(f"sqlite:///{path}")
+    create_db_and_tables(engine)
+    seed_database(engine, SEED)
+    return engine
+
+
+@pytest.fixture
+def captured_plans(engine):
+    """Plano (EXPLAIN QUERY PLAN) de cada SELECT de `table` executado no bloco."""
+
+    @contextlib.contextmanager
+    def capture_plans(table: str):
+        statements = []
+
+        def capture(conn, cursor, statement, parameters, context, executemany):
+            if statement.lstrip().upper().startswith("SELECT") and f"FROM {table}" in statement:
+                statements.append((statement, parameters))
+
+        event.listen(engine, "before_cursor_execute", capture)
+        plans: List[List[str]] = []
+        try:
+            yield plans
+        finally:
+            event.remove(engine, "before_cursor_execute", capture)
+        with engine.connect() as connection:
+            for statement, parameters in statements:
+                rows = connection.exec_driver_sql(f"EXPLAIN QUERY PLAN {statement}", parameters)
+                plans.append([row[-1] for row in rows])
+
+    return capture_plans
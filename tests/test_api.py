@@ -0,0 +1,14 @@
+from starlette.testclient import TestClient
+
+from solar_comp.backend.api import api
+from solar_comp.backend.companies import company_cache
+
+
+def test_company_cache_metrics_route():
+    company_cache.invalidate()
+    company_cache.get(("rota", "metricas"))
+    response = TestClient(api).get("/api/metrics/company-cache")
+    assert response.status_code == 200
+    stats = response.json()
+    assert stats["misses"] >= 1 and stats["invalidations"] >= 1
+    assert set(stats) >= {"hits", "evictions", "size", "hit_rate"}
@@ -0,0 +1,93 @@
+"""Uma consulta lenta numa sessão não pode travar os handlers das outras."""
+
+import asyncio
+import time
+
+import pytest
+import reflex as rx
+from sqlalchemy import event, func
+from sqlmodel import Session, select
+
+from solar_comp.backend.companies import company_cache
+from solar_comp.backend.database import async_session, get_async_engine, get_engine
+from solar_comp.state.company import CompanyState
+
+SLOW_MS = 800
+# Folga para a página de empresas, bem abaixo da consulta lenta
+FAST_BOUND_S = 0.4
+
+
+def _sleep_ms(ms):
+    time.sleep(ms / 1000)
+    return ms
+
+
+@pytest.fixture(scope="module")
+def slow_sql(engine):
+    """`sleep_ms(n)` no SQL das duas engines, para simular uma consulta lenta."""
+
+    def register(dbapi_connection, connection_record):
+        dbapi_connection.create_function("sleep_ms", 1, _sleep_ms)
+
+    engines = [get_engine(), get_async_engine().sync_engine]
+    get_engine().dispose()
+    for target in engines:
+        event.listen(target, "connect", register)
+    yield
+    for target in engines:
+        event.remove(target, "connect", register)
+    get_engine().dispose()
+
+
+class SlowReportState(rx.State):
+    """Handler com uma consulta lenta, feita pela camada assíncrona."""
+
+    async def slow_report(self):
+        async with async_session() as session:
+            await session.exec(select(func.sleep_ms(SLOW_MS)))
+
+    async def slow_report_blocking(self):
+        # O que os handlers faziam antes: Session síncrona no event loop
+        with Session(get_engine()) as session:
+            session.exec(select(func.sleep_ms(SLOW_MS)))
+
+
+def _substate(state_cls):
+    # Cada raiz é um cliente (aba) diferente
+    root = rx.State(_reflex_internal_init=True)
+    return root.get_substate(state_cls.get_full_name().split(".")[1:])
+
+
+async def _race(slow_handler):
+    """Roda o handler lento e, durante ele, carrega a listagem em outra sessão.
+
+    Retorna (segundos da listagem, se o lento ainda rodava ao fim dela).
+    """
+    slow = asyncio.create_task(slow_handler())
+    await asyncio.sleep(0.05)  # a consulta lenta já está no banco
+    companies = _substate(CompanyState)
+    company_cache.invalidate()
+    started = time.perf_counter()
+    await companies.load_companies()
+    elapsed = time.perf_counter() - started
+    overlapped = not slow.done()
+    await slow
+    # As conexões do aiosqlite ficam presas a este event loop
+    await get_async_engine().dispose()
+    assert companies._companies
+    return elapsed, overlapped
+
+
+def test_other_sessions_stay_responsive(slow_sql):
+    slow = _substate(SlowReportState)
+    elapsed, overlapped = asyncio.run(_race(slow.slow_report))
+    assert overlapped
+    assert elapsed < FAST_BOUND_S
+
+
+def test_blocking_session_would_stall_other_sessions(slow_sql):
+    # Controle: com a Session síncrona o mesmo cenário trava a listagem, o
+    # que mostra que o teste acima detecta a regressão
+    slow = _substate(SlowReportState)
+    elapsed, overlapped = asyncio.run(_race(slow.slow_report_blocking))
+    assert not overlapped
@@ -0,0 +1,102 @@
+"""Planos de execução da listagem de empresas (EXPLAIN QUERY PLAN).
+
+Toda página, com ou sem filtros e cursor, deve ser lida de um índice que já
+entrega a ordem (average_rating, id): sem "USE TEMP B-TREE", o custo de uma
+página não cresce com o número de empresas.
+"""
+
+import pytest
+from sqlmodel import Session
+
+from solar_comp.backend.companies import (
+    CompanyFilters,
+    explain_company_query,
+    fetch_company_page,
+    filtered_statement,
+)
+
+FILTERS = {
+    "sem filtro": CompanyFilters(),
+    "uf": CompanyFilters(state="SP"),
+    "cidade": CompanyFilters(city="são paulo"),
+    "avaliação": CompanyFilters(min_rating=3.5),
+    "uf e avaliação": CompanyFilters(state="SP", min_rating=3.5),
+    "cidade e uf": CompanyFilters(city="são paulo", state="SP", min_rating=1),
+}
+
+INDEXES = {
+    "sem filtro": "ix_company_active_rating",
+    "uf": "ix_company_active_state_rating",
+    "cidade": "ix_company_active_city_rating",
+    "avaliação": "ix_company_active_rating",
+    "uf e avaliação": "ix_company_active_state_rating",
+    "cidade e uf": "ix_company_active_city_rating",
+}
+
+
+@pytest.mark.parametrize("name", FILTERS)
+def test_first_page_uses_ordered_index(engine, name):
+    with Session(engine) as session:
+        plan = explain_company_query(session, FILTERS[name])
+    assert not any("TEMP B-TREE" in step for step in plan), plan
+    assert any(INDEXES[name] in step for step in plan), plan
+
+
+@pytest.mark.parametrize("name", FILTERS)
+def test_keyset_pages_use_ordered_index(engine, captured_plans, name):
+    filters = FILTERS[name]
+    with Session(engine) as session, captured_plans("company") as plans:
+        first = fetch_company_page(session, filters=filters, page_size=5)
+        if first.next_cursor:
+            second = fetch_company_page(session, after=first.next_cursor, filters=filters, page_size=5)
+            fetch_company_page(session, before=second.prev_cursor, filters=filters, page_size=5)
+    assert plans
+    for plan in plans:
+        assert not any("TEMP B-TREE" in step for step in plan), plan
+        assert any(INDEXES[name] in step for step in plan), plan
+
+
+@pytest.mark.parametrize("name", ["sem filtro", "uf", "cidade"])
+def test_cursor_pages_seek_to_the_cursor(engine, captured_plans, name):
+    # Cada consulta de uma página com cursor começa no cursor dentro do
+    # índice (empate em average_rating por id, depois a faixa seguinte), então
+    # a página N não percorre as N-1 anteriores
+    filters = FILTERS[name]
+    with Session(engine) as session:
+        first = fetch_company_page(session, filters=filters, page_size=5)
+        with captured_plans("company") as after_plans:
+            second = fetch_company_page(session, after=first.next_cursor, filters=filters, page_size=5)
+        with captured_plans("company") as before_plans:
+            fetch_company_page(session, before=second.prev_cursor, filters=filters, page_size=5)
+    for plan in after_plans:
+        assert any("average_rating=? AND id<?" in step or "average_rating<?" in step for step in plan), plan
+    for plan in before_plans:
+        assert any("average_rating=? AND id>?" in step or "average_rating>?" in step for step in plan), plan
+
+
+@pytest.mark.parametrize("name", FILTERS)
+def test_keyset_walk_matches_order_by(engine, name):
+    filters = FILTERS[name]
+    with Session(engine) as session:
+        companies = session.exec(filtered_statement(filters)).all()
+        expected = [
+            company.id
+            for company in sorted(
+                companies, key=lambda company: (company.average_rating, company.id.hex), reverse=True
+            )
+        ]
+        pages, cursor = [], None
+        while True:
+            page = fetch_company_page(session, after=cursor, filters=filters, page_size=7)
+            pages.append(page)
+            cursor = page.next_cursor
+            if not cursor:
+                break
+        forward = [company.id for page in pages for company in page.companies]
+        assert len(expected) > 7
+        assert forward == expected
+
+        # Voltando a partir da última página, cada página é a anterior
+        for previous, page in zip(pages, pages[1:]):
+            back = fetch_company_page(session, before=page.prev_cursor, filters=filters, page_size=7)
+            assert [c.id for c in back.companies] == [c.id for c in previous.companies]
@@ -0,0 +1,44 @@
+import json
+
+from sqlalchemy import select
+
+from solar_comp.backend.cnpj import make_cnpj
+from solar_comp.backend.database import create_db_and_tables, create_db_engine
+from solar_comp.backend.importer import BulkImporter, read_records
+from solar_comp.models import Company, CompanyService
+
+
+def _company(number: int, **extra) -> str:
+    record = {"name": f"Empresa {number}", "cnpj": make_cnpj(90_000 + number), "city": "Recife", "state": "PE"}
+    return json.dumps({**record, **extra})
+
+
+def test_malformed_lines_are_reported_and_skipped(tmp_path):
+    path = tmp_path / "empresas.jsonl"
+    path.write_text(
+        "\n".join(
+            [
+                _company(1, services=[{"name": "Instalação"}]),
+                '{"name": "Cortada", "cnpj": ',
+                "[1, 2]",
+                _company(2, services="Instalação"),
+                _company(3, projects=["não é objeto"]),
+                _company(4),
+            ]
+        )
+        + "\n"
+    )
+    engine = create_db_engine(f"sqlite:///{tmp_path / 'import.db'}")
+    create_db_and_tables(engine)
+    importer = BulkImporter(engine, chunk_size=2)
+    importer.import_records(read_records(path))
+    report = importer.finish()
+
+    errors = {(error.line, error.kind) for error in report.errors}
+    assert errors == {(2, "companies"), (3, "companies"), (4, "services"), (5, "projects")}
+    assert report.records == 6
+    assert report.inserted["companies"] == 4 and report.inserted["services"] == 1
+    with engine.connect() as connection:
+        assert len(connection.execute(select(Company.__table__.c.id)).all()) == 4
+        assert len(connection.execute(select(CompanyService.__table__.c.id)).all()) == 1
+    engine.dispose()
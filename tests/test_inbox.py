@@ -0,0 +1,81 @@
+"""Páginas da caixa de entrada: ordem correta e leitura a partir do cursor."""
+
+import datetime
+
+import pytest
+from sqlmodel import Session, or_, select
+
+from solar_comp.backend.inbox import fetch_thread, fetch_unread, send_message
+from solar_comp.models import Message, User
+
+
+@pytest.fixture(scope="module")
+def conversation(engine):
+    """Dois usuários com 40 mensagens trocadas, várias no mesmo instante."""
+    with Session(engine) as session:
+        first, second = session.exec(select(User.id).order_by(User.email).limit(2)).all()
+        start = datetime.datetime(2030, 1, 1)
+        for index in range(40):
+            sender, receiver = (first, second) if index % 2 else (second, first)
+            message = send_message(session, sender, receiver, f"Mensagem {index}")
+            # Empates em created_at, resolvidos pelo id
+            message.created_at = start + datetime.timedelta(minutes=index // 3)
+        session.commit()
+    return first, second
+
+
+def _newest_first(messages):
+    return [m.id for m in sorted(messages, key=lambda m: (m.created_at, m.id.hex), reverse=True)]
+
+
+def _walk(fetch):
+    pages, cursor = [], None
+    while True:
+        page = fetch(cursor)
+        pages.append(page)
+        cursor = page.next_cursor
+        if not cursor:
+            return [message.id for page in pages for message in page.messages]
+
+
+def test_thread_walk_matches_order_by(engine, conversation):
+    first, second = conversation
+    with Session(engine) as session:
+        messages = session.exec(
+            select(Message).where(
+                or_(
+                    (Message.sender_id == first) & (Message.receiver_id == second),
+                    (Message.sender_id == second) & (Message.receiver_id == first),
+                )
+            )
+        ).all()
+        walked = _walk(lambda cursor: fetch_thread(session, first, second, before=cursor, page_size=7))
+    assert len(messages) >= 40
+    assert walked == _newest_first(messages)
+
+
+def test_unread_walk_matches_order_by(engine, conversation):
+    _, second = conversation
+    with Session(engine) as session:
+        messages = session.exec(
+            select(Message).where(Message.receiver_id == second, Message.read_at == None)  # noqa: E711
+        ).all()
+        walked = _walk(lambda cursor: fetch_unread(session, second, before=cursor, page_size=7))
+    assert len(messages) >= 20
+    assert walked == _newest_first(messages)
+
+
+def test_cursor_pages_seek_to_the_cursor(engine, captured_plans, conversation):
+    # A página com cursor começa no cursor dentro do índice (empate em
+    # created_at por id, depois as mais antigas), sem percorrer as mais novas
+    first, second = conversation
+    with Session(engine) as session:
+        thread = fetch_thread(session, first, second, page_size=5)
+        unread = fetch_unread(session, second, page_size=5)
+        with captured_plans("message") as plans:
+            fetch_thread(session, first, second, before=thread.next_cursor, page_size=5)
+            fetch_unread(session, second, before=unread.next_cursor, page_size=5)
+    assert plans
+    for plan in plans:
+        assert not any("TEMP B-TREE" in step for step in plan), plan
+        assert any("created_at=? AND id<?" in step or "created_at<?" in step for step in plan), plan
@@ -0,0 +1,65 @@
+import pytest
+
+from benchmarks import data
+from solar_comp.backend.item_store import ItemColumns
+from solar_comp.backend import table_state
+from solar_comp.backend.table_state import TableState
+
+QUERIES = [
+    "", "it", "ite", "item 1", "item 12", "pend", "2023-0", "99", "canceled", "12.", "x",
+    # Um único trigrama repetido
+    "0000", "00000", "eeee", "1111",
+]
+
+
+@pytest.fixture(scope="module")
+def columns(tmp_path_factory):
+    path = data.write_items_csv(tmp_path_factory.mktemp("items") / "items.csv", 5_000)
+    return ItemColumns.from_csv(path)
+
+
+@pytest.mark.parametrize("query", QUERIES)
+def test_search_matches_a_full_scan(columns, query):
+    expected = [
+        index
+        for index in range(len(columns))
+        if any(query in field for field in columns.row_text(index))
+    ]
+    assert columns.search(query) == expected
+
+
+def test_repeated_trigram_queries_check_the_text(tmp_path):
+    path = tmp_path / "items.csv"
+    path.write_text(
+        "name,payment,date,status\n"
+        "Item 1,1000.5,2023-01-01,Paid\n"
+        "Item 2,10000.5,2023-01-02,Paid\n"
+        "Iteeem,5,2023-01-03,Paid\n"
+    )
+    columns = ItemColumns.from_csv(path)
+    assert columns.search("0000") == [1]
+    assert columns.search("00000") == []
+    assert columns.search("eeee") == []
+    assert columns.search("eee") == [2]
+
+
+def test_load_entries_runs_in_background():
+    assert TableState.event_handlers["load_entries"].is_background
+
+
+def test_table_keeps_its_snapshot_when_the_file_changes(tmp_path, monkeypatch):
+    path = data.write_items_csv(tmp_path / "items.csv", 50)
+    monkeypatch.setattr(table_state, "ITEMS_PATH", path)
+    state = TableState(_reflex_internal_init=True)
+    state._set_entries(*table_state.load_rows(False))
+    before = [item.name for item in state.filtered_sorted_items]
+
+    path.write_text("name,payment,date,status\nOutro,1.0,2024-01-01,Paid\n")
+
+    def parse(path):
+        raise AssertionError("o arquivo foi lido fora de load_entries")
+
+    monkeypatch.setattr(ItemColumns, "from_csv", parse)
+    state.sort_value = "name"
+    names = [item.name for item in state.filtered_sorted_items]
+    assert sorted(names) == sorted(before) and len(names) == 50
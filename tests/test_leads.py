@@ -0,0 +1,88 @@
+"""Fila de leads: nenhum lead confirmado se perde na troca de segmentos."""
+
+import asyncio
+import datetime
+import os
+import threading
+import uuid
+
+from sqlalchemy import select
+
+from solar_comp.backend.leads import LeadQueue, LeadRecord, _try_lock
+from solar_comp.models import Company, Lead
+
+
+def _submit(queue, company_id, name):
+    return queue.submit(company_id=company_id, name=name, email="a@b.c", message="Orçamento")
+
+
+def test_segment_is_kept_while_a_write_awaits_fsync(engine, tmp_path, monkeypatch):
+    with engine.connect() as connection:
+        company_id = connection.execute(select(Company.__table__.c.id).limit(1)).scalar_one()
+    queue = LeadQueue(tmp_path, linger=0)
+    fsync, synced = os.fsync, threading.Event()
+    monkeypatch.setattr(os, "fsync", lambda fd: synced.wait(1) and fsync(fd))
+
+    async def scenario():
+        synced.set()
+        await _submit(queue, company_id, "Primeiro")
+        # O segundo lead já está no journal, mas o fsync ainda não terminou
+        synced.clear()
+        second = asyncio.create_task(_submit(queue, company_id, "Segundo"))
+        await asyncio.sleep(0)
+        # Gravar o primeiro libera o segmento ativo; ele não pode ser apagado
+        await queue.drain()
+        synced.set()
+        second_id = await second
+        # Confirmado, o lead precisa sobreviver a uma queda antes do lote
+        journal = "".join(path.read_text() for path in tmp_path.glob("worker-*/leads-*.jsonl"))
+        assert second_id.hex in journal
+        await queue.drain()
+        return second_id
+
+    second_id = asyncio.run(scenario())
+    with engine.connect() as connection:
+        stored = connection.execute(select(Lead.__table__.c.name).where(Lead.__table__.c.id == second_id))
+        assert stored.scalar_one() == "Segundo"
+    assert queue.stats().depth == 0
+
+
+def test_each_queue_claims_its_own_journal_directory(tmp_path):
+    first, second = LeadQueue(tmp_path), LeadQueue(tmp_path)
+    first._open()
+    second._open()
+    assert first._journal_dir != second._journal_dir
+    assert {first._journal_dir.name, second._journal_dir.name} == {"worker-0", "worker-1"}
+
+
+def test_orphaned_slots_are_replayed(engine, tmp_path):
+    with engine.connect() as connection:
+        company_id = connection.execute(select(Company.__table__.c.id).limit(1)).scalar_one()
+    # worker-3 era de um processo que não voltou; worker-1 está com outro vivo
+    record = LeadRecord(
+        id=uuid.uuid4(),
+        company_id=company_id,
+        name="Órfão",
+        email="a@b.c",
+        phone=None,
+        message="Orçamento",
+        created_at=datetime.datetime.now(),
+    )
+    orphan = tmp_path / "worker-3"
+    orphan.mkdir()
+    (orphan / "leads-00000007.jsonl").write_text(record.to_json() + "\n")
+    alive = LeadQueue(tmp_path)
+    alive._journal_dir = tmp_path / "worker-1"
+    alive._journal_dir.mkdir()
+    alive._lock = _try_lock(alive._journal_dir)
+    (alive._journal_dir / "leads-00000000.jsonl").write_text(record.to_json() + "\n")
+
+    queue = LeadQueue(tmp_path, linger=0)
+    assert asyncio.run(queue.drain())
+
+    assert queue._journal_dir.name == "worker-0"
+    assert not list(orphan.glob("leads-*.jsonl"))
+    assert list(alive._journal_dir.glob("leads-*.jsonl"))
+    with engine.connect() as connection:
+        stored = connection.execute(select(Lead.__table__.c.name).where(Lead.__table__.c.id == record.id))
+        assert stored.scalar_one() == "Órfão"
@@ -0,0 +1,123 @@
+import asyncio
+import datetime
+import uuid
+
+import httpx
+from sqlalchemy import select, update
+
+from solar_comp.backend.notifications import (
+    HttpTransport,
+    LeadDispatcher,
+    NotificationSettings,
+    RateLimiter,
+    claim_notifications,
+    due_notifications,
+)
+from solar_comp.models import Lead, LeadNotification
+
+
+def test_zero_rate_disables_the_limit():
+    limiter = RateLimiter(rate_per_minute=0, burst=1)
+    assert [limiter.acquire("empresa", 0.0) for _ in range(5)] == [0.0] * 5
+
+
+def test_rate_limits_after_the_burst():
+    limiter = RateLimiter(rate_per_minute=60, burst=2)
+    assert [limiter.acquire("empresa", 100.0) for _ in range(3)] == [0.0, 0.0, 1.0]
+
+
+def test_idle_buckets_are_evicted():
+    limiter = RateLimiter(rate_per_minute=60, burst=2)
+    for company in range(100):
+        limiter.acquire(company, 100.0)
+    # Dois segundos depois, todos os baldes estão cheios de novo
+    limiter.acquire("outra", 102.0)
+    assert list(limiter._buckets) == ["outra"]
+
+
+def test_run_closes_the_http_client(engine):
+    dispatcher = LeadDispatcher(NotificationSettings(webhook_url="http://localhost:9"))
+    transport = dispatcher.transports["webhook"]
+    assert isinstance(transport, HttpTransport)
+
+    async def scenario():
+        task = asyncio.create_task(dispatcher.run())
+        await asyncio.sleep(0)
+        transport._client = client = httpx.AsyncClient()
+        task.cancel()
+        await asyncio.gather(task, return_exceptions=True)
+        return client
+
+    client = asyncio.run(scenario())
+    assert client.is_closed and transport._client is None
+
+
+class _Recorder:
+    def __init__(self):
+        self.sent = []
+
+    async def send(self, message):
+        self.sent.extend(row["id"] for row in message.rows)
+
+
+def _pending_notifications(engine, count):
+    lead = Lead.__table__
+    with engine.begin() as connection:
+        leads = connection.execute(select(lead.c.id, lead.c.company_id).limit(count)).all()
+        rows = [
+            {
+                "id": uuid.uuid4(),
+                "lead_id": lead_id,
+                "company_id": company_id,
+                "channel": "webhook",
+                "recipient": "http://localhost:9",
+                "status": "pending",
+                "attempts": 0,
+                "next_attempt_at": datetime.datetime.now() - datetime.timedelta(seconds=1),
+                "created_at": datetime.datetime.now(),
+            }
+            for lead_id, company_id in leads
+        ]
+        connection.execute(LeadNotification.__table__.insert(), rows)
+    return {row["id"] for row in rows}
+
+
+def _dispatcher():
+    dispatcher = LeadDispatcher(
+        NotificationSettings(webhook_url="http://localhost:9", rate_per_minute=0)
+    )
+    dispatcher.transports["webhook"] = _Recorder()
+    return dispatcher
+
+
+def test_a_notification_read_twice_is_claimed_once(engine):
+    ids = _pending_notifications(engine, 5)
+    now = datetime.datetime.now()
+    with engine.connect() as connection:
+        # Dois processos leem o mesmo lote antes de qualquer um tomá-lo
+        first = due_notifications(connection, now, 200)
+        second = due_notifications(connection, now, 200)
+    lease = now + datetime.timedelta(minutes=5)
+    with engine.begin() as connection:
+        assert {row["id"] for row in claim_notifications(connection, first, now, lease)} >= ids
+    with engine.begin() as connection:
+        assert claim_notifications(connection, second, now, lease) == []
+    with engine.begin() as connection:
+        connection.execute(
+            update(LeadNotification.__table__)
+            .where(LeadNotification.__table__.c.id.in_(ids))
+            .values(status="sent")
+        )
+
+
+def test_concurrent_dispatchers_send_each_notification_once(engine):
+    ids = _pending_notifications(engine, 40)
+    dispatchers = [_dispatcher() for _ in range(3)]
+
+    async def scenario():
+        await asyncio.gather(*(dispatcher.dispatch_once() for dispatcher in dispatchers))
+
+    asyncio.run(scenario())
+    sent = [id for dispatcher in dispatchers for id in dispatcher.transports["webhook"].sent]
+    assert len(sent) == len(set(sent))
+    assert set(sent) >= ids
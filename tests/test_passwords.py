@@ -0,0 +1,77 @@
+import asyncio
+
+import bcrypt
+import pytest
+from sqlmodel import Session, select
+from starlette.testclient import TestClient
+
+from solar_comp.backend.api import api
+from solar_comp.backend.database import get_async_engine
+from solar_comp.backend.passwords import (
+    DEFAULT_ROUNDS,
+    PasswordHasher,
+    PasswordHasherBusy,
+    hash_rounds,
+    password_hasher,
+)
+from solar_comp.backend.seed import SEED_PASSWORD
+from solar_comp.models import User
+from solar_comp.state.auth import AuthState
+
+
+def test_calibrate_never_goes_below_default_rounds():
+    hasher = PasswordHasher()
+    # Um alvo impossível de atingir não pode baixar o custo
+    assert hasher.calibrate(target_ms=1) == DEFAULT_ROUNDS
+    assert hasher.rounds == DEFAULT_ROUNDS
+
+
+def test_password_metrics_route():
+    response = TestClient(api).get("/api/metrics/passwords")
+    assert response.status_code == 200
+    assert response.json()["rounds"] == password_hasher.rounds
+    assert set(response.json()) >= {"pending", "rejected", "latency_p95_ms"}
+
+
+def _login(email: str) -> bool:
+    auth = AuthState(_reflex_internal_init=True)
+    auth.email, auth.password = email, SEED_PASSWORD
+
+    async def run():
+        try:
+            return await auth.login()
+        finally:
+            await get_async_engine().dispose()
+
+    return asyncio.run(run())
+
+
+@pytest.fixture
+def seed_user(engine, monkeypatch):
+    """Um usuário da carga (hash com custo 4) e o custo atual em 5."""
+    monkeypatch.setattr(password_hasher, "rounds", 5)
+    with Session(engine) as session:
+        users = session.exec(select(User).order_by(User.email)).all()
+    # Cada teste pega um usuário cujo hash ainda não foi refeito
+    return next(user for user in users if hash_rounds(user.hashed_password) == 4)
+
+
+def _stored_hash(engine, user: User) -> str:
+    with Session(engine) as session:
+        return session.get(User, user.id).hashed_password
+
+
+def test_login_rehashes_an_outdated_hash(engine, seed_user):
+    assert _login(seed_user.email)
+    stored = _stored_hash(engine, seed_user)
+    assert hash_rounds(stored) == 5
+    assert bcrypt.checkpw(SEED_PASSWORD.encode(), stored.encode())
+
+
+def test_busy_rehash_does_not_block_login(engine, seed_user, monkeypatch):
+    async def busy(password):
+        raise PasswordHasherBusy()
+
+    monkeypatch.setattr(password_hasher, "hash", busy)
+    assert _login(seed_user.email)
+    assert _stored_hash(engine, seed_user) == seed_user.hashed_password
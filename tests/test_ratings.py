@@ -0,0 +1,46 @@
+import datetime
+
+import pytest
+from sqlmodel import Session, delete
+
+from solar_comp.backend.database import create_db_and_tables, create_db_engine
+from solar_comp.backend.ratings import add_review, delete_review
+from solar_comp.models import Company, DailyActivity, User
+
+
+@pytest.fixture
+def session(tmp_path):
+    engine = create_db_engine(f"sqlite:///{tmp_path / 'ratings.db'}")
+    create_db_and_tables(engine)
+    with Session(engine) as session:
+        yield session
+    engine.dispose()
+
+
+def _review(session):
+    company = Company(name="Sol", cnpj="1", city="Recife", state="PE")
+    user = User(email="a@b.c", hashed_password="x", full_name="A")
+    session.add_all([company, user])
+    session.flush()
+    review = add_review(session, company.id, user.id, 4)
+    session.commit()
+    return company, review
+
+
+def test_delete_review_decrements_the_day(session):
+    company, review = _review(session)
+    delete_review(session, review)
+    session.commit()
+    assert session.get(DailyActivity, datetime.date.today()).reviews == 0
+    session.refresh(company)
+    assert (company.total_reviews, company.average_rating) == (0, 0.0)
+
+
+def test_delete_review_never_creates_a_negative_bucket(session):
+    _, review = _review(session)
+    # Avaliação anterior ao rollup: o dia dela não tem balde
+    session.exec(delete(DailyActivity))
+    session.commit()
+    delete_review(session, review)
+    session.commit()
+    assert session.get(DailyActivity, datetime.date.today()) is None
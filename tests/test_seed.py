@@ -0,0 +1,26 @@
+from sqlalchemy import select
+
+from solar_comp.backend.database import create_db_and_tables, create_db_engine
+from solar_comp.backend.seed import SeedConfig, seed_database
+from solar_comp.models import Company, Review, User
+
+CONFIG = SeedConfig(companies=20, users=50, reviews=100, leads=20, messages=20, password_rounds=4)
+
+
+def _dump(path):
+    engine = create_db_engine(f"sqlite:///{path}")
+    create_db_and_tables(engine)
+    seed_database(engine, CONFIG)
+    with engine.connect() as connection:
+        tables = [
+            connection.execute(select(model.__table__).order_by(model.__table__.c.id)).all()
+            for model in (User, Company, Review)
+        ]
+    engine.dispose()
+    return tables
+
+
+def test_same_seed_same_rows(tmp_path):
+    first, second = _dump(tmp_path / "a.db"), _dump(tmp_path / "b.db")
+    assert first == second
+    assert first[0][0].hashed_password.startswith("$2b$04$")